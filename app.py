@@ -1,13 +1,23 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
+from datetime import date
 import os
+import json
+import time
 
 # Import our modular services
-from services.weather_service import WeatherService
-from services.hotel_service import HotelService
+from services.weather_service import PlaceNotFound, WeatherService
+from services.hotel_service import BUDGET_RANGES, HotelService
 from services.ai_service import AIService
 from services.user_service import UserService
+from services.http_client import get_http_client
+from services.async_http_client import get_async_http_client
+from services.pipeline import Pipeline, format_server_timing
+from services.job_queue import JobQueue, QueueFull
+from services.itinerary_store import ItineraryStore
+from services.deadline import Deadline
+from services.llm_limiter import INTERACTIVE, BACKGROUND
 from models.user_profile import UserProfile
 
 # Load environment variables
@@ -17,11 +27,23 @@ app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key')
 CORS(app)
 
+# Maximum destinations accepted by the batch weather endpoint
+WEATHER_BATCH_MAX = int(os.getenv('WEATHER_BATCH_MAX', 100))
+
+# Maximum hotels returned by the nearby hotels endpoint
+HOTEL_NEARBY_MAX = int(os.getenv('HOTEL_NEARBY_MAX', 50))
+
 # Initialize services
 weather_service = WeatherService()
 hotel_service = HotelService()
 ai_service = AIService()
 user_service = UserService()
+job_queue = JobQueue.from_env()
+itinerary_store = ItineraryStore.from_env()
+
+def format_sse(event: str, data) -> str:
+    """Render one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @app.route('/')
 def index():
@@ -73,6 +95,100 @@ def get_weather(destination):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/weather/<destination>/hourly')
+def get_hourly_weather(destination):
+    """Get hourly weather for one day, optionally limited to an hour window"""
+    try:
+        day = request.args.get('date')
+        day = date.fromisoformat(day) if day else None
+        start_hour = int(request.args.get('start_hour', 0))
+        end_hour = int(request.args.get('end_hour', 23))
+        if not 0 <= start_hour <= end_hour <= 23:
+            raise ValueError('Hours must satisfy 0 <= start_hour <= end_hour <= 23')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return jsonify(weather_service.get_hourly(destination, day, start_hour, end_hour))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/weather/batch', methods=['POST'])
+def get_weather_batch():
+    """Get weather information for several destinations at once"""
+    try:
+        data = request.get_json() or {}
+        destinations = data.get('destinations')
+        
+        if not isinstance(destinations, list) or not destinations:
+            return jsonify({'error': 'destinations must be a non-empty list'}), 400
+        if not all(isinstance(d, str) and d.strip() for d in destinations):
+            return jsonify({'error': 'destinations must be non-empty strings'}), 400
+        if len(destinations) > WEATHER_BATCH_MAX:
+            return jsonify({'error': f'At most {WEATHER_BATCH_MAX} destinations per request'}), 400
+        
+        return jsonify(weather_service.get_weather_batch([d.strip() for d in destinations]))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hotels/nearby')
+def get_nearby_hotels():
+    """Get the hotels nearest to a coordinate or destination, or every hotel within a radius"""
+    try:
+        latitude = request.args.get('lat')
+        longitude = request.args.get('lon')
+        destination = request.args.get('destination', '').strip()
+        if latitude is not None and longitude is not None:
+            latitude, longitude = float(latitude), float(longitude)
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError('lat must be within ±90 and lon within ±180')
+        elif not destination:
+            raise ValueError('Provide lat and lon, or destination')
+        radius_km = request.args.get('radius_km')
+        radius_km = float(radius_km) if radius_km is not None else None
+        if radius_km is not None and not radius_km > 0:
+            raise ValueError('radius_km must be positive')
+        k = request.args.get('k')
+        k = int(k) if k is not None else None
+        if k is not None and not 1 <= k <= HOTEL_NEARBY_MAX:
+            raise ValueError(f'k must be between 1 and {HOTEL_NEARBY_MAX}')
+        budget = request.args.get('budget')
+        if budget is not None and budget not in BUDGET_RANGES:
+            raise ValueError(f"budget must be one of {', '.join(BUDGET_RANGES)}")
+        companions = int(request.args.get('companions', 1))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        place = None
+        if not isinstance(latitude, float):
+            # Same coordinates the destination's forecast is fetched for, but an
+            # unknown destination is a 404 rather than the weather's London default
+            try:
+                located = weather_service.locate(destination, Deadline.from_env(), fallback=False)
+            except PlaceNotFound as e:
+                return jsonify({'error': str(e)}), 404
+            if located is None:
+                return jsonify({'error': 'Timed out resolving destination'}), 504
+            latitude, longitude, place = located
+        
+        if radius_km is not None and k is None:
+            hotels = hotel_service.get_hotels_within(
+                latitude, longitude, radius_km, budget, companions, limit=HOTEL_NEARBY_MAX
+            )
+        else:
+            hotels = hotel_service.get_nearest_hotels(latitude, longitude, k or 5, budget, companions, radius_km)
+        
+        return jsonify({
+            'latitude': latitude,
+            'longitude': longitude,
+            'place': place,
+            'radius_km': radius_km,
+            'hotels': hotels
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/hotels/<destination>')
 def get_hotels(destination):
     """Get hotel recommendations for destination"""
@@ -85,9 +201,59 @@ def get_hotels(destination):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def wants_async(data) -> bool:
+    """Whether a client asked for a job id instead of waiting for the result"""
+    return bool(data.get('async')) or 'respond-async' in request.headers.get('Prefer', '')
+
+def job_response(job, status_code: int = 200):
+    """Render a job status document; unfinished jobs tell the client when to poll again"""
+    response = jsonify(job.to_dict())
+    response.status_code = status_code
+    if not job.done:
+        response.headers['Location'] = f"/api/itinerary/jobs/{job.id}"
+        response.headers['Retry-After'] = '1'
+    return response
+
+def run_itinerary_pipeline(profile: UserProfile, deadline: Deadline = None, priority: int = INTERACTIVE):
+    """Fetch weather and hotels and generate the itinerary, returning ``(body, timings)``"""
+    # Hotels don't depend on the weather, so they are fetched while the
+    # forecast is in flight; the itinerary starts once both are ready.
+    # Every outbound call gets only what is left of the deadline.
+    pipeline = Pipeline()
+    pipeline.add('geocode', lambda: weather_service.locate(profile.destination, deadline))
+    pipeline.add(
+        'weather',
+        lambda geocode: weather_service.get_weather(profile.destination, coordinates=geocode, deadline=deadline),
+        depends_on=['geocode']
+    )
+    pipeline.add(
+        'hotels',
+        lambda: hotel_service.get_hotels(
+            profile.destination, 
+            profile.budget_range, 
+            profile.companions
+        )
+    )
+    pipeline.add(
+        'itinerary',
+        lambda weather, hotels: ai_service.generate_itinerary(profile, weather, hotels, deadline, priority),
+        depends_on=['weather', 'hotels']
+    )
+    results, timings = pipeline.run()
+    
+    # Kept so single days can be regenerated later from the same inputs
+    stored = itinerary_store.save(profile, results['weather'], results['hotels'], results['itinerary'])
+    return {
+        'itinerary_id': stored.id,
+        'itinerary': results['itinerary'],
+        'weather': results['weather'],
+        'hotels': results['hotels']
+    }, timings
+
 @app.route('/api/itinerary/generate', methods=['POST'])
 def generate_itinerary():
-    """Generate personalized itinerary"""
+    """Generate personalized itinerary, or queue it as a job when asked to"""
+    deadline = Deadline.from_env()
     try:
         data = request.get_json()
         user_id = data.get('user_id')
@@ -100,32 +266,171 @@ def generate_itinerary():
         if not profile:
             return jsonify({'error': 'User profile not found'}), 404
         
-        # Get weather data
-        weather_data = weather_service.get_weather(profile.destination)
+        if wants_async(data):
+            # Jobs outlive the request, so they are not held to its deadline,
+            # and they wait behind interactive requests for the LLM
+            def run(job):
+                body, job.timings = run_itinerary_pipeline(profile, priority=BACKGROUND)
+                return body
+            try:
+                job = job_queue.submit('itinerary', run)
+            except QueueFull as e:
+                response = jsonify({'error': str(e)})
+                response.status_code = 503
+                response.headers['Retry-After'] = '5'
+                return response
+            return job_response(job, 202)
         
-        # Get hotel recommendations
-        hotels = hotel_service.get_hotels(
-            profile.destination, 
-            profile.budget_range, 
-            profile.companions
-        )
+        body, timings = run_itinerary_pipeline(profile, deadline)
+        response = jsonify(body)
+        response.headers['Server-Timing'] = format_server_timing(timings)
+        return response
         
-        # Generate AI-powered itinerary
-        itinerary = ai_service.generate_itinerary(
-            profile, 
-            weather_data, 
-            hotels
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/itinerary/jobs/<job_id>')
+def get_itinerary_job(job_id):
+    """Report a queued itinerary job; ``?wait=<seconds>`` holds the request until it finishes"""
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return job_response(job)
+
+@app.route('/api/itinerary/<itinerary_id>')
+def get_stored_itinerary(itinerary_id):
+    """Return a generated itinerary with any regenerated days spliced in"""
+    stored = itinerary_store.get(itinerary_id)
+    if stored is None:
+        return jsonify({'error': 'Itinerary not found or expired'}), 404
+    return jsonify({
+        'itinerary_id': stored.id,
+        'revision': stored.revision,
+        'itinerary': stored.itinerary
+    })
+
+@app.route('/api/itinerary/<itinerary_id>/days/<int:day>/regenerate', methods=['POST'])
+def regenerate_itinerary_day(itinerary_id, day):
+    """Replace one day of a stored itinerary, reusing its weather and hotels"""
+    deadline = Deadline.from_env()
+    try:
+        data = request.get_json(silent=True) or {}
+        feedback = data.get('feedback')
+        if feedback is not None and not isinstance(feedback, str):
+            return jsonify({'error': 'feedback must be a string'}), 400
+        
+        stored = itinerary_store.get(itinerary_id)
+        if stored is None:
+            return jsonify({'error': 'Itinerary not found or expired'}), 404
+        if stored.day(day) is None:
+            return jsonify({'error': f'Itinerary has no day {day}'}), 404
+        
+        start = time.perf_counter()
+        generated_by, new_day = ai_service.regenerate_day(
+            stored.profile, stored.weather, stored.hotels, stored.itinerary['days'], day, feedback, deadline
         )
+        elapsed = (time.perf_counter() - start) * 1000
         
-        return jsonify({
-            'itinerary': itinerary,
-            'weather': weather_data,
-            'hotels': hotels
+        stored = itinerary_store.replace_day(itinerary_id, day, new_day)
+        if stored is None:
+            return jsonify({'error': 'Itinerary not found or expired'}), 404
+        
+        response = jsonify({
+            'itinerary_id': stored.id,
+            'revision': stored.revision,
+            'generated_by': generated_by,
+            'day': new_day
         })
+        response.headers['Server-Timing'] = format_server_timing({'itinerary': elapsed, 'total': elapsed})
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/itinerary/stream')
+def stream_itinerary():
+    """Generate personalized itinerary as server-sent events, one per finished day"""
+    deadline = Deadline.from_env()
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'User ID is required'}), 400
+    
+    profile = user_service.get_profile(user_id)
+    if not profile:
+        return jsonify({'error': 'User profile not found'}), 404
+    
+    def events():
+        try:
+            pipeline = Pipeline()
+            pipeline.add('geocode', lambda: weather_service.locate(profile.destination, deadline))
+            pipeline.add(
+                'weather',
+                lambda geocode: weather_service.get_weather(profile.destination, coordinates=geocode, deadline=deadline),
+                depends_on=['geocode']
+            )
+            pipeline.add(
+                'hotels',
+                lambda: hotel_service.get_hotels(
+                    profile.destination, 
+                    profile.budget_range, 
+                    profile.companions
+                )
+            )
+            results, timings = pipeline.run()
+            yield format_sse('context', {
+                'weather': results['weather'],
+                'hotels': results['hotels'],
+                'timings': timings
+            })
+            
+            for event, data in ai_service.stream_itinerary(profile, results['weather'], results['hotels'], deadline):
+                if event == 'complete':
+                    stored = itinerary_store.save(profile, results['weather'], results['hotels'], data)
+                    yield format_sse('stored', {'itinerary_id': stored.id})
+                yield format_sse(event, data)
+        except Exception as e:
+            # Not named "error": EventSource reserves that for connection failures
+            yield format_sse('failure', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/itinerary/cache', methods=['DELETE'])
+def invalidate_itinerary_cache():
+    """Drop cached itineraries for ?destination=, or all of them"""
+    try:
+        removed = ai_service.invalidate_cache(request.args.get('destination'))
+        return jsonify({'removed': removed})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Expose cache and service counters"""
+    return jsonify({
+        'weather_cache': weather_service.get_cache_stats(),
+        'weather_coalescing': weather_service.get_coalescing_stats(),
+        'itinerary_cache': ai_service.get_cache_stats(),
+        'itinerary_similarity': ai_service.get_similarity_stats(),
+        'ai_hedging': ai_service.get_hedging_stats(),
+        'ai_prompts': ai_service.get_prompt_stats(),
+        'ai_parsing': ai_service.get_parse_stats(),
+        'ai_deadlines': ai_service.get_deadline_stats(),
+        'llm_limiter': ai_service.get_limiter_stats(),
+        'jobs': job_queue.stats(),
+        'itinerary_store': itinerary_store.stats(),
+        'http': get_http_client().stats(),
+        'async_http': get_async_http_client().stats()
+    })
+
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
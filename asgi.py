@@ -0,0 +1,144 @@
+"""
+ASGI entry point: ``uvicorn asgi:app``
+
+The /api/async/* routes are served here on the server's event loop, so a
+request that is awaiting the weather API or an LLM holds no thread and many
+can be in flight per process. Every other path is handed to the Flask app,
+which asgiref runs on its thread pool just as a WSGI server would.
+"""
+import time
+import asyncio
+from urllib.parse import unquote
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, weather_service, hotel_service, ai_service, user_service, itinerary_store
+from services.async_weather_service import AsyncWeatherService
+from services.async_ai_service import AsyncAIService
+from services.pipeline import format_server_timing
+from services.deadline import Deadline
+
+# Async variants share the caches and parsers of the Flask app's services
+async_weather_service = AsyncWeatherService(weather_service)
+async_ai_service = AsyncAIService(ai_service)
+
+wsgi_app = WsgiToAsgi(flask_app)
+
+# Same headers flask-cors adds to the Flask routes
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+    (b'access-control-allow-headers', b'Content-Type')
+]
+
+
+async def get_weather_async(destination):
+    """Get weather information for destination without holding a thread on I/O"""
+    try:
+        return 200, await async_weather_service.get_weather(destination), {}
+    except Exception as e:
+        return 500, {'error': str(e)}, {}
+
+
+async def generate_itinerary_async(data):
+    """Generate personalized itinerary, awaiting the upstream calls"""
+    deadline = Deadline.from_env()
+    try:
+        user_id = data.get('user_id')
+
+        if not user_id:
+            return 400, {'error': 'User ID is required'}, {}
+
+        # Get user profile
+        profile = user_service.get_profile(user_id)
+        if not profile:
+            return 404, {'error': 'User profile not found'}, {}
+
+        # Hotels are served from local data, so they run in a thread while
+        # the forecast request is awaited
+        timings = {}
+        start = time.perf_counter()
+        weather, hotels = await asyncio.gather(
+            async_weather_service.get_weather(profile.destination, deadline=deadline),
+            asyncio.to_thread(
+                hotel_service.get_hotels,
+                profile.destination,
+                profile.budget_range,
+                profile.companions
+            )
+        )
+        timings['upstream'] = (time.perf_counter() - start) * 1000
+
+        itinerary_start = time.perf_counter()
+        itinerary = await async_ai_service.generate_itinerary(profile, weather, hotels, deadline)
+        timings['itinerary'] = (time.perf_counter() - itinerary_start) * 1000
+        timings['total'] = (time.perf_counter() - start) * 1000
+
+        stored = itinerary_store.save(profile, weather, hotels, itinerary)
+        return 200, {
+            'itinerary_id': stored.id,
+            'itinerary': itinerary,
+            'weather': weather,
+            'hotels': hotels
+        }, {'Server-Timing': format_server_timing(timings)}
+
+    except Exception as e:
+        return 500, {'error': str(e)}, {}
+
+
+async def app(scope, receive, send):
+    """Serve the async routes directly and everything else through Flask"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            await send({'type': message['type'] + '.complete'})
+            if message['type'] == 'lifespan.shutdown':
+                return
+
+    path = scope.get('path', '')
+    if scope['type'] == 'http' and path.startswith('/api/async/'):
+        method = scope['method']
+        if method == 'OPTIONS':
+            await send({'type': 'http.response.start', 'status': 204, 'headers': CORS_HEADERS})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        if method == 'GET' and path.startswith('/api/async/weather/'):
+            destination = unquote(path[len('/api/async/weather/'):])
+            return await respond(send, *await get_weather_async(destination))
+        if method == 'POST' and path == '/api/async/itinerary/generate':
+            try:
+                data = flask_app.json.loads(await read_body(receive))
+            except ValueError:
+                return await respond(send, 400, {'error': 'Request body must be JSON'}, {})
+            if not isinstance(data, dict):
+                return await respond(send, 400, {'error': 'Request body must be a JSON object'}, {})
+            return await respond(send, *await generate_itinerary_async(data))
+
+    await wsgi_app(scope, receive, send)
+
+
+async def read_body(receive) -> bytes:
+    """Collect the whole request body"""
+    chunks = []
+    more = True
+    while more:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        more = message.get('more_body', False)
+    return b''.join(chunks)
+
+
+async def respond(send, status, body, headers):
+    """Send a JSON response encoded the way Flask's ``jsonify`` would"""
+    payload = (flask_app.json.dumps(body, separators=(',', ':')) + '\n').encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode()),
+            *CORS_HEADERS,
+            *((name.lower().encode(), value.encode()) for name, value in headers.items())
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
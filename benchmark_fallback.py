@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the rule-based fallback itinerary.
+
+Compares the previous activity selection (the per-call interest mapping and
+per-day indoor keyword scan, kept inline below as the "legacy" path) with the
+precomputed ActivityCatalog, then times a complete 30-day fallback itinerary.
+No network access is needed.
+
+Usage: python benchmark_fallback.py [iterations]
+"""
+import sys
+import timeit
+
+from models.weather_codes import RAIN, description_flags
+from models.user_profile import UserProfile
+from services.activity_catalog import ACTIVITY_CATALOG, INDOOR
+from services.ai_service import AIService
+
+DESCRIPTIONS = ['Slight rain', 'Partly cloudy', 'Clear sky', 'Moderate rain showers', 'Overcast', 'Thunderstorm', 'Mainly clear']
+
+SAMPLE_WEATHER = {
+    'current': {'temperature': 27.4, 'description': 'Slight rain'},
+    'forecast': [
+        {
+            'date': f"2026-10-{17 + i}",
+            'temperature_max': 30.0 + i % 3,
+            'temperature_min': 24.0 + i % 2,
+            'description': description
+        }
+        for i, description in enumerate(DESCRIPTIONS)
+    ]
+}
+
+
+def legacy_selection(profile, weather_data):
+    """Previous activity selection: rebuilds the mapping, then filters every rainy day"""
+    activity_mapping = {
+        'museums': ['Visit local museums', 'Art galleries tour', 'Historical sites'],
+        'parks': ['City parks walk', 'Botanical gardens', 'Nature trails'],
+        'restaurants': ['Local cuisine tour', 'Food market visit', 'Fine dining experience'],
+        'shopping': ['Shopping district tour', 'Local markets', 'Souvenir shopping'],
+        'nightlife': ['Evening entertainment', 'Local bars/clubs', 'Night tours'],
+        'beaches': ['Beach relaxation', 'Water activities', 'Seaside walks'],
+        'adventure': ['Adventure sports', 'Hiking trails', 'Outdoor activities'],
+        'culture': ['Cultural sites', 'Traditional performances', 'Local festivals']
+    }
+    available_activities = []
+    for interest in profile.interests:
+        if interest.lower() in activity_mapping:
+            available_activities.extend(activity_mapping[interest.lower()])
+    if not available_activities:
+        available_activities = ['City center exploration', 'Local landmark visits', 'Walking tours',
+                                'Local restaurant visits', 'Market exploration']
+
+    selections = []
+    for day_num in range(1, profile.days + 1):
+        forecast_index = min(day_num - 1, len(weather_data['forecast']) - 1)
+        if description_flags(weather_data['forecast'][forecast_index]['description']) & RAIN:
+            day_activities = [act for act in available_activities if any(indoor in act.lower() for indoor in ['museum', 'gallery', 'market', 'restaurant', 'shopping'])]
+        else:
+            day_activities = available_activities
+        selections.append(day_activities[:4])
+    return selections
+
+
+def catalog_selection(profile, weather_data):
+    """Current activity selection: two catalog lookups per itinerary"""
+    dry_activities = ACTIVITY_CATALOG.for_profile(profile)
+    rainy_activities = ACTIVITY_CATALOG.for_profile(profile, INDOOR)
+    selections = []
+    for day_num in range(1, profile.days + 1):
+        forecast_index = min(day_num - 1, len(weather_data['forecast']) - 1)
+        rainy = description_flags(weather_data['forecast'][forecast_index]['description']) & RAIN
+        day_activities = rainy_activities if rainy else dry_activities
+        selections.append(day_activities[:4])
+    return selections
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    service = AIService()
+    profile = UserProfile(
+        name='Benchmark', travel_type='group', companions=4, health_conditions=['heart condition'],
+        destination='Goa', days=30, interests=['museums', 'restaurants', 'shopping', 'culture'], budget_range='medium'
+    )
+    hotels = [{'name': 'Sample Hotel', 'price_per_night': 4500}]
+
+    print(f"⏱️  Fallback itinerary microbenchmark ({iterations} itineraries, {profile.days}-day trip)")
+    results = {}
+    for label, func in (('legacy selection', legacy_selection), ('catalog selection', catalog_selection)):
+        seconds = min(timeit.repeat(lambda: func(profile, SAMPLE_WEATHER), number=iterations, repeat=3))
+        results[label] = seconds / iterations * 1e6
+        print(f"  {label:<20} {results[label]:8.2f} µs/itinerary")
+
+    legacy, catalog = results['legacy selection'], results['catalog selection']
+    print(f"  saving               {legacy - catalog:8.2f} µs/itinerary ({(1 - catalog / legacy) * 100:.0f}%)")
+
+    seconds = min(timeit.repeat(
+        lambda: service._generate_fallback_itinerary(profile, SAMPLE_WEATHER, hotels), number=iterations, repeat=3
+    ))
+    print(f"  full fallback        {seconds / iterations * 1e6:8.2f} µs/itinerary")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the per-request weather rule CPU cost.
+
+Compares the previous implementation (kept inline below as the "legacy"
+path), which rebuilt the weather code table on every lookup and matched
+substrings of lowercased descriptions, with the module-level code tables
+and precomputed category flags now used by WeatherService and AIService.
+Both sides build the full weather payload
+(current conditions, forecast, travel recommendations) and evaluate the
+packing and fallback-itinerary weather checks, and must return equal
+results. Runs alternate between the sides and the median is reported.
+No network access is needed.
+
+Usage: python benchmark_forecast.py [iterations]
+"""
+import sys
+import timeit
+import statistics
+
+from models.weather_codes import RAIN, description_flags
+from models.user_profile import UserProfile
+from services.weather_service import WeatherService
+
+# Timed runs per side; the median is reported
+RUNS = 9
+
+SAMPLE_RESPONSE = {
+    'current': {'temperature_2m': 27.4, 'relative_humidity_2m': 78, 'wind_speed_10m': 11.2, 'weather_code': 61},
+    'daily': {
+        'time': ['2026-10-17', '2026-10-18', '2026-10-19', '2026-10-20', '2026-10-21', '2026-10-22', '2026-10-23'],
+        'weather_code': [61, 80, 2, 0, 3, 95, 1],
+        'temperature_2m_max': [30.1, 29.4, 31.0, 32.2, 30.8, 28.9, 31.5],
+        'temperature_2m_min': [24.3, 24.0, 24.8, 25.1, 24.6, 23.9, 24.7],
+        'wind_speed_10m_max': [14.2, 18.9, 9.1, 7.5, 10.4, 22.7, 8.3]
+    }
+}
+
+
+def legacy_description(weather_code):
+    """Previous implementation: rebuilds the code table on every call"""
+    weather_codes = {
+        0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast", 45: "Fog",
+        48: "Depositing rime fog", 51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+        56: "Light freezing drizzle", 57: "Dense freezing drizzle", 61: "Slight rain", 63: "Moderate rain",
+        65: "Heavy rain", 66: "Light freezing rain", 67: "Heavy freezing rain", 71: "Slight snow fall",
+        73: "Moderate snow fall", 75: "Heavy snow fall", 77: "Snow grains", 80: "Slight rain showers",
+        81: "Moderate rain showers", 82: "Violent rain showers", 85: "Slight snow showers",
+        86: "Heavy snow showers", 95: "Thunderstorm", 96: "Thunderstorm with slight hail",
+        99: "Thunderstorm with heavy hail"
+    }
+    return weather_codes.get(weather_code, "Unknown")
+
+
+def legacy_current(service, data, city_name):
+    """Previous current-weather parsing, with the per-call code table"""
+    current = data.get('current', {})
+    humidity = current.get('relative_humidity_2m', 50)
+    return {
+        'temperature': round(current.get('temperature_2m', 20), 1),
+        'feels_like': round(current.get('temperature_2m', 20), 1),
+        'humidity': humidity,
+        'humidity_level': service._get_humidity_level(humidity),
+        'pressure': 1013,
+        'description': legacy_description(current.get('weather_code', 0)),
+        'icon': service._get_weather_icon(current.get('weather_code', 0)),
+        'wind_speed': round(current.get('wind_speed_10m', 5), 1),
+        'wind_description': service._get_wind_description(current.get('wind_speed_10m', 5)),
+        'visibility': 10,
+        'city': city_name,
+        'country': '',
+        'google_maps_url': f"https://www.google.com/maps/search/{city_name.replace(' ', '+')}"
+    }
+
+
+def legacy_forecast(service, data):
+    """Previous forecast parsing over the raw response lists"""
+    daily = data.get('daily', {})
+    dates = daily.get('time', [])
+    max_temps = daily.get('temperature_2m_max', [])
+    min_temps = daily.get('temperature_2m_min', [])
+    weather_codes = daily.get('weather_code', [])
+    wind_speeds = daily.get('wind_speed_10m_max', [])
+
+    forecast = []
+    for i in range(min(len(dates), 7)):
+        humidity = 50 + (i * 5)
+        forecast.append({
+            'date': dates[i],
+            'temperature_max': round(max_temps[i] if i < len(max_temps) else 20, 1),
+            'temperature_min': round(min_temps[i] if i < len(min_temps) else 15, 1),
+            'description': legacy_description(weather_codes[i] if i < len(weather_codes) else 0),
+            'icon': service._get_weather_icon(weather_codes[i] if i < len(weather_codes) else 0),
+            'humidity': humidity,
+            'humidity_level': service._get_humidity_level(humidity),
+            'wind_speed': round(wind_speeds[i] if i < len(wind_speeds) else 5, 1),
+            'wind_description': service._get_wind_description(wind_speeds[i] if i < len(wind_speeds) else 5)
+        })
+    return forecast
+
+
+def legacy_recommendations(current, forecast):
+    """Previous travel recommendations, re-scanning lowercased descriptions"""
+    recommendations = {'clothing': [], 'activities': [], 'precautions': [], 'best_times': []}
+    temp = current['temperature']
+    description = current['description'].lower()
+    if temp < 5:
+        recommendations['clothing'].extend(['Heavy winter coat', 'Warm layers', 'Gloves and hat'])
+    elif temp < 15:
+        recommendations['clothing'].extend(['Light jacket', 'Long pants', 'Warm layers'])
+    elif temp < 25:
+        recommendations['clothing'].extend(['Light layers', 'Comfortable walking shoes'])
+    else:
+        recommendations['clothing'].extend(['Light clothing', 'Sun hat', 'Sunscreen'])
+    if 'rain' in description or 'drizzle' in description:
+        recommendations['clothing'].append('Waterproof jacket')
+        recommendations['precautions'].append('Carry umbrella')
+        recommendations['activities'].append('Indoor attractions')
+    if 'snow' in description:
+        recommendations['clothing'].extend(['Waterproof boots', 'Warm socks'])
+        recommendations['precautions'].append('Check road conditions')
+    if current['wind_speed'] > 10:
+        recommendations['precautions'].append('Strong winds expected')
+    clear_days = [day for day in forecast if 'clear' in day['description'].lower() or 'sun' in day['description'].lower()]
+    if clear_days:
+        recommendations['best_times'].append(f"Best outdoor activities on {clear_days[0]['date']}")
+    return recommendations
+
+
+def legacy_request(service, profile, data):
+    """Previous payload build plus the packing and fallback weather checks, over per-day dicts"""
+    current = legacy_current(service, data, 'Goa')
+    forecast = legacy_forecast(service, data)
+    report = {
+        'current': current,
+        'forecast': forecast,
+        'travel_recommendations': legacy_recommendations(current, forecast)
+    }
+    avg_temp = sum(day['temperature_min'] + day['temperature_max'] for day in forecast) / (2 * len(forecast))
+    any_rain = any('rain' in day['description'].lower() for day in forecast)
+    rainy_days = [
+        'rain' in forecast[min(day_num - 1, len(forecast) - 1)]['description'].lower()
+        for day_num in range(1, profile.days + 1)
+    ]
+    return report, avg_temp, any_rain, rainy_days
+
+
+def current_request(service, profile, data):
+    """Current payload build plus the same checks, using the code tables and category flags"""
+    report = service._build_weather(data, 'Goa')
+    forecast = report['forecast']
+    avg_temp = sum(day['temperature_min'] + day['temperature_max'] for day in forecast) / (2 * len(forecast))
+    flags = [description_flags(day['description']) for day in forecast]
+    any_rain = any(day_flags & RAIN for day_flags in flags)
+    rainy_days = [bool(flags[min(day_num - 1, len(flags) - 1)] & RAIN) for day_num in range(1, profile.days + 1)]
+    return report, avg_temp, any_rain, rainy_days
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    service = WeatherService()
+    profile = UserProfile(
+        name='Benchmark', travel_type='couple', companions=2, health_conditions=[],
+        destination='Goa', days=14, interests=['beaches', 'restaurants'], budget_range='medium'
+    )
+
+    print(f"⏱️  Weather rule microbenchmark ({iterations} requests x {RUNS} runs, {profile.days}-day trip)")
+    # Both sides must produce the same payload and rule results
+    assert legacy_request(service, profile, SAMPLE_RESPONSE) == current_request(service, profile, SAMPLE_RESPONSE)
+
+    # Interleave the sides so drift in machine load hits both alike
+    timings = {'legacy dict scans': [], 'code tables': []}
+    for _ in range(RUNS):
+        for label, func in (('legacy dict scans', legacy_request), ('code tables', current_request)):
+            seconds = timeit.timeit(lambda: func(service, profile, SAMPLE_RESPONSE), number=iterations)
+            timings[label].append(seconds / iterations * 1e6)
+
+    results = {label: statistics.median(runs) for label, runs in timings.items()}
+    for label, runs in timings.items():
+        print(f"  {label:<20} median {results[label]:8.2f} µs/request (min {min(runs):.2f}, max {max(runs):.2f})")
+    legacy, current = results['legacy dict scans'], results['code tables']
+    print(f"  saving               {legacy - current:8.2f} µs/request ({(1 - current / legacy) * 100:.0f}% of the median)")
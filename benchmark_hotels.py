@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark for hotel recommendation queries on large synthetic catalogs.
+
+Compares the previous linear scan over hotel dicts (substring match on every
+hotel, a second scan when the city has none, then a sort; kept inline below as
+the "legacy" path) with HotelIndex lookups on a compiled, memory-mapped
+catalog, at 1k, 100k and 1M hotels spread over 500 cities. Reports catalog
+compile time, open time and resident memory added by opening it, and
+per-query latency (including materializing the returned hotels) for a city
+with matches and for an unknown destination that falls back to every city.
+Nearest-hotel and radius queries around a city centre are compared with a
+haversine scan over every hotel. No network access is needed; the 1M dicts for the legacy scan take about
+1 GB of memory.
+
+Usage: python benchmark_hotels.py [size ...]
+"""
+import os
+import sys
+import time
+import math
+import random
+import tempfile
+
+from services.hotel_catalog import HotelCatalog, build_catalog
+from services.hotel_index import HotelIndex
+from services.hotel_service import BUDGET_RANGES
+
+CITIES = 500
+QUERIES = [('City42', 'medium', 2), ('Atlantis', 'low', 3)]
+# (label, k, radius_km, budget, companions) around City42's centre
+NEARBY_QUERIES = [('nearest 5', 5, None, None, 1), ('3 km, medium', None, 3.0, 'medium', 2)]
+
+
+def city_centre(index, seed=7):
+    """Centre of one synthetic city, spread over India"""
+    rng = random.Random(seed * 1000 + index)
+    return rng.uniform(8.0, 32.0), rng.uniform(70.0, 88.0)
+
+
+def synthetic_hotels(size, seed=7):
+    rng = random.Random(seed)
+    cities = [f"City{i}" for i in range(CITIES)]
+    centres = [city_centre(i) for i in range(CITIES)]
+    hotels = []
+    for i in range(size):
+        latitude, longitude = centres[i % CITIES]
+        hotels.append({
+            'id': i,
+            'name': f"Hotel {i}",
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'price_per_night': rng.randrange(1500, 20000, 100),
+            'location': 'City Center',
+            'city': cities[i % CITIES],
+            'max_occupancy': rng.randint(1, 6),
+            # Within about 15 km of the centre
+            'latitude': round(latitude + rng.gauss(0, 0.05), 5),
+            'longitude': round(longitude + rng.gauss(0, 0.05), 5)
+        })
+    return hotels
+
+
+def legacy_query(hotels, destination, budget, companions):
+    """Previous get_hotels: scan, rescan on a miss, copy, cap at 10, sort"""
+    min_price, max_price = BUDGET_RANGES.get(budget, (100, 200))
+    filtered = []
+    for hotel in hotels:
+        if destination.lower() in hotel['location'].lower() or hotel['city'].lower() in destination.lower():
+            if min_price <= hotel['price_per_night'] <= max_price:
+                if hotel['max_occupancy'] >= companions:
+                    filtered.append(hotel)
+    if not filtered:
+        for hotel in hotels:
+            if min_price <= hotel['price_per_night'] <= max_price:
+                if hotel['max_occupancy'] >= companions:
+                    adapted_hotel = hotel.copy()
+                    adapted_hotel['location'] = f"Near {destination}"
+                    adapted_hotel['city'] = destination
+                    filtered.append(adapted_hotel)
+    return sorted(filtered[:10], key=lambda x: (-x['rating'], x['price_per_night']))[:5]
+
+
+def index_query(index, destination, budget, companions):
+    min_price, max_price = BUDGET_RANGES.get(budget, (100, 200))
+    return index.query(index.resolve(destination), min_price, max_price, companions, 5)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+
+def scan_nearby(hotels, latitude, longitude, k, radius_km, budget, companions):
+    """Distance to every matching hotel, then a sort"""
+    min_price, max_price = BUDGET_RANGES.get(budget, (0, math.inf))
+    found = []
+    for hotel in hotels:
+        if min_price <= hotel['price_per_night'] <= max_price and hotel['max_occupancy'] >= companions:
+            distance = haversine_km(latitude, longitude, hotel['latitude'], hotel['longitude'])
+            if radius_km is None or distance <= radius_km:
+                found.append((distance, hotel['id']))
+    found.sort()
+    return found[:k] if k else found
+
+
+def index_nearby(index, latitude, longitude, k, radius_km, budget, companions):
+    min_price, max_price = BUDGET_RANGES.get(budget, (0, math.inf))
+    if k is None:
+        return index.within(latitude, longitude, radius_km, min_price, max_price, companions)
+    return index.nearest(latitude, longitude, k, min_price, max_price, companions, radius_km)
+
+
+def rss_mb():
+    """Resident set size from /proc, or None where it isn't available"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+
+def per_call_us(func, *args, budget_seconds=1.0):
+    """Best of three timed batches sized to take about ``budget_seconds`` in total"""
+    started = time.perf_counter()
+    func(*args)
+    single = max(time.perf_counter() - started, 1e-7)
+    number = max(1, int(budget_seconds / 3 / single))
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1e6
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    print(f"⏱️  Hotel query benchmark ({CITIES} cities, top 5 by rating then price)")
+    workdir = tempfile.TemporaryDirectory(prefix='hotel-catalog-')
+    for size in sizes:
+        hotels = synthetic_hotels(size)
+        path = os.path.join(workdir.name, f"hotels-{size}.cat")
+        started = time.perf_counter()
+        build_catalog(hotels, path)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        rss_before = rss_mb()
+        started = time.perf_counter()
+        index = HotelIndex(HotelCatalog(path))
+        open_ms = (time.perf_counter() - started) * 1000
+        rss_after = rss_mb()
+        rss = f", +{rss_after - rss_before:.1f} MB resident" if rss_before is not None else ''
+        print(f"\n  {size:,} hotels ({os.path.getsize(path) / 2 ** 20:.1f} MB catalog compiled in {compile_ms:,.0f} ms, "
+              f"opened in {open_ms:.2f} ms{rss})")
+        for destination, budget, companions in QUERIES:
+            legacy = per_call_us(legacy_query, hotels, destination, budget, companions)
+            indexed = per_call_us(index_query, index, destination, budget, companions)
+            print(f"    {destination:<10} {budget:<7} legacy {legacy:12,.1f} µs   index {indexed:10,.1f} µs   {legacy / indexed:8,.0f}x")
+        latitude, longitude = city_centre(42)
+        for label, k, radius_km, budget, companions in NEARBY_QUERIES:
+            args = (latitude, longitude, k, radius_km, budget, companions)
+            matches = len(index_nearby(index, *args))
+            scan = per_call_us(scan_nearby, hotels, *args)
+            indexed = per_call_us(index_nearby, index, *args)
+            print(f"    {label:<18} scan {scan:14,.1f} µs   k-d tree {indexed:7,.1f} µs   {scan / indexed:8,.0f}x"
+                  f"   ({matches} hotels)")
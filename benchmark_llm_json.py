@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark for parsing itinerary replies from the AI providers.
+
+Runs every reply in data/llm_responses.jsonl (plus, optionally, Gemini and
+Perplexity responses recorded as HTTP cassettes) through the previous
+brace-slicing parser (kept inline below as the "legacy" path) and the
+single-pass tolerant parser now used by AIService. Reports how many days
+each recovers and the time per reply. No network access is needed.
+
+Usage: python benchmark_llm_json.py [iterations] [cassette_dir]
+"""
+import os
+import io
+import sys
+import json
+import timeit
+import contextlib
+
+from services.ai_service import AIService
+from services.gazetteer import DATA_DIR
+
+CORPUS_PATH = os.path.join(DATA_DIR, 'llm_responses.jsonl')
+
+
+def legacy_parse(service, text):
+    """Previous implementation: slice first '{' to last '}', else scan lines"""
+    try:
+        start_idx = text.find('{')
+        end_idx = text.rfind('}') + 1
+        if start_idx != -1 and end_idx != -1:
+            return json.loads(text[start_idx:end_idx])
+        return service._parse_text_response(text)
+    except json.JSONDecodeError:
+        return service._parse_text_response(text)
+
+
+def tolerant_parse(service, text):
+    """Current implementation"""
+    return service._parse_ai_response(text)
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding='utf-8') as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+def load_cassettes(directory):
+    """Generated text of recorded Gemini and Perplexity responses"""
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as cassette:
+            record = json.load(cassette)
+        body = record['response']['body']
+        events = [line[5:].strip() for line in body.splitlines() if line.startswith('data:')]
+        try:
+            payloads = [json.loads(event) for event in events if event != '[DONE]'] if events else [json.loads(body)]
+        except ValueError:
+            continue
+        text = ''
+        for payload in payloads:
+            for candidate in (payload.get('candidates') or [])[:1]:
+                text += ''.join(part.get('text', '') for part in candidate.get('content', {}).get('parts', []))
+            for choice in (payload.get('choices') or [])[:1]:
+                text += (choice.get('message') or choice.get('delta') or {}).get('content') or ''
+        if text:
+            samples.append({'id': name[:24], 'provider': 'recorded', 'expected_days': None, 'text': text})
+    return samples
+
+
+def quietly(parse, service, texts):
+    """Parse replies with AIService's cut-off warnings kept off the report"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [parse(service, text) for text in texts]
+
+
+def day_count(service, parse, text):
+    try:
+        [itinerary] = quietly(parse, service, [text])
+    except Exception:
+        return 0
+    return len([day for day in (itinerary.get('days') or []) if isinstance(day, dict) and day.get('activities')])
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    samples = load_corpus()
+    if len(sys.argv) > 2:
+        samples += load_cassettes(sys.argv[2])
+    service = AIService()
+
+    print(f"⏱️  LLM reply parsing benchmark ({len(samples)} replies, {iterations} iterations)")
+    print(f"  {'reply':<24} {'expected':>8} {'legacy':>8} {'tolerant':>8}")
+    recovered = {'legacy': 0, 'tolerant': 0}
+    for sample in samples:
+        counts = [day_count(service, parse, sample['text']) for parse in (legacy_parse, tolerant_parse)]
+        recovered['legacy'] += counts[0]
+        recovered['tolerant'] += counts[1]
+        expected = '-' if sample['expected_days'] is None else sample['expected_days']
+        print(f"  {sample['id']:<24} {expected:>8} {counts[0]:>8} {counts[1]:>8}")
+    print(f"  {'days recovered':<24} {'':>8} {recovered['legacy']:>8} {recovered['tolerant']:>8}")
+
+    # Time well-formed and malformed JSON replies separately: on the latter
+    # the legacy parser spends its time failing over to the line scan
+    def well_formed(text):
+        try:
+            json.loads(text[text.find('{'):text.rfind('}') + 1])
+            return True
+        except ValueError:
+            return False
+
+    groups = {
+        'well-formed': [sample['text'] for sample in samples if '{' in sample['text'] and well_formed(sample['text'])],
+        'malformed': [sample['text'] for sample in samples if '{' in sample['text'] and not well_formed(sample['text'])]
+    }
+    for group, texts in groups.items():
+        if not texts:
+            continue
+        for label, parse in (('legacy', legacy_parse), ('tolerant', tolerant_parse)):
+            seconds = min(timeit.repeat(
+                lambda: quietly(parse, service, texts), number=iterations, repeat=3
+            ))
+            print(f"  {group + ' ' + label:<24} {seconds / iterations / len(texts) * 1e6:8.1f} µs/reply ({len(texts)} replies)")
@@ -0,0 +1,71 @@
+import math
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+MISSING = -1
+
+
+class HourlyForecast:
+    """
+    Compact hourly forecast backed by typed arrays.
+
+    Open-Meteo returns one timestamp per hour, so only the first timestamp is
+    kept and the rest are implied by position. Each variable is stored as a
+    typed array column rather than a list of per-hour dicts.
+    """
+
+    __slots__ = ('start', 'timezone', 'temperature', 'humidity', 'wind_speed', 'weather_code')
+
+    def __init__(self, start: datetime, timezone: str, temperature: array,
+                 humidity: array, wind_speed: array, weather_code: array):
+        self.start = start
+        self.timezone = timezone
+        self.temperature = temperature
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.weather_code = weather_code
+
+    @classmethod
+    def from_open_meteo(cls, data: Dict) -> 'HourlyForecast':
+        """Build the columns from an Open-Meteo ``hourly`` response block"""
+        hourly = data.get('hourly', {})
+        times = hourly.get('time', [])
+        start = datetime.fromisoformat(times[0]) if times else datetime.now().replace(minute=0, second=0, microsecond=0)
+        return cls(
+            start=start,
+            timezone=data.get('timezone', 'UTC'),
+            temperature=array('f', (math.nan if v is None else v for v in hourly.get('temperature_2m', []))),
+            humidity=array('b', (MISSING if v is None else int(v) for v in hourly.get('relative_humidity_2m', []))),
+            wind_speed=array('f', (math.nan if v is None else v for v in hourly.get('wind_speed_10m', []))),
+            weather_code=array('b', (MISSING if v is None else int(v) for v in hourly.get('weather_code', [])))
+        )
+
+    @property
+    def hours(self) -> int:
+        return min(len(self.temperature), len(self.humidity), len(self.wind_speed), len(self.weather_code))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the array columns"""
+        return sum(column.itemsize * len(column) for column in
+                   (self.temperature, self.humidity, self.wind_speed, self.weather_code))
+
+    def window(self, day: Optional[date] = None, start_hour: int = 0, end_hour: int = 23) -> List[Dict[str, Any]]:
+        """Return the hours between ``start_hour`` and ``end_hour`` (inclusive) of a day"""
+        day = day or self.start.date()
+        first = datetime.combine(day, datetime.min.time()) + timedelta(hours=start_hour)
+        offset = int((first - self.start).total_seconds() // 3600)
+        begin = max(offset, 0)
+        end = min(offset + (end_hour - start_hour) + 1, self.hours)
+
+        rows = []
+        for i in range(begin, end):
+            rows.append({
+                'time': (self.start + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M'),
+                'temperature': None if math.isnan(self.temperature[i]) else round(self.temperature[i], 1),
+                'humidity': None if self.humidity[i] == MISSING else self.humidity[i],
+                'wind_speed': None if math.isnan(self.wind_speed[i]) else round(self.wind_speed[i], 1),
+                'weather_code': None if self.weather_code[i] == MISSING else self.weather_code[i]
+            })
+        return rows
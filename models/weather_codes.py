@@ -0,0 +1,78 @@
+# Open-Meteo weather codes, built once at import rather than on every lookup
+WEATHER_DESCRIPTIONS = {
+    0: "Clear sky",
+    1: "Mainly clear",
+    2: "Partly cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Depositing rime fog",
+    51: "Light drizzle",
+    53: "Moderate drizzle",
+    55: "Dense drizzle",
+    56: "Light freezing drizzle",
+    57: "Dense freezing drizzle",
+    61: "Slight rain",
+    63: "Moderate rain",
+    65: "Heavy rain",
+    66: "Light freezing rain",
+    67: "Heavy freezing rain",
+    71: "Slight snow fall",
+    73: "Moderate snow fall",
+    75: "Heavy snow fall",
+    77: "Snow grains",
+    80: "Slight rain showers",
+    81: "Moderate rain showers",
+    82: "Violent rain showers",
+    85: "Slight snow showers",
+    86: "Heavy snow showers",
+    95: "Thunderstorm",
+    96: "Thunderstorm with slight hail",
+    99: "Thunderstorm with heavy hail"
+}
+
+WEATHER_ICONS = {
+    0: "01d",                                               # Clear sky
+    **dict.fromkeys([1, 2], "02d"),                         # Partly cloudy
+    3: "03d",                                               # Overcast
+    **dict.fromkeys([45, 48], "50d"),                       # Fog
+    **dict.fromkeys([51, 53, 55, 56, 57], "09d"),           # Drizzle
+    **dict.fromkeys([61, 63, 65, 66, 67, 80, 81, 82], "10d"),  # Rain
+    **dict.fromkeys([71, 73, 75, 77, 85, 86], "13d"),       # Snow
+    **dict.fromkeys([95, 96, 99], "11d")                    # Thunderstorm
+}
+
+# Category flags, one bit each
+RAIN = 1
+DRIZZLE = 2
+SNOW = 4
+CLEAR = 8
+STORM = 16
+
+MISSING_CODE = -1
+
+
+def flags_for_description(description: str) -> int:
+    """Derive category flags from a weather description"""
+    text = description.lower()
+    flags = 0
+    if 'rain' in text:
+        flags |= RAIN
+    if 'drizzle' in text:
+        flags |= DRIZZLE
+    if 'snow' in text:
+        flags |= SNOW
+    if 'clear' in text or 'sun' in text:
+        flags |= CLEAR
+    if 'thunder' in text:
+        flags |= STORM
+    return flags
+
+
+FLAGS_BY_CODE = {code: flags_for_description(text) for code, text in WEATHER_DESCRIPTIONS.items()}
+FLAGS_BY_DESCRIPTION = {text: FLAGS_BY_CODE[code] for code, text in WEATHER_DESCRIPTIONS.items()}
+
+
+def description_flags(description: str) -> int:
+    """Category flags for a description, using the precomputed table for known ones"""
+    flags = FLAGS_BY_DESCRIPTION.get(description)
+    return flags if flags is not None else flags_for_description(description)
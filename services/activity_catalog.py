@@ -0,0 +1,124 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from models.user_profile import UserProfile
+
+# Tag bits; an activity carries every tag that applies to it
+INDOOR = 1
+GENTLE = 2      # low or moderate intensity
+ACCESSIBLE = 4  # step-free, wheelchair friendly
+
+ALL_TAGS = INDOOR | GENTLE | ACCESSIBLE
+
+# Suggested when none of a traveler's interests have a matching activity
+GENERAL = 'general'
+
+# Accessibility needs (see UserProfile.get_accessibility_needs) that narrow the catalog
+TAGS_BY_NEED = {
+    'wheelchair_accessible': ACCESSIBLE,
+    'low_intensity_activities': GENTLE
+}
+
+
+class Activity(NamedTuple):
+    """One rule-based activity suggestion"""
+    name: str
+    interest: str
+    indoor: bool
+    intensity: str  # 'low', 'moderate', 'high'
+    accessible: bool
+
+    @property
+    def tags(self) -> int:
+        tags = 0
+        if self.indoor:
+            tags |= INDOOR
+        if self.intensity != 'high':
+            tags |= GENTLE
+        if self.accessible:
+            tags |= ACCESSIBLE
+        return tags
+
+
+# Listed per interest in the order the fallback generator suggests them
+ACTIVITIES = (
+    Activity('Visit local museums', 'museums', True, 'low', True),
+    Activity('Art galleries tour', 'museums', True, 'low', True),
+    Activity('Historical sites', 'museums', False, 'moderate', False),
+    Activity('City parks walk', 'parks', False, 'low', True),
+    Activity('Botanical gardens', 'parks', False, 'low', True),
+    Activity('Nature trails', 'parks', False, 'high', False),
+    Activity('Local cuisine tour', 'restaurants', False, 'moderate', False),
+    Activity('Food market visit', 'restaurants', True, 'low', True),
+    Activity('Fine dining experience', 'restaurants', True, 'low', True),
+    Activity('Shopping district tour', 'shopping', True, 'moderate', True),
+    Activity('Local markets', 'shopping', True, 'low', False),
+    Activity('Souvenir shopping', 'shopping', True, 'low', True),
+    Activity('Evening entertainment', 'nightlife', True, 'low', True),
+    Activity('Local bars/clubs', 'nightlife', True, 'moderate', False),
+    Activity('Night tours', 'nightlife', False, 'moderate', False),
+    Activity('Beach relaxation', 'beaches', False, 'low', False),
+    Activity('Water activities', 'beaches', False, 'high', False),
+    Activity('Seaside walks', 'beaches', False, 'low', True),
+    Activity('Adventure sports', 'adventure', False, 'high', False),
+    Activity('Hiking trails', 'adventure', False, 'high', False),
+    Activity('Outdoor activities', 'adventure', False, 'moderate', False),
+    Activity('Cultural sites', 'culture', False, 'moderate', False),
+    Activity('Traditional performances', 'culture', True, 'low', True),
+    Activity('Local festivals', 'culture', False, 'moderate', False),
+    Activity('City center exploration', GENERAL, False, 'moderate', True),
+    Activity('Local landmark visits', GENERAL, False, 'moderate', False),
+    Activity('Walking tours', GENERAL, False, 'moderate', False),
+    Activity('Local restaurant visits', GENERAL, True, 'low', True),
+    Activity('Market exploration', GENERAL, True, 'low', False)
+)
+
+
+def required_tags(profile: UserProfile) -> int:
+    """Tags every activity suggested to this traveler must carry"""
+    tags = 0
+    for need in profile.get_accessibility_needs():
+        tags |= TAGS_BY_NEED.get(need, 0)
+    return tags
+
+
+class ActivityCatalog:
+    """
+    Activities indexed by interest and tag combination.
+
+    Every ``(interest, tags)`` pair is resolved once when the catalog is
+    built, so a lookup is a dict access regardless of catalog size; the
+    merged list for a set of interests is memoized as well.
+    """
+
+    def __init__(self, activities: Iterable[Activity] = ACTIVITIES):
+        by_interest: Dict[str, List[Activity]] = {}
+        for activity in activities:
+            by_interest.setdefault(activity.interest, []).append(activity)
+
+        self._index: Dict[Tuple[str, int], Tuple[str, ...]] = {}
+        for interest, members in by_interest.items():
+            for tags in range(ALL_TAGS + 1):
+                self._index[interest, tags] = tuple(
+                    activity.name for activity in members if activity.tags & tags == tags
+                )
+        self.interests = frozenset(by_interest) - {GENERAL}
+        self.select = lru_cache(maxsize=1024)(self._select)
+
+    def lookup(self, interest: str, tags: int = 0) -> Tuple[str, ...]:
+        """Activities for one interest carrying all of ``tags``"""
+        return self._index.get((interest, tags), ())
+
+    def for_profile(self, profile: UserProfile, tags: int = 0) -> Tuple[str, ...]:
+        """Activities matching a traveler's interests, accessibility needs and ``tags``"""
+        interests = tuple(interest.lower() for interest in profile.interests)
+        return self.select(interests, tags | required_tags(profile))
+
+    def _select(self, interests: Tuple[str, ...], tags: int) -> Tuple[str, ...]:
+        """Activities for the interests in order, or general ones when none match"""
+        known = dict.fromkeys(interest for interest in interests if interest in self.interests)
+        selected = tuple(name for interest in known for name in self.lookup(interest, tags))
+        return selected or self.lookup(GENERAL, tags)
+
+
+ACTIVITY_CATALOG = ActivityCatalog()
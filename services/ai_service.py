@@ -1,8 +1,38 @@
 import os
+import re
 import json
-import requests
-from typing import Dict, List, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator, Tuple, Callable
 from models.user_profile import UserProfile
+from models.weather_codes import RAIN, description_flags
+from services.http_client import get_http_client
+from services.itinerary_cache import ItineraryCache
+from services.similar_itineraries import SimilarItineraryIndex, SimilarMatch
+from services.day_stream import DayStreamParser
+from services.hedging import Hedger
+from services.prompt_builder import Prompt, PromptBuilder
+from services.llm_json import ParsedJSON, ParseStats, TolerantJSONParser, parse_llm_json
+from services.activity_catalog import ACTIVITY_CATALOG, INDOOR
+from services.deadline import Deadline, DeadlineExceeded
+from services.llm_limiter import INTERACTIVE, get_llm_limiter
+
+GEMINI_MODEL = 'gemini-1.5-pro'
+
+# Reply length limits, also charged against the providers' tokens-per-minute budgets
+GEMINI_MAX_OUTPUT_TOKENS = 2048
+PERPLEXITY_MAX_TOKENS = 2000
+
+# Line classifiers for replies that contain no JSON at all
+_ACTIVITY_LINE = re.compile(r'morning|afternoon|evening|9:00|1[0-8]:00')
+_MEAL_LINE = re.compile(r'breakfast|lunch|dinner|meal|restaurant')
+
+# Day ranges of long trips are generated concurrently on their own pool so a
+# pipeline stage waiting on them never competes with them for a worker
+_chunk_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('AI_CHUNK_WORKERS', 4)),
+    thread_name_prefix='itinerary-chunk'
+)
 
 class AIService:
     """Service for AI-powered itinerary generation"""
@@ -10,185 +40,635 @@ class AIService:
     def __init__(self):
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         self.perplexity_api_key = os.getenv('PERPLEXITY_API_KEY')
+        self.http = get_http_client()
+        self.itinerary_cache = ItineraryCache.from_env()
+        # Optional: adapt a close-enough earlier itinerary instead of calling the LLM (ITINERARY_SIMILARITY=1)
+        self.similar = SimilarItineraryIndex.from_env()
+        # Optional: race Perplexity against a slow Gemini (AI_HEDGING=1)
+        self.hedger = Hedger.from_env(validate=self._is_valid_itinerary)
+        # Trips longer than this are generated as concurrent day ranges
+        self.chunk_days = max(1, int(os.getenv('AI_CHUNK_DAYS', 5)))
+        self.prompts = PromptBuilder.from_env()
+        self.parse_stats = ParseStats()
+        # With less than this many seconds of the request deadline left, skip the LLM
+        self.min_llm_budget = float(os.getenv('AI_MIN_LLM_BUDGET', 5))
+        # Process-wide requests/tokens per minute per provider, shared by all requests
+        self.limiter = get_llm_limiter()
+        self._deadline_lock = threading.Lock()
+        self._deadline_fallbacks = 0
         
-    def generate_itinerary(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict]) -> Dict[str, Any]:
+    def generate_itinerary(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                           deadline: Optional[Deadline] = None, priority: int = INTERACTIVE) -> Dict[str, Any]:
         """
         Generate a personalized itinerary using AI
+        
+        Provider calls only get what is left of ``deadline``; when that is too
+        little for an LLM call, including the estimated wait for the provider
+        rate limits, the rule-based itinerary is returned straight away.
+        ``priority`` orders the call among others waiting for those limits.
         """
         try:
-            # Prepare context for AI
-            context = self._prepare_context(profile, weather_data, hotels)
+            # Equivalent profiles with similar weather reuse an earlier LLM result
+            cached = self.itinerary_cache.get(profile, weather_data)
+            if cached is not None:
+                print(f"⚡ Itinerary cache hit for {profile.destination}")
+                return cached
+            
+            reused = self._find_similar(profile, weather_data, hotels)
+            if reused is not None:
+                return reused
             
             # Check which AI service to use
-            print(f"🤖 AI Service - Gemini API Key: {'✅ Available' if self.gemini_api_key and self.gemini_api_key != 'your_gemini_api_key_here_optional' else '❌ Not configured'}")
-            print(f"🤖 AI Service - Perplexity API Key: {'✅ Available' if self.perplexity_api_key and self.perplexity_api_key != 'your_perplexity_api_key_here_optional' else '❌ Not configured'}")
+            print(f"🤖 AI Service - Gemini API Key: {'✅ Available' if self._gemini_configured() else '❌ Not configured'}")
+            print(f"🤖 AI Service - Perplexity API Key: {'✅ Available' if self._perplexity_configured() else '❌ Not configured'}")
             
-            # Try Gemini first, fallback to Perplexity
-            if self.gemini_api_key and self.gemini_api_key != 'your_gemini_api_key_here_optional':
-                print("🚀 Using Gemini AI for itinerary generation...")
-                itinerary = self._generate_with_gemini(context)
-                itinerary['generated_by'] = 'Gemini AI'
-                return itinerary
-            elif self.perplexity_api_key and self.perplexity_api_key != 'your_perplexity_api_key_here_optional':
-                print("🚀 Using Perplexity AI for itinerary generation...")
-                itinerary = self._generate_with_perplexity(context)
-                itinerary['generated_by'] = 'Perplexity AI'
-                return itinerary
-            else:
+            if not (self._gemini_configured() or self._perplexity_configured()):
                 print("⚠️ No AI service configured, using fallback generation...")
                 # Fallback to rule-based generation
                 itinerary = self._generate_fallback_itinerary(profile, weather_data, hotels)
                 return itinerary
             
+            if not self._llm_fits(deadline, priority):
+                return self._generate_fallback_itinerary(profile, weather_data, hotels)
+            
+            if profile.days > self.chunk_days:
+                itinerary = self._generate_chunked(profile, weather_data, hotels, deadline, priority)
+            else:
+                # Prepare context for AI
+                prompt = self._prepare_context(profile, weather_data, hotels)
+                provider, itinerary = self._call_provider(prompt, deadline, priority)
+                itinerary['generated_by'] = provider
+            self._remember(profile, weather_data, itinerary)
+            return itinerary
+            
         except Exception as e:
             print(f"❌ AI generation failed: {str(e)}")
             print("🔄 Falling back to rule-based generation...")
             # Always provide fallback itinerary
             return self._generate_fallback_itinerary(profile, weather_data, hotels)
     
-    def _prepare_context(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict]) -> str:
-        """Prepare context for AI generation"""
-        context = f"""
-You are a professional travel planner. Create a detailed {profile.days}-day itinerary for {profile.name} traveling to {profile.destination}.
-
-TRAVELER PROFILE:
-- Name: {profile.name}
-- Travel Type: {profile.travel_type} ({profile.companions} people total)
-- Interests: {', '.join(profile.interests)}
-- Budget Range: {profile.budget_range}
-- Health Considerations: {', '.join(profile.health_conditions) if profile.health_conditions else 'None'}
-- Accessibility Needs: {', '.join(profile.get_accessibility_needs()) if profile.get_accessibility_needs() else 'None'}
-
-WEATHER INFORMATION:
-Current: {weather_data['current']['temperature']}°C, {weather_data['current']['description']}
-7-Day Forecast Available: Plan activities based on weather conditions
-
-AVAILABLE HOTELS ({len(hotels)} options):
-{self._format_hotels_for_context(hotels[:3])}
-
-REQUIREMENTS:
-1. Create a day-by-day itinerary that considers weather conditions
-2. Match activities to traveler's interests and budget range
-3. Account for health conditions and accessibility needs
-4. Include specific time slots for activities
-5. Recommend meals and dining options
-6. Provide practical tips and travel advice
-7. Include estimated costs in Indian Rupees (INR)
+    def regenerate_day(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                       days: List[Dict], number: int, feedback: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate a replacement for one day of an existing itinerary.
 
-RESPONSE FORMAT:
-Please respond with a detailed itinerary that includes:
-- Day-by-day activities with specific times
-- Weather-appropriate suggestions
-- Meal recommendations
-- Practical tips
-- Budget estimates in INR
+        Only that day is requested from the provider, with its neighbours as
+        context. Returns ``(generated_by, day)``; without a provider, or when
+        the call fails, the rule-based plan for that day is used.
+        """
+        if not (self._gemini_configured() or self._perplexity_configured()):
+            print("⚠️ No AI service configured, using fallback generation...")
+            return self._fallback_day(profile, weather_data, hotels, number)
+        if not self._llm_fits(deadline):
+            return self._fallback_day(profile, weather_data, hotels, number)
+        
+        try:
+            prompt = self.prompts.build_day(profile, weather_data, days, number, feedback)
+            provider, result = self._call_provider(prompt, deadline)
+            candidates = [day for day in (result.get('days') or []) if isinstance(day, dict)]
+            if not candidates:
+                raise Exception("No day in the regenerated reply")
+            # Prefer the day numbered as asked; a lone day is accepted whatever its number
+            day = next((day for day in candidates if day.get('day') == number), candidates[0])
+            day['day'] = number
+            return provider, day
+        except Exception as e:
+            print(f"❌ Day {number} regeneration failed: {str(e)}")
+            print("🔄 Falling back to rule-based generation...")
+            return self._fallback_day(profile, weather_data, hotels, number)
+    
+    def _fallback_day(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict], number: int) -> Tuple[str, Dict[str, Any]]:
+        """The rule-based plan for one day, as ``(generated_by, day)``"""
+        itinerary = self._generate_fallback_itinerary(profile, weather_data, hotels)
+        day = itinerary['days'][min(number, len(itinerary['days'])) - 1]
+        day['day'] = number
+        return itinerary['generated_by'], day
+    
+    def _remember(self, profile: UserProfile, weather_data: Dict, itinerary: Dict[str, Any]) -> None:
+        """
+        Keep a complete LLM itinerary for exact and similar later requests.
 
-Make it personalized, engaging, and practical for the traveler.
+        A reply cut off mid-way, or a chunked itinerary with rule-based days
+        filled in for failed chunks, is served once but isn't worth reusing.
         """
+        if len(itinerary.get('days') or []) < profile.days or itinerary.get('fallback_days'):
+            return
+        self.itinerary_cache.put(profile, weather_data, itinerary)
+        if self.similar:
+            self.similar.add(profile, weather_data, itinerary)
+    
+    def _find_similar(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict]) -> Optional[Dict[str, Any]]:
+        """An earlier itinerary for a similar profile, adapted to this trip's length, or None"""
+        if not self.similar:
+            return None
+        match = self.similar.find(profile, weather_data)
+        if match is None:
+            return None
+        print(f"♻️ Reusing a similar itinerary for {profile.destination} (similarity {match.similarity})")
+        return self._adapt_similar(match, profile, weather_data, hotels)
+    
+    def _adapt_similar(self, match: SimilarMatch, profile: UserProfile, weather_data: Dict,
+                       hotels: List[Dict]) -> Dict[str, Any]:
+        """Trim a reused itinerary to the trip, or extend it with rule-based days"""
+        itinerary = match.itinerary
+        days = [day for day in itinerary.get('days') or [] if isinstance(day, dict)][:profile.days]
+        if len(days) < profile.days:
+            fallback_days = self._generate_fallback_itinerary(profile, weather_data, hotels)['days']
+            days.extend(fallback_days[len(days):])
+        for number, day in enumerate(days, start=1):
+            day['day'] = number
         
-        return context
+        itinerary['days'] = days
+        itinerary['total_days'] = len(days)
+        itinerary['generated_by'] = f"{itinerary.get('generated_by', 'AI')} (adapted)"
+        itinerary['reused'] = {'similarity': match.similarity, 'source_days': match.source_days}
+        return itinerary
     
-    def _format_hotels_for_context(self, hotels: List[Dict]) -> str:
-        """Format hotel information for AI context"""
-        hotel_info = []
-        for hotel in hotels:
-            info = f"- {hotel['name']}: ${hotel['price_per_night']}/night, Rating: {hotel['rating']}, {hotel['location']}"
-            hotel_info.append(info)
-        return '\n'.join(hotel_info)
+    def _llm_fits(self, deadline: Optional[Deadline], priority: int = INTERACTIVE) -> bool:
+        """Whether enough of the request deadline is left to queue for and wait on an LLM"""
+        if deadline is None:
+            return True
+        queue_wait = self.estimated_llm_wait(priority)
+        if deadline.allows(self.min_llm_budget + queue_wait):
+            return True
+        queued = f" with an estimated {queue_wait:.1f}s wait for the LLM rate limit" if queue_wait else ""
+        print(f"⏱️ Only {deadline.remaining():.1f}s of the request deadline left{queued}, using fallback generation...")
+        with self._deadline_lock:
+            self._deadline_fallbacks += 1
+        return False
     
-    def _generate_with_gemini(self, context: str) -> Dict[str, Any]:
-        """Generate itinerary using Gemini AI via REST API"""
+    def estimated_llm_wait(self, priority: int = INTERACTIVE) -> float:
+        """Seconds a new provider call would currently wait for the rate limits"""
+        providers = self._limited_providers()
+        if not providers:
+            return 0.0
+        # A hedged call is served by whichever provider has room first
+        return min(self.limiter.estimate_wait(provider, priority=priority) for provider in providers)
+    
+    def _limited_providers(self) -> List[str]:
+        """Limiter names of the providers ``_call_provider`` would use"""
+        if self.hedger and self._gemini_configured() and self._perplexity_configured():
+            return ['gemini', 'perplexity']
+        if self._gemini_configured():
+            return ['gemini']
+        return ['perplexity'] if self._perplexity_configured() else []
+    
+    def _admit(self, provider: str, prompt: Prompt, output_tokens: int,
+               deadline: Optional[Deadline] = None, priority: int = INTERACTIVE) -> None:
+        """Wait for room in a provider's rate limits; raises ``RateLimited`` if the wait would outlast the deadline"""
+        max_wait = deadline.remaining() - self.min_llm_budget if deadline else None
+        waited = self.limiter.acquire(provider, prompt.estimated_tokens + output_tokens, priority, max_wait)
+        if waited >= 0.5:
+            print(f"🚦 Waited {waited:.1f}s for the {provider} rate limit")
+    
+    def _call_provider(self, prompt: Prompt, deadline: Optional[Deadline] = None,
+                       priority: int = INTERACTIVE) -> Tuple[str, Dict[str, Any]]:
+        """Run one prompt through the configured provider(s), returning ``(provider, itinerary)``"""
+        # Try Gemini first, fallback to Perplexity
+        if self.hedger and self._gemini_configured() and self._perplexity_configured():
+            print("🚀 Using Gemini AI with Perplexity AI as hedge...")
+            return self.hedger.run(
+                ('Gemini AI', lambda: self._generate_with_gemini(prompt, deadline, priority)),
+                ('Perplexity AI', lambda: self._generate_with_perplexity(prompt, deadline, priority))
+            )
+        elif self._gemini_configured():
+            print("🚀 Using Gemini AI for itinerary generation...")
+            return 'Gemini AI', self._generate_with_gemini(prompt, deadline, priority)
+        elif self._perplexity_configured():
+            print("🚀 Using Perplexity AI for itinerary generation...")
+            return 'Perplexity AI', self._generate_with_perplexity(prompt, deadline, priority)
+        raise Exception("No AI service configured")
+    
+    def _generate_chunked(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                          deadline: Optional[Deadline] = None, priority: int = INTERACTIVE) -> Dict[str, Any]:
+        """Generate a long trip as concurrent day ranges merged into one itinerary"""
+        return self._merge_chunks(list(self._iter_chunks(profile, weather_data, hotels, deadline, priority)))
+    
+    def _iter_chunks(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                     deadline: Optional[Deadline] = None, priority: int = INTERACTIVE) -> Iterator[Dict[str, Any]]:
+        """Submit every day range at once, yielding checked chunks in trip order"""
+        ranges = self._day_ranges(profile.days)
+        print(f"🧩 Generating {profile.days} days as {len(ranges)} concurrent chunks of up to {self.chunk_days}")
+        futures = [
+            _chunk_executor.submit(
+                self._call_provider, self._prepare_context(profile, weather_data, hotels, day_range), deadline, priority
+            )
+            for day_range in ranges
+        ]
+        fallback_days = []
+        for day_range, future in zip(ranges, futures):
+            try:
+                # A chunk still queued behind others when time runs out is given up on
+                provider, result = future.result(deadline.remaining() if deadline else None)
+            except Exception as e:
+                print(f"❌ Chunk for days {day_range[0]}-{day_range[1]} failed: {str(e)}")
+                provider, result = None, {}
+            if not fallback_days and len(result.get('days') or []) < day_range[1] - day_range[0] + 1:
+                fallback_days = self._generate_fallback_itinerary(profile, weather_data, hotels)['days']
+            yield self._check_chunk(result, day_range, provider, fallback_days)
+    
+    def _day_ranges(self, days: int) -> List[Tuple[int, int]]:
+        """Split a trip into inclusive ``(first_day, last_day)`` ranges"""
+        return [(start, min(start + self.chunk_days - 1, days)) for start in range(1, days + 1, self.chunk_days)]
+    
+    def _check_chunk(self, result: Dict[str, Any], day_range: Tuple[int, int], provider: Optional[str],
+                     fallback_days: List[Dict]) -> Dict[str, Any]:
+        """Make a chunk cover exactly its day range, numbered in order"""
+        start, end = day_range
+        expected = end - start + 1
+        days = [day for day in (result.get('days') or []) if isinstance(day, dict)]
+        issues = []
+        filled = []
+        
+        if len(days) > expected:
+            issues.append(f"Days {start}-{end}: dropped {len(days) - expected} extra day(s)")
+            days = days[:expected]
+        for offset, day in enumerate(days):
+            if day.get('day') != start + offset:
+                issues.append(f"Day {start + offset}: renumbered from {day.get('day')}")
+                day['day'] = start + offset
+        if len(days) < expected:
+            missing = range(start + len(days), end + 1)
+            issues.append(f"Days {missing[0]}-{missing[-1]}: filled with rule-based plans")
+            days.extend(fallback_days[number - 1] for number in missing)
+            filled.extend(missing)
+        
+        return {
+            'days': days,
+            'recommendations': result.get('recommendations'),
+            'provider': provider,
+            'issues': issues,
+            'filled': filled
+        }
+    
+    def _merge_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Join checked chunks into one itinerary and flag plans repeated across chunks"""
+        days = [day for chunk in chunks for day in chunk['days']]
+        issues = [issue for chunk in chunks for issue in chunk['issues']]
+        
+        seen_titles = {}
+        for day in days:
+            title = str(day.get('title', '')).strip().lower()
+            if title and title in seen_titles:
+                issues.append(f"Day {day['day']}: repeats the plan of day {seen_titles[title]}")
+            seen_titles.setdefault(title, day['day'])
+        for issue in issues:
+            print(f"⚠️ Continuity: {issue}")
+        
+        providers = [chunk['provider'] for chunk in chunks if chunk['provider']]
+        if not providers:
+            raise Exception("All itinerary chunks failed")
+        recommendations = next((chunk['recommendations'] for chunk in chunks if chunk['recommendations']), None)
+        
+        itinerary = {
+            'days': days,
+            'total_days': len(days),
+            'generated_by': ' + '.join(sorted(set(providers))),
+            'continuity_issues': issues
+        }
+        filled = [number for chunk in chunks for number in chunk['filled']]
+        if filled:
+            itinerary['fallback_days'] = filled
+        if recommendations:
+            itinerary['recommendations'] = recommendations
+        return itinerary
+    
+    def stream_itinerary(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                         deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate an itinerary incrementally.
+
+        Yields ``('day', day)`` as soon as each day has been generated and a
+        final ``('complete', itinerary)`` with the full result. Days still
+        missing when ``deadline`` runs out are filled with rule-based plans.
+        """
+        cached = self.itinerary_cache.get(profile, weather_data)
+        if cached is not None:
+            print(f"⚡ Itinerary cache hit for {profile.destination}")
+            yield from self._emit_days(cached)
+            return
+        
+        reused = self._find_similar(profile, weather_data, hotels)
+        if reused is not None:
+            yield from self._emit_days(reused)
+            return
+        
+        streamed = []
         try:
-            # Use the correct model name for Gemini
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-pro:generateContent?key={self.gemini_api_key}"
+            if (self._gemini_configured() or self._perplexity_configured()) and not self._llm_fits(deadline):
+                yield from self._emit_days(self._generate_fallback_itinerary(profile, weather_data, hotels))
+                return
             
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": context
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 2048
-                }
-            }
+            if profile.days > self.chunk_days and (self._gemini_configured() or self._perplexity_configured()):
+                # Chunks run concurrently; each is sent as soon as it and
+                # every chunk before it are done
+                chunks = []
+                for chunk in self._iter_chunks(profile, weather_data, hotels, deadline):
+                    chunks.append(chunk)
+                    for day in chunk['days']:
+                        streamed.append(day)
+                        yield 'day', day
+                itinerary = self._merge_chunks(chunks)
+                self._remember(profile, weather_data, itinerary)
+                yield 'complete', itinerary
+                return
+            
+            prompt = self._prepare_context(profile, weather_data, hotels)
+            usage = {}
+            
+            if self._gemini_configured():
+                print("🚀 Streaming itinerary from Gemini AI...")
+                self._admit('gemini', prompt, GEMINI_MAX_OUTPUT_TOKENS, deadline)
+                url, payload, headers = self._gemini_request(prompt, stream=True)
+                chunks = self._stream_text(url, payload, headers, self._gemini_chunk_text, usage, deadline)
+                generated_by = 'Gemini AI'
+            elif self._perplexity_configured():
+                print("🚀 Streaming itinerary from Perplexity AI...")
+                self._admit('perplexity', prompt, PERPLEXITY_MAX_TOKENS, deadline)
+                url, payload, headers = self._perplexity_request(prompt, stream=True)
+                chunks = self._stream_text(url, payload, headers, self._perplexity_chunk_text, usage, deadline)
+                generated_by = 'Perplexity AI'
+            else:
+                print("⚠️ No AI service configured, using fallback generation...")
+                yield from self._emit_days(self._generate_fallback_itinerary(profile, weather_data, hotels))
+                return
             
-            headers = {
-                "Content-Type": "application/json"
+            parser = DayStreamParser()
+            reply = TolerantJSONParser()
+            for chunk in chunks:
+                reply.feed(chunk)
+                for day in parser.feed(chunk):
+                    streamed.append(day)
+                    yield 'day', day
+            
+            self._record_usage(prompt, generated_by, usage)
+            itinerary = self._itinerary_from(reply.close(), parser.text)
+            if len(itinerary.get('days') or []) < len(streamed):
+                itinerary['days'] = streamed
+            # Days the incremental parser could not isolate (e.g. a plain-text reply or
+            # a malformed day it skipped), matched by number since positions may differ
+            for day in self._unsent(itinerary['days'], streamed):
+                yield 'day', day
+            
+            itinerary['generated_by'] = generated_by
+            self._remember(profile, weather_data, itinerary)
+            yield 'complete', itinerary
+            
+        except Exception as e:
+            print(f"❌ Streaming generation failed: {str(e)}")
+            print("🔄 Falling back to rule-based generation...")
+            # Keep the days already shown and fill in the rest
+            itinerary = self._generate_fallback_itinerary(profile, weather_data, hotels)
+            missing = self._unsent(itinerary['days'], streamed)
+            for day in missing:
+                yield 'day', day
+            itinerary['days'] = streamed + missing
+            yield 'complete', itinerary
+    
+    @staticmethod
+    def _unsent(days: List[Dict[str, Any]], streamed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Days whose number hasn't been streamed yet, in order"""
+        sent = {day.get('day') for day in streamed}
+        unsent = []
+        for day in days:
+            if day.get('day') not in sent:
+                sent.add(day.get('day'))
+                unsent.append(day)
+        return unsent
+    
+    def _emit_days(self, itinerary: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream an already complete itinerary"""
+        for day in itinerary.get('days', []):
+            yield 'day', day
+        yield 'complete', itinerary
+    
+    def _stream_text(self, url: str, payload: Dict, headers: Dict, extract: Callable[[Dict], str],
+                     usage: Optional[Dict] = None, deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Yield generated text from a provider's server-sent-events stream, collecting usage metadata"""
+        response = self.http.post(url, json=payload, headers=headers, timeout=30, deadline=deadline, stream=True)
+        try:
+            response.raise_for_status()
+            # SSE is always UTF-8; requests would otherwise assume Latin-1 for text/*
+            response.encoding = 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                # The read timeout bounds each line, not the whole stream
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded("Request deadline reached while streaming")
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                chunk = json.loads(data)
+                if usage is not None:
+                    # Usage arrives with the last chunks; keep the provider's key
+                    for key in ('usageMetadata', 'usage'):
+                        if chunk.get(key):
+                            usage[key] = chunk[key]
+                text = extract(chunk)
+                if text:
+                    yield text
+        finally:
+            response.close()
+    
+    def get_hedging_stats(self) -> Dict[str, Any]:
+        """Return hedge rate and per-provider win counts"""
+        return self.hedger.stats() if self.hedger else {'enabled': False}
+    
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """Return prompt size, build time and provider-reported cached tokens"""
+        return self.prompts.stats()
+    
+    def get_parse_stats(self) -> Dict[str, Any]:
+        """Return how provider replies were parsed (clean, repaired, truncated)"""
+        return self.parse_stats.stats()
+    
+    def get_deadline_stats(self) -> Dict[str, Any]:
+        """Return how often a short request deadline sent generation to the fallback"""
+        with self._deadline_lock:
+            return {
+                'min_llm_budget_seconds': self.min_llm_budget,
+                'fallbacks': self._deadline_fallbacks
             }
+    
+    def get_limiter_stats(self) -> Dict[str, Any]:
+        """Return provider rate limits, queue lengths and estimated waits"""
+        return self.limiter.stats()
+    
+    def get_similarity_stats(self) -> Dict[str, Any]:
+        """Return similar-itinerary lookups, matches and reuse rate"""
+        return self.similar.stats() if self.similar else {'enabled': False}
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return itinerary cache statistics"""
+        return self.itinerary_cache.stats()
+    
+    def invalidate_cache(self, destination: Optional[str] = None) -> int:
+        """Drop cached itineraries for a destination, or all of them"""
+        if self.similar:
+            self.similar.invalidate(destination)
+        return self.itinerary_cache.invalidate(destination)
+    
+    def _is_valid_itinerary(self, itinerary: Any) -> bool:
+        """Whether a provider returned a usable itinerary"""
+        return isinstance(itinerary, dict) and bool(itinerary.get('days'))
+    
+    def _prepare_context(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                         day_range: Optional[Tuple[int, int]] = None) -> Prompt:
+        """Prepare context for AI generation, optionally for one day range of the trip"""
+        return self.prompts.build(profile, weather_data, hotels, day_range)
+    
+    def _record_usage(self, prompt: Prompt, provider: str, result: Dict) -> None:
+        """Record the input tokens a provider reports for one call"""
+        if 'usageMetadata' in result:
+            usage = result['usageMetadata']
+            self.prompts.record_usage(prompt, provider, usage.get('promptTokenCount'), usage.get('cachedContentTokenCount'))
+        else:
+            usage = result.get('usage') or {}
+            cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens')
+            self.prompts.record_usage(prompt, provider, usage.get('prompt_tokens'), cached)
+    
+    def _gemini_configured(self) -> bool:
+        """Whether a real Gemini API key is available"""
+        return bool(self.gemini_api_key) and self.gemini_api_key != 'your_gemini_api_key_here_optional'
+    
+    def _perplexity_configured(self) -> bool:
+        """Whether a real Perplexity API key is available"""
+        return bool(self.perplexity_api_key) and self.perplexity_api_key != 'your_perplexity_api_key_here_optional'
+    
+    def _generate_with_gemini(self, prompt: Prompt, deadline: Optional[Deadline] = None,
+                              priority: int = INTERACTIVE) -> Dict[str, Any]:
+        """Generate itinerary using Gemini AI via REST API"""
+        try:
+            self._admit('gemini', prompt, GEMINI_MAX_OUTPUT_TOKENS, deadline, priority)
+            url, payload, headers = self._gemini_request(prompt)
             
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self.http.post(url, json=payload, headers=headers, timeout=30, deadline=deadline)
             response.raise_for_status()
             
             result = response.json()
-            
-            if 'candidates' in result and len(result['candidates']) > 0:
-                ai_response = result['candidates'][0]['content']['parts'][0]['text']
-                print(f"✅ Gemini AI Response received: {ai_response[:100]}...")
-                return self._parse_ai_response(ai_response)
-            else:
-                raise Exception("No content generated by Gemini")
+            self._record_usage(prompt, 'Gemini AI', result)
+            ai_response = self._gemini_text(result)
+            print(f"✅ Gemini AI Response received: {ai_response[:100]}...")
+            return self._parse_ai_response(ai_response)
             
         except Exception as e:
             print(f"❌ Gemini AI generation failed: {str(e)}")
             raise Exception(f"Gemini AI generation failed: {str(e)}")
     
-    def _generate_with_perplexity(self, context: str) -> Dict[str, Any]:
+    def _gemini_request(self, prompt: Prompt, stream: bool = False) -> tuple:
+        """Build the Gemini ``generateContent`` (or streaming) URL, payload and headers"""
+        if stream:
+            url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={self.gemini_api_key}"
+        else:
+            url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={self.gemini_api_key}"
+        
+        payload = {
+            "contents": [{
+                "role": "user",
+                "parts": [{
+                    # Static prefix first, so Gemini's implicit caching can reuse it
+                    "text": prompt.text
+                }]
+            }],
+            "generationConfig": {
+                "temperature": 0.7,
+                "topK": 40,
+                "topP": 0.95,
+                "maxOutputTokens": GEMINI_MAX_OUTPUT_TOKENS
+            }
+        }
+        headers = {
+            "Content-Type": "application/json"
+        }
+        
+        return url, payload, headers
+    
+    def _gemini_text(self, result: Dict) -> str:
+        """Extract the generated text from a Gemini response"""
+        if 'candidates' in result and len(result['candidates']) > 0:
+            return result['candidates'][0]['content']['parts'][0]['text']
+        raise Exception("No content generated by Gemini")
+    
+    def _gemini_chunk_text(self, chunk: Dict) -> str:
+        """Extract the text delta from one streamed Gemini chunk"""
+        candidates = chunk.get('candidates') or [{}]
+        parts = candidates[0].get('content', {}).get('parts', [])
+        return ''.join(part.get('text', '') for part in parts)
+    
+    def _generate_with_perplexity(self, prompt: Prompt, deadline: Optional[Deadline] = None,
+                                  priority: int = INTERACTIVE) -> Dict[str, Any]:
         """Generate itinerary using Perplexity AI"""
         try:
-            url = "https://api.perplexity.ai/chat/completions"
-            
-            payload = {
-                "model": "llama-3.1-sonar-small-128k-online",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a professional travel planner. Create detailed, personalized itineraries in JSON format."
-                    },
-                    {
-                        "role": "user",
-                        "content": context
-                    }
-                ],
-                "max_tokens": 2000,
-                "temperature": 0.7
-            }
+            self._admit('perplexity', prompt, PERPLEXITY_MAX_TOKENS, deadline, priority)
+            url, payload, headers = self._perplexity_request(prompt)
             
-            headers = {
-                "Authorization": f"Bearer {self.perplexity_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(url, json=payload, headers=headers)
+            response = self.http.post(url, json=payload, headers=headers, timeout=30, deadline=deadline)
             response.raise_for_status()
             
             result = response.json()
-            ai_response = result['choices'][0]['message']['content']
+            self._record_usage(prompt, 'Perplexity AI', result)
+            ai_response = self._perplexity_text(result)
             
             return self._parse_ai_response(ai_response)
             
         except Exception as e:
             raise Exception(f"Perplexity AI generation failed: {str(e)}")
     
+    def _perplexity_request(self, prompt: Prompt, stream: bool = False) -> tuple:
+        """Build the Perplexity chat completion URL, payload and headers"""
+        url = "https://api.perplexity.ai/chat/completions"
+        
+        payload = {
+            "model": "llama-3.1-sonar-small-128k-online",
+            "messages": [
+                {
+                    # Identical across requests, so it forms a reusable prompt prefix
+                    "role": "system",
+                    "content": prompt.static
+                },
+                {
+                    "role": "user",
+                    "content": prompt.dynamic
+                }
+            ],
+            "max_tokens": PERPLEXITY_MAX_TOKENS,
+            "temperature": 0.7
+        }
+        if stream:
+            payload["stream"] = True
+        
+        headers = {
+            "Authorization": f"Bearer {self.perplexity_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        return url, payload, headers
+    
+    def _perplexity_text(self, result: Dict) -> str:
+        """Extract the generated text from a Perplexity response"""
+        return result['choices'][0]['message']['content']
+    
+    def _perplexity_chunk_text(self, chunk: Dict) -> str:
+        """Extract the text delta from one streamed Perplexity chunk"""
+        choices = chunk.get('choices') or [{}]
+        return choices[0].get('delta', {}).get('content') or ''
+    
     def _parse_ai_response(self, response_text: str) -> Dict[str, Any]:
         """Parse AI response and extract structured itinerary"""
-        try:
-            # Try to extract JSON from response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                json_str = response_text[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                # Fallback: parse text response
-                return self._parse_text_response(response_text)
-                
-        except json.JSONDecodeError:
-            return self._parse_text_response(response_text)
+        return self._itinerary_from(parse_llm_json(response_text), response_text)
+    
+    def _itinerary_from(self, parsed: ParsedJSON, response_text: str) -> Dict[str, Any]:
+        """Use the JSON found in a reply, or read the reply as plain text when there is none"""
+        itinerary = parsed.value
+        if isinstance(itinerary, dict) and (itinerary.get('days') or parsed.complete):
+            if parsed.truncated:
+                print(f"⚠️ AI response was cut off; kept {len(itinerary.get('days') or [])} complete day(s)")
+            self.parse_stats.record(parsed)
+            return itinerary
+        self.parse_stats.record(None)
+        return self._parse_text_response(response_text)
     
     def _parse_text_response(self, text: str) -> Dict[str, Any]:
         """Parse text response into structured format"""
@@ -209,9 +689,10 @@ Make it personalized, engaging, and practical for the traveler.
                     'notes': []
                 }
             elif current_day and line:
-                if any(time in line.lower() for time in ['morning', 'afternoon', 'evening', '9:00', '10:00', '11:00', '12:00', '13:00', '14:00', '15:00', '16:00', '17:00', '18:00']):
+                lowered = line.lower()
+                if _ACTIVITY_LINE.search(lowered):
                     current_day['activities'].append(line)
-                elif any(meal in line.lower() for meal in ['breakfast', 'lunch', 'dinner', 'meal', 'restaurant']):
+                elif _MEAL_LINE.search(lowered):
                     current_day['meals'].append(line)
                 else:
                     current_day['notes'].append(line)
@@ -233,42 +714,18 @@ Make it personalized, engaging, and practical for the traveler.
         """Generate a basic rule-based itinerary as fallback"""
         days = []
         
-        # Base activities by interest
-        activity_mapping = {
-            'museums': ['Visit local museums', 'Art galleries tour', 'Historical sites'],
-            'parks': ['City parks walk', 'Botanical gardens', 'Nature trails'],
-            'restaurants': ['Local cuisine tour', 'Food market visit', 'Fine dining experience'],
-            'shopping': ['Shopping district tour', 'Local markets', 'Souvenir shopping'],
-            'nightlife': ['Evening entertainment', 'Local bars/clubs', 'Night tours'],
-            'beaches': ['Beach relaxation', 'Water activities', 'Seaside walks'],
-            'adventure': ['Adventure sports', 'Hiking trails', 'Outdoor activities'],
-            'culture': ['Cultural sites', 'Traditional performances', 'Local festivals']
-        }
-        
-        available_activities = []
-        for interest in profile.interests:
-            if interest.lower() in activity_mapping:
-                available_activities.extend(activity_mapping[interest.lower()])
-        
-        # If no specific activities, add general ones
-        if not available_activities:
-            available_activities = [
-                'City center exploration',
-                'Local landmark visits',
-                'Walking tours',
-                'Local restaurant visits',
-                'Market exploration'
-            ]
+        # Both variants come from the precomputed catalog; rainy days only get indoor ones
+        dry_activities = ACTIVITY_CATALOG.for_profile(profile)
+        rainy_activities = ACTIVITY_CATALOG.for_profile(profile, INDOOR)
+        accessibility_needs = profile.get_accessibility_needs() if profile.has_health_conditions() else []
         
         # Generate days
         for day_num in range(1, profile.days + 1):
-            day_weather = weather_data['forecast'][min(day_num - 1, len(weather_data['forecast']) - 1)]
+            forecast_index = min(day_num - 1, len(weather_data['forecast']) - 1)
+            day_weather = weather_data['forecast'][forecast_index]
             
             # Choose activities based on weather
-            if 'rain' in day_weather['description'].lower():
-                day_activities = [act for act in available_activities if any(indoor in act.lower() for indoor in ['museum', 'gallery', 'market', 'restaurant', 'shopping'])]
-            else:
-                day_activities = available_activities
+            day_activities = rainy_activities if description_flags(day_weather['description']) & RAIN else dry_activities
             
             # Select 3-4 activities for the day
             selected_activities = day_activities[:4] if len(day_activities) >= 4 else day_activities
@@ -297,10 +754,8 @@ Make it personalized, engaging, and practical for the traveler.
             }
             
             # Add accessibility notes if needed
-            if profile.has_health_conditions():
-                accessibility_needs = profile.get_accessibility_needs()
-                if accessibility_needs:
-                    day['notes'].append(f"Accessibility: Look for {', '.join(accessibility_needs)}")
+            if accessibility_needs:
+                day['notes'].append(f"Accessibility: Look for {', '.join(accessibility_needs)}")
             
             days.append(day)
         
@@ -324,9 +779,15 @@ Make it personalized, engaging, and practical for the traveler.
         items = ['Comfortable walking shoes', 'Portable charger', 'Travel documents']
         
         # Weather-based items
-        avg_temp = sum(day['temperature_min'] + day['temperature_max'] for day in weather_data['forecast']) / (2 * len(weather_data['forecast']))
+        forecast = weather_data['forecast']
+        avg_temp = (
+            sum(day['temperature_min'] + day['temperature_max'] for day in forecast) / (2 * len(forecast))
+            if forecast else None
+        )
         
-        if avg_temp < 10:
+        if avg_temp is None:
+            items.extend(['Light layers', 'Light jacket'])
+        elif avg_temp < 10:
             items.extend(['Warm jacket', 'Gloves and hat', 'Thermal layers'])
         elif avg_temp < 20:
             items.extend(['Light jacket', 'Sweater', 'Long pants'])
@@ -334,7 +795,7 @@ Make it personalized, engaging, and practical for the traveler.
             items.extend(['Light clothing', 'Sunscreen', 'Hat'])
         
         # Rain check
-        if any('rain' in day['description'].lower() for day in weather_data['forecast']):
+        if any(description_flags(day['description']) & RAIN for day in forecast):
             items.extend(['Umbrella', 'Waterproof jacket'])
         
         # Health-based items
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
+from models.user_profile import UserProfile
+from services.ai_service import AIService, GEMINI_MAX_OUTPUT_TOKENS, PERPLEXITY_MAX_TOKENS
+from services.prompt_builder import Prompt
+from services.async_http_client import get_async_http_client
+from services.deadline import Deadline
+
+class AsyncAIService:
+    """Non-blocking counterpart of AIService for async route handlers"""
+    
+    def __init__(self, ai_service: AIService = None):
+        # Prompt building, response parsing and the rule-based fallback are
+        # shared with the sync service; only the provider calls are awaited
+        self.sync = ai_service or AIService()
+        self.http = get_async_http_client()
+    
+    async def generate_itinerary(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                                 deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Generate a personalized itinerary using AI without blocking the event loop
+        """
+        try:
+            cached = self.sync.itinerary_cache.get(profile, weather_data)
+            if cached is not None:
+                print(f"⚡ Itinerary cache hit for {profile.destination}")
+                return cached
+            
+            reused = self.sync._find_similar(profile, weather_data, hotels)
+            if reused is not None:
+                return reused
+            
+            if not (self.sync._gemini_configured() or self.sync._perplexity_configured()):
+                print("⚠️ No AI service configured, using fallback generation...")
+                return self.sync._generate_fallback_itinerary(profile, weather_data, hotels)
+            
+            if not self.sync._llm_fits(deadline):
+                return self.sync._generate_fallback_itinerary(profile, weather_data, hotels)
+            
+            if profile.days > self.sync.chunk_days:
+                itinerary = await self._generate_chunked(profile, weather_data, hotels, deadline)
+            else:
+                prompt = self.sync._prepare_context(profile, weather_data, hotels)
+                provider, itinerary = await self._call_provider(prompt, deadline)
+                itinerary['generated_by'] = provider
+            self.sync._remember(profile, weather_data, itinerary)
+            return itinerary
+            
+        except Exception as e:
+            print(f"❌ AI generation failed: {str(e)}")
+            print("🔄 Falling back to rule-based generation...")
+            return self.sync._generate_fallback_itinerary(profile, weather_data, hotels)
+    
+    async def _call_provider(self, prompt: Prompt, deadline: Optional[Deadline] = None) -> Tuple[str, Dict[str, Any]]:
+        """Run one prompt through the configured provider(s), returning ``(provider, itinerary)``"""
+        # Try Gemini first, fallback to Perplexity
+        if self.sync.hedger and self.sync._gemini_configured() and self.sync._perplexity_configured():
+            print("🚀 Using Gemini AI with Perplexity AI as hedge (async)...")
+            return await self.sync.hedger.run_async(
+                ('Gemini AI', lambda: self._generate_with_gemini(prompt, deadline)),
+                ('Perplexity AI', lambda: self._generate_with_perplexity(prompt, deadline))
+            )
+        elif self.sync._gemini_configured():
+            print("🚀 Using Gemini AI for itinerary generation (async)...")
+            return 'Gemini AI', await self._generate_with_gemini(prompt, deadline)
+        elif self.sync._perplexity_configured():
+            print("🚀 Using Perplexity AI for itinerary generation (async)...")
+            return 'Perplexity AI', await self._generate_with_perplexity(prompt, deadline)
+        raise Exception("No AI service configured")
+    
+    async def _generate_chunked(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+                                deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Generate a long trip as concurrent day ranges merged into one itinerary"""
+        ranges = self.sync._day_ranges(profile.days)
+        print(f"🧩 Generating {profile.days} days as {len(ranges)} concurrent chunks of up to {self.sync.chunk_days} (async)")
+        results = await asyncio.gather(
+            *(self._call_provider(self.sync._prepare_context(profile, weather_data, hotels, day_range), deadline) for day_range in ranges),
+            return_exceptions=True
+        )
+        
+        chunks = []
+        fallback_days = self.sync._generate_fallback_itinerary(profile, weather_data, hotels)['days']
+        for day_range, outcome in zip(ranges, results):
+            if isinstance(outcome, Exception):
+                print(f"❌ Chunk for days {day_range[0]}-{day_range[1]} failed: {str(outcome)}")
+                provider, result = None, {}
+            else:
+                provider, result = outcome
+            chunks.append(self.sync._check_chunk(result, day_range, provider, fallback_days))
+        return self.sync._merge_chunks(chunks)
+    
+    async def _generate_with_gemini(self, prompt: Prompt, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Generate itinerary using Gemini AI via REST API"""
+        try:
+            # Waiting for the rate limits blocks
+            await asyncio.to_thread(self.sync._admit, 'gemini', prompt, GEMINI_MAX_OUTPUT_TOKENS, deadline)
+            url, payload, headers = self.sync._gemini_request(prompt)
+            
+            response = await self.http.post(url, json=payload, headers=headers, timeout=30, deadline=deadline)
+            response.raise_for_status()
+            
+            result = response.json()
+            self.sync._record_usage(prompt, 'Gemini AI', result)
+            ai_response = self.sync._gemini_text(result)
+            print(f"✅ Gemini AI Response received: {ai_response[:100]}...")
+            return self.sync._parse_ai_response(ai_response)
+            
+        except Exception as e:
+            print(f"❌ Gemini AI generation failed: {str(e)}")
+            raise Exception(f"Gemini AI generation failed: {str(e)}")
+    
+    async def _generate_with_perplexity(self, prompt: Prompt, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Generate itinerary using Perplexity AI"""
+        try:
+            await asyncio.to_thread(self.sync._admit, 'perplexity', prompt, PERPLEXITY_MAX_TOKENS, deadline)
+            url, payload, headers = self.sync._perplexity_request(prompt)
+            
+            response = await self.http.post(url, json=payload, headers=headers, timeout=30, deadline=deadline)
+            response.raise_for_status()
+            
+            result = response.json()
+            self.sync._record_usage(prompt, 'Perplexity AI', result)
+            ai_response = self.sync._perplexity_text(result)
+            
+            return self.sync._parse_ai_response(ai_response)
+            
+        except Exception as e:
+            raise Exception(f"Perplexity AI generation failed: {str(e)}")
@@ -0,0 +1,233 @@
+import os
+import atexit
+import random
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from services.cassette import CassetteStore, DEFAULT_CASSETTE_DIR, sanitize_url
+from services.deadline import Deadline
+
+
+class AsyncHttpClient:
+    """
+    Non-blocking counterpart of ``HttpClient`` built on ``httpx.AsyncClient``.
+
+    An ``httpx.AsyncClient`` is bound to the event loop it is used on, so
+    one client lives on a dedicated event loop thread for the life of the
+    process. Callers on any loop, the ASGI server's or one started by a
+    script, await their requests there and share its connection pool. Retry,
+    backoff and record/replay behaviour follow the same ``HTTP_*``
+    settings as the synchronous client.
+    """
+
+    TRANSPORTS = ('live', 'record', 'replay')
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, pool_maxsize: int = 100, keepalive: int = 20, timeout: float = 10,
+                 max_retries: int = 2, backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 transport: str = 'live', cassette_dir: str = DEFAULT_CASSETTE_DIR,
+                 replay_latency_ms: float = 0, replay_jitter_ms: float = 0,
+                 replay_error_rate: float = 0, replay_seed: Optional[int] = None):
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"Unknown HTTP transport '{transport}', expected one of {', '.join(self.TRANSPORTS)}")
+        self.limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=keepalive)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.transport = transport
+        self.cassettes = CassetteStore(cassette_dir)
+        self.replay_latency_ms = replay_latency_ms
+        self.replay_jitter_ms = replay_jitter_ms
+        self.replay_error_rate = replay_error_rate
+        self._replay_random = random.Random(replay_seed)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    @classmethod
+    def from_env(cls) -> 'AsyncHttpClient':
+        """Build a client tuned by the shared ``HTTP_*`` environment variables"""
+        return cls(
+            pool_maxsize=int(os.getenv('HTTP_ASYNC_MAX_CONNECTIONS', 100)),
+            keepalive=int(os.getenv('HTTP_POOL_MAXSIZE', 20)),
+            timeout=float(os.getenv('HTTP_TIMEOUT', 10)),
+            max_retries=int(os.getenv('HTTP_MAX_RETRIES', 2)),
+            backoff_base=float(os.getenv('HTTP_BACKOFF_BASE', 0.25)),
+            backoff_max=float(os.getenv('HTTP_BACKOFF_MAX', 4.0)),
+            transport=os.getenv('HTTP_TRANSPORT', 'live'),
+            cassette_dir=os.getenv('HTTP_CASSETTE_DIR', DEFAULT_CASSETTE_DIR),
+            replay_latency_ms=float(os.getenv('HTTP_REPLAY_LATENCY_MS', 0)),
+            replay_jitter_ms=float(os.getenv('HTTP_REPLAY_JITTER_MS', 0)),
+            replay_error_rate=float(os.getenv('HTTP_REPLAY_ERROR_RATE', 0)),
+            replay_seed=int(os.getenv('HTTP_REPLAY_SEED')) if os.getenv('HTTP_REPLAY_SEED') else None
+        )
+
+    async def get(self, url: str, timeout: Optional[float] = None, retries: Optional[int] = None,
+                  deadline: Optional[Deadline] = None, **kwargs) -> httpx.Response:
+        """Send a GET request without blocking the event loop"""
+        return await self.request('GET', url, timeout=timeout, retries=retries, deadline=deadline, **kwargs)
+
+    async def post(self, url: str, timeout: Optional[float] = None, retries: Optional[int] = None,
+                   deadline: Optional[Deadline] = None, **kwargs) -> httpx.Response:
+        """Send a POST request without blocking the event loop"""
+        return await self.request('POST', url, timeout=timeout, retries=retries, deadline=deadline, **kwargs)
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None,
+                      retries: Optional[int] = None, deadline: Optional[Deadline] = None, **kwargs) -> httpx.Response:
+        """Send a request, retrying connection errors and retryable statuses within the deadline"""
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.max_retries if retries is None else retries
+
+        self._track(1)
+        try:
+            for attempt in range(retries + 1):
+                attempt_timeout = deadline.timeout(timeout) if deadline else timeout
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                last_attempt = attempt >= retries or (deadline is not None and not deadline.allows(backoff + deadline.MIN_TIMEOUT))
+                with self._lock:
+                    self._requests += 1
+                try:
+                    response = await self._send(method, url, attempt_timeout, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError):
+                    if last_attempt:
+                        with self._lock:
+                            self._failures += 1
+                        raise
+                else:
+                    if response.status_code not in self.RETRY_STATUSES or last_attempt:
+                        return response
+
+                with self._lock:
+                    self._retries += 1
+                await asyncio.sleep(backoff)
+        finally:
+            self._track(-1)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request, retry and concurrency counters"""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'retries': self._retries,
+                'failures': self._failures,
+                'in_flight': self._in_flight,
+                'peak_in_flight': self._peak_in_flight,
+                'pool_running': self._loop is not None,
+                'transport': self.transport
+            }
+
+    def close(self) -> None:
+        """Close the pooled client and stop its event loop thread"""
+        with self._lock:
+            loop, thread, client = self._loop, self._thread, self._client
+            self._loop = self._thread = self._client = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+
+    async def _send(self, method: str, url: str, timeout: float, **kwargs) -> httpx.Response:
+        """Perform one attempt over the configured transport"""
+        if self.transport == 'replay':
+            return await self._replay(method, url, timeout, **kwargs)
+
+        loop, client = self._pool()
+        # Runs on the pool's loop; cancelling the caller cancels the request there too
+        response = await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(client.request(method, url, timeout=timeout, **kwargs), loop)
+        )
+        if self.transport == 'record':
+            key = self.cassettes.key_for(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'))
+            self.cassettes.save(key, method, url, _RecordedResponse(response))
+        return response
+
+    async def _replay(self, method: str, url: str, timeout: float, **kwargs) -> httpx.Response:
+        """Serve a recorded response, applying injected latency and failures"""
+        with self._lock:
+            delay = self.replay_latency_ms + self._replay_random.uniform(-1, 1) * self.replay_jitter_ms
+            fail = self._replay_random.random() < self.replay_error_rate
+        delay = max(delay, 0) / 1000
+
+        request = httpx.Request(method, url)
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            raise httpx.ReadTimeout(f"Injected latency of {delay:.2f}s exceeded the {timeout}s timeout", request=request)
+        await asyncio.sleep(delay)
+        if fail:
+            raise httpx.ConnectError(f"Injected replay failure for {method} {sanitize_url(url)}", request=request)
+
+        key = self.cassettes.key_for(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'))
+        record = self.cassettes.load(key)
+        if record is None:
+            raise httpx.RequestError(f"No recorded response for {method} {sanitize_url(url)} ({key})", request=request)
+        recorded = record['response']
+        return httpx.Response(
+            recorded['status_code'],
+            headers=recorded.get('headers', {}),
+            content=recorded['body'].encode('utf-8'),
+            request=request
+        )
+
+    def _pool(self) -> Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]:
+        """Return the pool's event loop and client, starting its thread on first use"""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name='async-http-pool', daemon=True)
+                    thread.start()
+                    self._client = asyncio.run_coroutine_threadsafe(self._open_client(), loop).result()
+                    self._thread = thread
+                    self._loop = loop
+        return self._loop, self._client
+
+    async def _open_client(self) -> httpx.AsyncClient:
+        # Created on the pool's loop, which it stays bound to
+        return httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._in_flight += delta
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+
+class _RecordedResponse:
+    """Adapter exposing an httpx response through the attributes CassetteStore records"""
+
+    def __init__(self, response: httpx.Response):
+        self.url = str(response.url)
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+        self.content = response.content
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_async_http_client() -> AsyncHttpClient:
+    """Return the process-wide async HTTP client"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = AsyncHttpClient.from_env()
+                atexit.register(_shared_client.close)
+    return _shared_client
@@ -0,0 +1,108 @@
+import httpx
+from typing import Dict, Any
+from services.weather_service import PlaceNotFound, WeatherService
+from services.async_http_client import get_async_http_client
+from services.deadline import Deadline, DeadlineExceeded
+
+class AsyncWeatherService:
+    """Non-blocking counterpart of WeatherService for async route handlers"""
+    
+    def __init__(self, weather_service: WeatherService = None):
+        # Parsing, caching and the gazetteer are shared with the sync service;
+        # only the network calls are replaced with awaitable ones
+        self.sync = weather_service or WeatherService()
+        self.http = get_async_http_client()
+    
+    async def get_weather(self, city: str, coordinates: tuple = None, deadline: Deadline = None) -> Dict[str, Any]:
+        """
+        Get current weather and 7-day forecast for a city without blocking the event loop
+        """
+        try:
+            if coordinates is None:
+                coordinates = await self._get_coordinates(city, deadline)
+            lat, lon, city_name = coordinates
+            
+            found, weather_data = self.sync.forecast_cache.lookup(
+                lat, lon, lambda: self.sync._fetch_forecast(lat, lon)
+            )
+            if not found:
+                weather_data = await self._get_weather_data(lat, lon, deadline)
+                self.sync.forecast_cache.put(lat, lon, weather_data)
+            
+            return self.sync._build_weather(weather_data, city_name)
+            
+        except httpx.HTTPError as e:
+            if deadline is not None and deadline.expired:
+                return self.sync._get_fallback_weather(city)
+            raise Exception(f"Failed to fetch weather data: {str(e)}")
+        except Exception as e:
+            # Fallback to mock data if API fails
+            return self.sync._get_fallback_weather(city)
+    
+    async def locate(self, city: str, deadline: Deadline = None, fallback: bool = True) -> tuple:
+        """Resolve a city to ``(latitude, longitude, name)``, or None if the deadline ran out first"""
+        try:
+            return await self._get_coordinates(city, deadline, fallback)
+        except DeadlineExceeded:
+            return None
+    
+    async def _get_coordinates(self, city: str, deadline: Deadline = None, fallback: bool = True) -> tuple:
+        """Get coordinates for a city, preferring the local gazetteer over Open-Meteo geocoding"""
+        place = self.sync.gazetteer.lookup(city)
+        if place:
+            return (place['latitude'], place['longitude'], place['name'])
+        
+        try:
+            response = await self.http.get(
+                f"{self.sync.geocoding_url}/search",
+                params={'name': city, 'count': 1, 'language': 'en', 'format': 'json'},
+                timeout=10,
+                deadline=deadline
+            )
+            response.raise_for_status()
+            results = response.json().get('results')
+            
+            if results:
+                result = results[0]
+                self.sync.gazetteer.remember(
+                    city,
+                    result['latitude'],
+                    result['longitude'],
+                    result['name'],
+                    result.get('country', '')
+                )
+                return (result['latitude'], result['longitude'], result['name'])
+            if not fallback:
+                raise PlaceNotFound(f"Could not find {city}")
+            # Return default coordinates for London if city not found
+            return (51.5074, -0.1278, city)
+            
+        except (DeadlineExceeded, PlaceNotFound):
+            raise
+        except Exception as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"No time left to geocode {city}") from e
+            if not fallback:
+                raise
+            print(f"Geocoding error: {e}")
+            # Return default coordinates for London if geocoding fails
+            return (51.5074, -0.1278, city)
+    
+    async def _get_weather_data(self, lat: float, lon: float, deadline: Deadline = None) -> Dict:
+        """Get weather data from Open-Meteo"""
+        response = await self.http.get(
+            f"{self.sync.base_url}/forecast",
+            params={
+                'latitude': lat,
+                'longitude': lon,
+                'daily': 'weather_code,temperature_2m_max,temperature_2m_min,wind_speed_10m_max',
+                'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
+                'timezone': 'auto',
+                'forecast_days': 7
+            },
+            timeout=15,
+            deadline=deadline
+        )
+        response.raise_for_status()
+        
+        return response.json()
@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CASSETTE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cassettes')
+
+# Query parameters that carry credentials and must never reach a cassette
+SECRET_PARAMS = frozenset({'key', 'api_key', 'apikey', 'token', 'access_token'})
+
+
+def sanitize_url(url: str) -> str:
+    """Drop credential query parameters and sort the rest into a canonical order"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+class CassetteStore:
+    """
+    Directory of recorded HTTP responses keyed by a request fingerprint.
+
+    The fingerprint covers the method, the canonical URL (query included,
+    credentials removed) and the request body, so the same logical call
+    always maps to the same cassette file.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CASSETTE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def key_for(self, method: str, url: str, params: Any = None, json_body: Any = None, data: Any = None) -> str:
+        """Fingerprint a request"""
+        prepared_url = requests.Request(method, url, params=params).prepare().url
+        if json_body is not None:
+            body = json.dumps(json_body, sort_keys=True, separators=(',', ':'))
+        elif isinstance(data, bytes):
+            body = data.decode('utf-8', 'replace')
+        else:
+            body = '' if data is None else str(data)
+        canonical = '\n'.join([method.upper(), sanitize_url(prepared_url), body])
+        digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        return f"{urlsplit(prepared_url).hostname or 'request'}-{digest[:32]}"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the recorded interaction for a fingerprint, or None"""
+        try:
+            with open(self._path(key), encoding='utf-8') as cassette:
+                return json.load(cassette)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key: str, method: str, url: str, response: requests.Response) -> None:
+        """Record a live response under a fingerprint"""
+        record = {
+            'request': {'method': method.upper(), 'url': sanitize_url(response.url or url)},
+            'response': {
+                'status_code': response.status_code,
+                'reason': response.reason,
+                'headers': {k: v for k, v in response.headers.items() if k.lower() == 'content-type'},
+                'body': response.content.decode('utf-8', 'replace')
+            }
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as cassette:
+                json.dump(record, cassette, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+
+    @staticmethod
+    def to_response(record: Dict[str, Any]) -> requests.Response:
+        """Rebuild a ``requests.Response`` from a recorded interaction"""
+        recorded = record['response']
+        response = requests.Response()
+        response.status_code = recorded['status_code']
+        response.reason = recorded.get('reason', '')
+        response.headers = CaseInsensitiveDict(recorded.get('headers', {}))
+        response.url = record['request']['url']
+        response.encoding = 'utf-8'
+        response._content = recorded['body'].encode('utf-8')
+        # Lets iter_content/iter_lines walk the recorded body like a finished stream
+        response._content_consumed = True
+        return response
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
@@ -0,0 +1,108 @@
+import re
+import json
+from typing import Any, Dict, List
+
+DAYS_KEY = re.compile(r'"days"\s*:\s*\[')
+
+
+class DayStreamParser:
+    """
+    Incrementally extracts finished day objects from a streamed JSON reply.
+
+    Text is fed in as it arrives from the provider. Once the ``"days"``
+    array has opened, the parser tracks bracket depth (ignoring brackets
+    inside strings) and decodes each element as soon as it closes, so a day
+    can be shown long before the rest of the reply is generated. Each
+    character is scanned once no matter how the text is chunked, and only
+    the unfinished element is kept for scanning, so long streams stay
+    linear.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        # Text not consumed yet: the element being read, or where "days" may still start
+        self._buffer = ''
+        self._pos = None
+        self._depth = 0
+        self._start = None
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add streamed text and return any day objects completed by it"""
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+        self._buffer += chunk
+
+        if self._pos is None:
+            match = DAYS_KEY.search(self._buffer)
+            if not match:
+                # A match still to come starts at one of the last two quotes
+                last = self._buffer.rfind('"')
+                cut = self._buffer.rfind('"', 0, last) if last > 0 else -1
+                self._buffer = self._buffer[cut if cut >= 0 else last:] if last >= 0 else ''
+                return []
+            self._pos = match.end()
+
+        days = []
+        text = self._buffer
+        i = self._pos
+        while i < len(text):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    # Closing bracket of the days array itself
+                    self._done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    day = self._decode(text[self._start:i + 1])
+                    if day is not None:
+                        days.append(day)
+                    self._start = None
+            i += 1
+
+        # Drop consumed text so the buffer only ever holds one unfinished element
+        keep = self._start if self._start is not None else i
+        self._buffer = '' if self._done else text[keep:]
+        self._pos = i - keep
+        if self._start is not None:
+            self._start = 0
+        return days
+
+    @property
+    def done(self) -> bool:
+        """Whether the days array has been closed"""
+        return self._done
+
+    @staticmethod
+    def _decode(fragment: str):
+        """Decode one array element, skipping anything that isn't a JSON object"""
+        try:
+            value = json.loads(fragment)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
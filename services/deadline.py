@@ -0,0 +1,52 @@
+import os
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's time budget is used up before an outbound call"""
+
+
+class Deadline:
+    """
+    Time budget of one request, shared by every stage working on it.
+
+    Created once in the route and passed down to the services, so each
+    outbound call gets the smaller of its own timeout and whatever is left
+    of the request's budget instead of a fixed timeout of its own.
+    """
+
+    # Below this there is no point starting a network call
+    MIN_TIMEOUT = 0.05
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+
+    @classmethod
+    def from_env(cls) -> 'Deadline':
+        """Start a deadline of ``REQUEST_DEADLINE`` seconds (kept under Vercel's 30 s limit)"""
+        return cls(float(os.getenv('REQUEST_DEADLINE', 25)))
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() < self.MIN_TIMEOUT
+
+    def allows(self, seconds: float) -> bool:
+        """Whether at least ``seconds`` are left"""
+        return self.remaining() >= seconds
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for one call: ``cap`` or the time left, whichever is smaller"""
+        remaining = self.remaining()
+        if remaining < self.MIN_TIMEOUT:
+            raise DeadlineExceeded(f"Request deadline of {self.budget:g}s exceeded")
+        return min(cap, remaining)
+
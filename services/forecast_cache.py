@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _CacheEntry:
+    """Single cached forecast with bookkeeping for TTL and memory accounting"""
+
+    __slots__ = ('value', 'size', 'fetched_at')
+
+    def __init__(self, value: Any, size: int, fetched_at: float):
+        self.value = value
+        self.size = size
+        self.fetched_at = fetched_at
+
+
+class ForecastCache:
+    """
+    Bounded in-process forecast cache keyed by coordinates snapped to a grid.
+
+    Entries are fresh for ``ttl`` seconds. For a further ``stale_ttl`` seconds
+    the stale value is still served while a background thread refreshes it
+    (stale-while-revalidate). The cache is capped both by entry count and by
+    an estimate of the memory held, evicting least recently used entries first.
+    """
+
+    def __init__(self, ttl: float = 900, stale_ttl: float = 1800, grid: float = 0.1,
+                 max_entries: int = 512, max_bytes: int = 8 * 1024 * 1024,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.grid = grid
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or self._estimate_size
+
+        self._entries: 'OrderedDict[Hashable, _CacheEntry]' = OrderedDict()
+        self._bytes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+
+    @classmethod
+    def from_env(cls, prefix: str = 'WEATHER_CACHE', **overrides) -> 'ForecastCache':
+        """Build a cache using ``<prefix>_*`` environment variables for tuning"""
+        settings = {
+            'ttl': float(os.getenv(f'{prefix}_TTL', 900)),
+            'stale_ttl': float(os.getenv(f'{prefix}_STALE_TTL', 1800)),
+            'grid': float(os.getenv(f'{prefix}_GRID', 0.1)),
+            'max_entries': int(os.getenv(f'{prefix}_MAX_ENTRIES', 512)),
+            'max_bytes': int(os.getenv(f'{prefix}_MAX_BYTES', 8 * 1024 * 1024)),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def key_for(self, lat: float, lon: float, namespace: str = '') -> Tuple:
+        """Snap coordinates to the configured grid so nearby places share a key"""
+        return (namespace, round(lat / self.grid), round(lon / self.grid))
+
+    def get_or_fetch(self, lat: float, lon: float, fetch: Callable[[], Any], namespace: str = '') -> Any:
+        """Return the cached forecast for the coordinates, fetching it on a miss"""
+        found, value = self.lookup(lat, lon, fetch, namespace)
+        if found:
+            return value
+
+        value = fetch()
+        self._store(self.key_for(lat, lon, namespace), value)
+        return value
+
+    def lookup(self, lat: float, lon: float, refresh: Callable[[], Any], namespace: str = '') -> Tuple[bool, Any]:
+        """
+        Return ``(found, value)`` without fetching on a miss.
+
+        Stale entries are returned as found and ``refresh`` is run in a
+        background thread to replace them. Callers that fetch misses
+        themselves (e.g. asynchronously) should store the result with ``put``.
+        """
+        key = self.key_for(lat, lon, namespace)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.fetched_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stale_hits += 1
+                    start_refresh = key not in self._refreshing
+                    if start_refresh:
+                        self._refreshing.add(key)
+                    value = entry.value
+                else:
+                    self._remove(key)
+                    self._expirations += 1
+                    entry = None
+            if entry is None:
+                self._misses += 1
+                return False, None
+
+        if start_refresh:
+            threading.Thread(target=self._refresh, args=(key, refresh), daemon=True).start()
+        return True, value
+
+    def get(self, lat: float, lon: float, namespace: str = '') -> Optional[Any]:
+        """Return a fresh cached value without fetching, or None"""
+        key = self.key_for(lat, lon, namespace)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.fetched_at >= self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, lat: float, lon: float, value: Any, namespace: str = '') -> None:
+        """Insert a value fetched outside of ``get_or_fetch``"""
+        self._store(self.key_for(lat, lon, namespace), value)
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self._hits + self._stale_hits + self._misses
+            return {
+                'hits': self._hits,
+                'stale_hits': self._stale_hits,
+                'misses': self._misses,
+                'hit_rate': round((self._hits + self._stale_hits) / lookups, 3) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'refreshes': self._refreshes,
+                'refresh_failures': self._refresh_failures,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'grid': self.grid
+            }
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Any]) -> None:
+        """Re-fetch a stale entry in the background"""
+        try:
+            value = fetch()
+            self._store(key, value)
+            with self._lock:
+                self._refreshes += 1
+        except Exception as e:
+            print(f"Forecast cache refresh failed: {e}")
+            with self._lock:
+                self._refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        """Insert or replace an entry and evict until within the caps"""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(value, size, time.monotonic())
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry; caller must hold the lock"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Approximate the memory held by a value (array-backed values report ``nbytes``)"""
+        if hasattr(value, 'nbytes'):
+            return value.nbytes
+        try:
+            return len(json.dumps(value, separators=(',', ':')))
+        except (TypeError, ValueError):
+            return 1024
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import tempfile
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Any
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+SOURCE_PATH = os.path.join(DATA_DIR, 'cities.tsv')
+INDEX_PATH = os.path.join(DATA_DIR, 'gazetteer.idx')
+
+# Index layout: magic, record count, one uint32 offset per record, then the
+# records themselves as "key\tname\tlatitude\tlongitude\tcountry\n" sorted by key.
+MAGIC = b'GZT1'
+HEADER = struct.Struct('<4sI')
+OFFSET = struct.Struct('<I')
+
+
+def normalize_name(name: str) -> str:
+    """Case-fold a place name and strip accents and redundant whitespace"""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def build_index(source_path: str = SOURCE_PATH, index_path: str = INDEX_PATH) -> int:
+    """Compile the human-editable city list into the sorted binary index"""
+    records = []
+    with open(source_path, encoding='utf-8') as source:
+        for line in source:
+            if not line.strip() or line.startswith('#'):
+                continue
+            name, aliases, lat, lon, country = line.rstrip('\n').split('\t')
+            row = f"{name}\t{float(lat):.4f}\t{float(lon):.4f}\t{country}"
+            keys = [name] + [alias for alias in aliases.split('|') if alias]
+            for key in dict.fromkeys(normalize_name(k) for k in keys):
+                records.append((key, f"{key}\t{row}\n".encode('utf-8')))
+
+    # Stable sort keeps the source order (most important city first) for duplicate keys
+    records.sort(key=lambda record: record[0].encode('utf-8'))
+
+    offsets = []
+    position = 0
+    for _, payload in records:
+        offsets.append(position)
+        position += len(payload)
+
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'wb') as index:
+        index.write(HEADER.pack(MAGIC, len(records)))
+        for offset in offsets:
+            index.write(OFFSET.pack(offset))
+        for _, payload in records:
+            index.write(payload)
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+
+class Gazetteer:
+    """
+    Local city lookup backed by a memory-mapped sorted index.
+
+    Supports exact, case-folded and prefix lookups without loading the index
+    into the Python heap. Places resolved remotely can be remembered in a
+    persistent JSON-lines cache so they never need to be geocoded again.
+    """
+
+    def __init__(self, index_path: str = INDEX_PATH, cache_path: Optional[str] = None):
+        self.index_path = index_path
+        self.cache_path = cache_path or self._default_cache_path()
+        self._lock = threading.Lock()
+        self._cache_writable = True
+        self._remembered: Dict[str, Dict[str, Any]] = {}
+        self._count = 0
+        self._records_start = 0
+        self._map = None
+
+        self._open_index()
+        self._load_cache()
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a place name to coordinates.
+
+        An exact (case-sensitive) match on the canonical name is preferred,
+        then any case-folded match on a name or alias, then the remote cache.
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+
+        matches = []
+        if self._map is not None:
+            position = self._bisect(key)
+            while position < self._count:
+                record_key, record = self._read(position)
+                if record_key != key:
+                    break
+                matches.append(record)
+                position += 1
+
+        for record in matches:
+            if record['name'] == name.strip():
+                return record
+        if matches:
+            return matches[0]
+
+        with self._lock:
+            return self._remembered.get(key)
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` distinct places whose name or alias starts with the prefix"""
+        key = normalize_name(prefix)
+        results = []
+        seen = set()
+        if not key or self._map is None:
+            return results
+
+        position = self._bisect(key)
+        while position < self._count and len(results) < limit:
+            record_key, record = self._read(position)
+            if not record_key.startswith(key):
+                break
+            identity = (record['name'], record['country'])
+            if identity not in seen:
+                seen.add(identity)
+                results.append(record)
+            position += 1
+        return results
+
+    def remember(self, query: str, latitude: float, longitude: float, name: str, country: str = '') -> None:
+        """Store a remotely geocoded place so later lookups stay local"""
+        key = normalize_name(query)
+        if not key:
+            return
+        record = {'name': name, 'latitude': latitude, 'longitude': longitude, 'country': country}
+
+        with self._lock:
+            if self._remembered.get(key) == record:
+                return
+            self._remembered[key] = record
+            if not self._cache_writable:
+                return
+            try:
+                with open(self.cache_path, 'a', encoding='utf-8') as cache:
+                    cache.write(json.dumps({'query': key, **record}) + '\n')
+            except OSError as e:
+                # Read-only filesystems still get the in-memory cache
+                print(f"Geocode cache not writable ({self.cache_path}): {e}")
+                self._cache_writable = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _open_index(self) -> None:
+        """Memory-map the compiled index, rebuilding it from the source if missing"""
+        if not os.path.exists(self.index_path) and os.path.exists(SOURCE_PATH):
+            try:
+                build_index(SOURCE_PATH, self.index_path)
+            except OSError as e:
+                print(f"Could not build gazetteer index: {e}")
+                return
+        try:
+            with open(self.index_path, 'rb') as index:
+                self._map = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            print(f"Gazetteer index unavailable: {e}")
+            return
+
+        magic, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            print(f"Gazetteer index {self.index_path} has an unknown format")
+            self._map = None
+            return
+        self._count = count
+        self._records_start = HEADER.size + OFFSET.size * count
+
+    def _load_cache(self) -> None:
+        """Load previously remembered remote lookups"""
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache:
+                for line in cache:
+                    try:
+                        entry = json.loads(line)
+                        query = entry.pop('query')
+                    except (ValueError, KeyError):
+                        continue
+                    self._remembered[query] = entry
+        except OSError:
+            pass
+
+    def _key_at(self, position: int) -> bytes:
+        """Read just the sort key of a record"""
+        start = self._record_start(position)
+        return self._map[start:self._map.find(b'\t', start)]
+
+    def _read(self, position: int):
+        """Decode the record at a sorted position"""
+        start = self._record_start(position)
+        end = self._map.find(b'\n', start)
+        key, name, lat, lon, country = self._map[start:end].decode('utf-8').split('\t')
+        return key, {'name': name, 'latitude': float(lat), 'longitude': float(lon), 'country': country}
+
+    def _record_start(self, position: int) -> int:
+        return self._records_start + OFFSET.unpack_from(self._map, HEADER.size + OFFSET.size * position)[0]
+
+    def _bisect(self, key: str) -> int:
+        """Find the first record whose key is not less than ``key``"""
+        target = key.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def _default_cache_path() -> str:
+        """Pick a writable location for remembered lookups"""
+        configured = os.getenv('GEOCODE_CACHE_PATH')
+        if configured:
+            return configured
+        if os.getenv('VERCEL'):
+            # Serverless bundles are read-only apart from the temp directory
+            return os.path.join(tempfile.gettempdir(), 'geocode_cache.jsonl')
+        return os.path.join(DATA_DIR, 'geocode_cache.jsonl')
+
+
+_shared_gazetteer = None
+_shared_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Return the process-wide gazetteer so every service shares one mapping"""
+    global _shared_gazetteer
+    if _shared_gazetteer is None:
+        with _shared_lock:
+            if _shared_gazetteer is None:
+                _shared_gazetteer = Gazetteer()
+    return _shared_gazetteer
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else INDEX_PATH
+    print(f"Indexed {build_index(source, target)} names into {target}")
@@ -0,0 +1,244 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+# (provider name, zero-argument call) pairs, primary first
+Attempt = Tuple[str, Callable[[], Any]]
+AsyncAttempt = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one provider"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency at the given percentile, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(pct / 100 * len(samples))) - 1))
+        return samples[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HedgeBudget:
+    """Caps how many hedge requests may be fired in any sliding minute"""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._fired: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._fired and now - self._fired[0] >= 60:
+                self._fired.popleft()
+            if len(self._fired) >= self.per_minute:
+                return False
+            self._fired.append(now)
+            return True
+
+
+class Hedger:
+    """
+    Runs a primary call and, if it is slow, a hedged secondary call.
+
+    The secondary is fired once the primary has been outstanding longer
+    than the primary's recent ``percentile`` latency (or as soon as the
+    primary fails), subject to a per-minute hedge budget. The first valid
+    result wins; the loser is cancelled when possible and otherwise left
+    to finish in the background with its result ignored.
+    """
+
+    def __init__(self, percentile: float = 90, min_delay: float = 2.0, default_delay: float = 8.0,
+                 min_samples: int = 20, budget_per_minute: int = 10, max_workers: int = 8,
+                 validate: Optional[Callable[[Any], bool]] = None):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.budget = HedgeBudget(budget_per_minute)
+        self.validate = validate or (lambda result: result is not None)
+        # Separate from the pipeline executor: hedged calls are started from
+        # pipeline stages and must never wait on a slot held by their caller
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._hedged = 0
+        self._budget_denied = 0
+        self._wins: Dict[str, int] = {}
+        self._failures: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, validate: Optional[Callable[[Any], bool]] = None) -> Optional['Hedger']:
+        """Build a hedger from ``AI_HEDGE_*`` settings, or None when hedging is off"""
+        if os.getenv('AI_HEDGING', '').lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        return cls(
+            percentile=float(os.getenv('AI_HEDGE_PERCENTILE', 90)),
+            min_delay=float(os.getenv('AI_HEDGE_MIN_DELAY', 2.0)),
+            default_delay=float(os.getenv('AI_HEDGE_DEFAULT_DELAY', 8.0)),
+            budget_per_minute=int(os.getenv('AI_HEDGE_BUDGET_PER_MINUTE', 10)),
+            validate=validate
+        )
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on ``provider`` before hedging"""
+        tracker = self._tracker(provider)
+        if len(tracker) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def run(self, primary: Attempt, secondary: Attempt) -> Tuple[str, Any]:
+        """Return ``(provider, result)`` from whichever call produces a valid result first"""
+        with self._lock:
+            self._calls += 1
+
+        futures = {self._executor.submit(self._timed, *primary): primary[0]}
+        pending = set(futures)
+        deadline = time.monotonic() + self.hedge_delay(primary[0])
+        hedge_pending = True
+        errors = []
+
+        while pending or hedge_pending:
+            timeout = max(0.0, deadline - time.monotonic()) if hedge_pending else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider}: {e}")
+                    self._count(self._failures, provider)
+                    continue
+                self._count(self._wins, provider)
+                for loser in pending:
+                    loser.cancel()
+                return provider, result
+
+            # Hedge once the primary is slow or has already failed
+            if hedge_pending and (not pending or time.monotonic() >= deadline):
+                hedge_pending = False
+                if self._acquire_hedge():
+                    future = self._executor.submit(self._timed, *secondary)
+                    futures[future] = secondary[0]
+                    pending.add(future)
+
+        raise Exception(f"All providers failed: {'; '.join(errors) or 'hedge budget exhausted'}")
+
+    async def run_async(self, primary: AsyncAttempt, secondary: AsyncAttempt) -> Tuple[str, Any]:
+        """Coroutine version of ``run``; the losing call is cancelled outright"""
+        with self._lock:
+            self._calls += 1
+
+        tasks = {asyncio.ensure_future(self._timed_async(*primary)): primary[0]}
+        pending = set(tasks)
+        deadline = time.monotonic() + self.hedge_delay(primary[0])
+        hedge_pending = True
+        errors = []
+
+        try:
+            while pending or hedge_pending:
+                timeout = max(0.0, deadline - time.monotonic()) if hedge_pending else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    provider = tasks[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors.append(f"{provider}: {e}")
+                        self._count(self._failures, provider)
+                        continue
+                    self._count(self._wins, provider)
+                    return provider, result
+
+                if hedge_pending and (not pending or time.monotonic() >= deadline):
+                    hedge_pending = False
+                    if self._acquire_hedge():
+                        task = asyncio.ensure_future(self._timed_async(*secondary))
+                        tasks[task] = secondary[0]
+                        pending.add(task)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise Exception(f"All providers failed: {'; '.join(errors) or 'hedge budget exhausted'}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedge rate, budget and per-provider win counters"""
+        with self._lock:
+            providers = sorted(set(self._wins) | set(self._failures) | set(self._latency))
+            wins = dict(self._wins)
+            failures = dict(self._failures)
+            calls, hedged, denied = self._calls, self._hedged, self._budget_denied
+        return {
+            'enabled': True,
+            'calls': calls,
+            'hedged': hedged,
+            'hedge_rate': round(hedged / calls, 3) if calls else 0.0,
+            'budget_denied': denied,
+            'budget_per_minute': self.budget.per_minute,
+            'providers': {
+                provider: {
+                    'wins': wins.get(provider, 0),
+                    'failures': failures.get(provider, 0),
+                    'hedge_delay_seconds': round(self.hedge_delay(provider), 3)
+                }
+                for provider in providers
+            }
+        }
+
+    def _acquire_hedge(self) -> bool:
+        acquired = self.budget.try_acquire()
+        with self._lock:
+            if acquired:
+                self._hedged += 1
+            else:
+                self._budget_denied += 1
+        return acquired
+
+    def _timed(self, provider: str, call: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        result = call()
+        if not self.validate(result):
+            raise ValueError('invalid result')
+        self._tracker(provider).record(time.monotonic() - started)
+        return result
+
+    async def _timed_async(self, provider: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        result = await call()
+        if not self.validate(result):
+            raise ValueError('invalid result')
+        self._tracker(provider).record(time.monotonic() - started)
+        return result
+
+    def _tracker(self, provider: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._latency.get(provider)
+            if tracker is None:
+                tracker = self._latency[provider] = LatencyTracker()
+            return tracker
+
+    def _count(self, counter: Dict[str, int], provider: str) -> None:
+        with self._lock:
+            counter[provider] = counter.get(provider, 0) + 1
@@ -0,0 +1,447 @@
+import os
+import sys
+import json
+import mmap
+import math
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.gazetteer import DATA_DIR, normalize_name
+
+SOURCE_PATH = os.path.join(DATA_DIR, 'hotels.jsonl')
+CATALOG_PATH = os.path.join(DATA_DIR, 'hotels.cat')
+
+# File layout: header, section directory, then 8-byte aligned sections. Each
+# section is a flat array of one typecode, written in the byte order noted
+# in the header, so it can be used straight from the mapping with
+# memoryview.cast and never copied onto the Python heap.
+MAGIC = b'HCT1'
+HEADER = struct.Struct('<4s1sxxxII')           # magic, byte order, rows, sections
+SECTION = struct.Struct('<24s1sxxxQQ')         # name, typecode, offset, length in bytes
+ALIGN = 8
+
+# Hotel fields in output order: (name, kind, typecode, required). Numbers are
+# stored in typed columns, strings as ids into one interned string table,
+# and string lists as per-row offsets into a column of string ids.
+NUMBER, STRING, STRINGS = 'number', 'string', 'strings'
+COLUMNS = (
+    ('id', NUMBER, 'I', True),
+    ('name', STRING, 'I', True),
+    ('rating', NUMBER, 'd', True),
+    ('price_per_night', NUMBER, 'I', True),
+    ('location', STRING, 'I', False),
+    ('city', STRING, 'I', True),
+    ('address', STRING, 'I', False),
+    ('max_occupancy', NUMBER, 'H', True),
+    ('amenities', STRINGS, 'I', False),
+    ('accessibility', STRINGS, 'I', False),
+    ('description', STRING, 'I', False),
+    ('image_url', STRING, 'I', False),
+    ('distance_to_center', NUMBER, 'd', False),
+    ('google_maps_url', STRING, 'I', False),
+    ('tripadvisor_rating', NUMBER, 'd', False),
+    ('booking_sites', STRINGS, 'I', False),
+    ('latitude', NUMBER, 'd', False),
+    ('longitude', NUMBER, 'd', False)
+)
+FIELDS = frozenset(name for name, _, _, _ in COLUMNS)
+
+# String id of an absent optional string
+MISSING = 0xFFFFFFFF
+
+# Hotels with coordinates are also stored as points on the unit sphere, in
+# an implicit k-d tree: the middle row of every range splits it on the axis
+# noted for that row, and ranges of at most KD_LEAF rows are scanned.
+# Straight-line (chord) distance between points orders them exactly like
+# great-circle distance, without special cases at the poles or date line.
+EARTH_RADIUS_KM = 6371.0088
+KD_LEAF = 8
+
+
+def unit_vector(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    """Cartesian position of a coordinate on the unit sphere"""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(chord: float) -> float:
+    """Great-circle distance for a straight-line distance between unit vectors"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km: float) -> float:
+    """Straight-line distance between unit vectors ``km`` apart on the surface"""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def load_source(source_path: str = SOURCE_PATH) -> List[Dict[str, Any]]:
+    """Read the human-editable catalog: one JSON object per line, ``#`` comments allowed"""
+    hotels = []
+    with open(source_path, encoding='utf-8') as source:
+        for number, line in enumerate(source, start=1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            try:
+                hotels.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{source_path}:{number}: {e}") from e
+    return hotels
+
+
+def build_catalog(hotels: Iterable[Dict[str, Any]], catalog_path: str = CATALOG_PATH) -> int:
+    """
+    Compile hotels into the columnar catalog file; returns the number of hotels.
+
+    Rows are written best first, by (rating desc, price, source order), so
+    a row number doubles as the recommendation rank. Per-city and
+    catalog-wide price orders and a k-d tree over the hotels with
+    coordinates are precomputed for HotelIndex.
+    """
+    hotels = list(hotels)
+    for position, hotel in enumerate(hotels):
+        _validate(hotel, position)
+    order = sorted(range(len(hotels)), key=lambda i: (-hotels[i]['rating'], hotels[i]['price_per_night'], i))
+    rows = [hotels[i] for i in order]
+
+    strings: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return MISSING
+        return strings.setdefault(value, len(strings))
+
+    sections: List[Tuple[str, array]] = []
+    for name, kind, typecode, _ in COLUMNS:
+        if kind == NUMBER:
+            sections.append((f"col:{name}", array(typecode, (
+                hotel[name] if hotel.get(name) is not None else math.nan for hotel in rows
+            ))))
+        elif kind == STRING:
+            sections.append((f"col:{name}", array('I', (intern(hotel.get(name)) for hotel in rows))))
+        else:
+            offsets, items = array('I', [0]), array('I')
+            for hotel in rows:
+                items.extend(intern(item) for item in hotel.get(name) or ())
+                offsets.append(len(items))
+            sections.append((f"col:{name}", offsets))
+            sections.append((f"items:{name}", items))
+
+    # Rows of each city, by price and by rank, concatenated in city key order
+    by_city: Dict[str, List[int]] = {}
+    for row, hotel in enumerate(rows):
+        by_city.setdefault(normalize_name(hotel['city']), []).append(row)
+    keys = sorted(by_city)
+    bounds, ranked, priced = array('I', [0]), array('I'), array('I')
+    for key in keys:
+        members = by_city[key]
+        ranked.extend(members)
+        priced.extend(sorted(members, key=lambda row: (rows[row]['price_per_night'], row)))
+        bounds.append(len(ranked))
+    everything = sorted(range(len(rows)), key=lambda row: (rows[row]['price_per_night'], row))
+
+    sections.append(('city.keys', array('I', (intern(key) for key in keys))))
+    sections.append(('city.bounds', bounds))
+    sections.extend(_price_order('city', priced, rows))
+    sections.append(('city.ranked', ranked))
+    sections.extend(_price_order('all', everything, rows))
+    sections.extend(_kd_tree(rows))
+
+    # The string table goes last so it includes the city keys
+    blob, offsets = bytearray(), array('I', [0])
+    for value in strings:
+        blob.extend(value.encode('utf-8'))
+        offsets.append(len(blob))
+    sections.append(('str.offsets', offsets))
+    sections.append(('str.data', array('B', blob)))
+    sections.append(('schema', array('B', json.dumps(COLUMNS).encode('utf-8'))))
+
+    directory_end = HEADER.size + SECTION.size * len(sections)
+    position = _aligned(directory_end)
+    entries = []
+    for name, values in sections:
+        length = len(values) * values.itemsize
+        entries.append((name, values.typecode, position, length))
+        position = _aligned(position + length)
+
+    tmp_path = f"{catalog_path}.tmp"
+    with open(tmp_path, 'wb') as catalog:
+        catalog.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), len(rows), len(sections)))
+        for name, typecode, offset, length in entries:
+            catalog.write(SECTION.pack(name.encode('ascii'), typecode.encode('ascii'), offset, length))
+        for (name, values), (_, _, offset, _) in zip(sections, entries):
+            catalog.write(b'\0' * (offset - catalog.tell()))
+            catalog.write(values.tobytes())
+    os.replace(tmp_path, catalog_path)
+    return len(rows)
+
+
+def compile_catalog(source_path: str = SOURCE_PATH, catalog_path: str = CATALOG_PATH) -> int:
+    """Compile the human-editable hotel list into the binary catalog"""
+    return build_catalog(load_source(source_path), catalog_path)
+
+
+class PriceOrder:
+    """A group's rows sorted by price, with their prices and occupancies alongside"""
+
+    __slots__ = ('rows', 'prices', 'occupancy')
+
+    def __init__(self, rows: memoryview, prices: memoryview, occupancy: memoryview):
+        self.rows = rows
+        self.prices = prices
+        self.occupancy = occupancy
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class GeoTree:
+    """Rows with coordinates in k-d tree order, with their points, split axes, prices and occupancies"""
+
+    __slots__ = ('rows', 'points', 'axes', 'prices', 'occupancy')
+
+    def __init__(self, rows: memoryview, points: Tuple[memoryview, memoryview, memoryview], axes: memoryview,
+                 prices: memoryview, occupancy: memoryview):
+        self.rows = rows
+        self.points = points
+        self.axes = axes
+        self.prices = prices
+        self.occupancy = occupancy
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class HotelCatalog:
+    """
+    Read-only hotel catalog backed by a memory-mapped columnar file.
+
+    Opening maps the file and reads its section directory; nothing is
+    decoded until it is asked for, so startup time and heap usage don't
+    grow with the catalog, and worker processes share the mapped pages.
+    ``hotel(row)`` materializes one full hotel dict.
+    """
+
+    def __init__(self, catalog_path: str = CATALOG_PATH):
+        self.path = catalog_path
+        with open(catalog_path, 'rb') as catalog:
+            self._map = mmap.mmap(catalog.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, byteorder, self.rows, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{catalog_path} is not a hotel catalog")
+        if byteorder != sys.byteorder[0].encode():
+            raise ValueError(f"{catalog_path} was compiled on a machine with a different byte order")
+
+        view = memoryview(self._map)
+        self._sections: Dict[str, memoryview] = {}
+        for index in range(count):
+            name, typecode, offset, length = SECTION.unpack_from(self._map, HEADER.size + SECTION.size * index)
+            name = name.rstrip(b'\0').decode('ascii')
+            self._sections[name] = view[offset:offset + length].cast(typecode.decode('ascii'))
+            if name == 'str.data':
+                # Slicing the mapping itself decodes strings faster than a memoryview
+                self._string_base = offset
+
+        self.columns = [tuple(column) for column in json.loads(bytes(self._sections['schema']))]
+        # (name, kind, values, list items) per field, resolved once for hotel()
+        self._fields = [
+            (name, kind, self._sections[f"col:{name}"], self._sections.get(f"items:{name}"))
+            for name, kind, _, _ in self.columns
+        ]
+        self._string_offsets = self._sections['str.offsets']
+        self._city_keys = self._sections['city.keys']
+        self._city_bounds = self._sections['city.bounds']
+        self.everything = PriceOrder(self._sections['all.rows'], self._sections['all.prices'], self._sections['all.occupancy'])
+        # Catalogs compiled before coordinates were added have no tree
+        self.geo = GeoTree(
+            self._sections['geo.rows'],
+            (self._sections['geo.x'], self._sections['geo.y'], self._sections['geo.z']),
+            self._sections['geo.axes'],
+            self._sections['geo.prices'],
+            self._sections['geo.occupancy']
+        ) if 'geo.rows' in self._sections else None
+        self.city_index = lru_cache(maxsize=1024)(self._city_index)
+        # Amenities, cities and booking sites repeat across hotels
+        self.string = lru_cache(maxsize=4096)(self._string)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> memoryview:
+        """A numeric column, or the string ids of a string column, indexed by row"""
+        return self._sections[f"col:{name}"]
+
+    def _string(self, string_id: int) -> Optional[str]:
+        if string_id == MISSING:
+            return None
+        base = self._string_base
+        return self._map[base + self._string_offsets[string_id]:base + self._string_offsets[string_id + 1]].decode('utf-8')
+
+    def hotel(self, row: int) -> Dict[str, Any]:
+        """Materialize one hotel as a dict; absent optional fields are left out"""
+        string = self.string
+        hotel = {}
+        for name, kind, values, items in self._fields:
+            if kind == NUMBER:
+                value = values[row]
+                if value != value:  # NaN marks an absent optional number
+                    continue
+            elif kind == STRING:
+                value = string(values[row])
+                if value is None:
+                    continue
+            else:
+                value = [string(item) for item in items[values[row]:values[row + 1]]]
+            hotel[name] = value
+        return hotel
+
+    @property
+    def cities(self) -> List[str]:
+        """Normalized names of every city with hotels"""
+        return [self.string(string_id) for string_id in self._city_keys]
+
+    def city(self, key: str) -> Optional[Tuple[PriceOrder, memoryview]]:
+        """The price order and rank order of one city's rows, by normalized name, or None"""
+        index = self.city_index(key)
+        if index is None:
+            return None
+        start, end = self._city_bounds[index], self._city_bounds[index + 1]
+        order = PriceOrder(
+            self._sections['city.rows'][start:end],
+            self._sections['city.prices'][start:end],
+            self._sections['city.occupancy'][start:end]
+        )
+        return order, self._sections['city.ranked'][start:end]
+
+    def _city_index(self, key: str) -> Optional[int]:
+        """Binary search of the sorted city keys"""
+        index = bisect_left(_Keys(self), key)
+        if index < len(self._city_keys) and self.string(self._city_keys[index]) == key:
+            return index
+        return None
+
+
+class _Keys:
+    """Sequence view decoding city keys on access, for bisect"""
+
+    def __init__(self, catalog: HotelCatalog):
+        self._catalog = catalog
+
+    def __len__(self) -> int:
+        return len(self._catalog._city_keys)
+
+    def __getitem__(self, index: int) -> str:
+        return self._catalog.string(self._catalog._city_keys[index])
+
+
+def open_catalog(source_path: Optional[str] = None) -> HotelCatalog:
+    """
+    Open the compiled catalog for ``HOTEL_CATALOG_SOURCE`` (default ``data/hotels.jsonl``).
+
+    The catalog sits next to its source with a ``.cat`` extension and is
+    compiled when missing, into the temp directory if the data directory
+    is read-only. After editing a source, recompile it with
+    ``python -m services.hotel_catalog``.
+    """
+    source_path = source_path or os.getenv('HOTEL_CATALOG_SOURCE') or SOURCE_PATH
+    catalog_path = os.path.splitext(source_path)[0] + '.cat'
+    if not os.path.exists(catalog_path):
+        try:
+            compile_catalog(source_path, catalog_path)
+        except OSError as e:
+            print(f"Could not write hotel catalog next to {source_path}: {e}")
+            catalog_path = os.path.join(tempfile.gettempdir(), os.path.basename(catalog_path))
+            compile_catalog(source_path, catalog_path)
+    return HotelCatalog(catalog_path)
+
+
+def _validate(hotel: Dict[str, Any], position: int) -> None:
+    unknown = set(hotel) - FIELDS
+    if unknown:
+        raise ValueError(f"Hotel {position}: unknown field(s) {', '.join(sorted(unknown))}")
+    for name, kind, typecode, required in COLUMNS:
+        value = hotel.get(name)
+        if value is None:
+            if required:
+                raise ValueError(f"Hotel {position}: missing {name}")
+        elif typecode in ('I', 'H') and kind == NUMBER and (not isinstance(value, int) or value < 0):
+            raise ValueError(f"Hotel {position}: {name} must be a non-negative whole number")
+    latitude, longitude = hotel.get('latitude'), hotel.get('longitude')
+    if (latitude is None) != (longitude is None):
+        raise ValueError(f"Hotel {position}: latitude and longitude must be given together")
+    if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"Hotel {position}: coordinates out of range")
+
+
+def _price_order(prefix: str, rows_by_price: Iterable[int], rows: List[Dict[str, Any]]) -> List[Tuple[str, array]]:
+    rows_by_price = array('I', rows_by_price)
+    return [
+        (f"{prefix}.rows", rows_by_price),
+        (f"{prefix}.prices", array('I', (rows[row]['price_per_night'] for row in rows_by_price))),
+        (f"{prefix}.occupancy", array('H', (rows[row]['max_occupancy'] for row in rows_by_price)))
+    ]
+
+
+def _kd_tree(rows: List[Dict[str, Any]]) -> List[Tuple[str, array]]:
+    """Sections of the implicit k-d tree over every row with coordinates"""
+    points = [
+        unit_vector(hotel['latitude'], hotel['longitude']) + (row,)
+        for row, hotel in enumerate(rows) if hotel.get('latitude') is not None
+    ]
+    axes = array('B', bytes(len(points)))
+    ranges = [(0, len(points))]
+    while ranges:
+        lo, hi = ranges.pop()
+        if hi - lo <= KD_LEAF:
+            continue
+        segment = points[lo:hi]
+        # Split on the axis the range is most spread along
+        spreads = [(max(map(itemgetter(a), segment)) - min(map(itemgetter(a), segment)), a) for a in range(3)]
+        axis = max(spreads)[1]
+        segment.sort(key=itemgetter(axis))
+        points[lo:hi] = segment
+        mid = (lo + hi) // 2
+        axes[mid] = axis
+        ranges.append((lo, mid))
+        ranges.append((mid + 1, hi))
+
+    tree = array('I', (point[3] for point in points))
+    return [
+        ('geo.rows', tree),
+        ('geo.x', array('d', (point[0] for point in points))),
+        ('geo.y', array('d', (point[1] for point in points))),
+        ('geo.z', array('d', (point[2] for point in points))),
+        ('geo.axes', axes),
+        ('geo.prices', array('I', (rows[row]['price_per_night'] for row in tree))),
+        ('geo.occupancy', array('H', (rows[row]['max_occupancy'] for row in tree)))
+    ]
+
+
+def _aligned(position: int) -> int:
+    return (position + ALIGN - 1) // ALIGN * ALIGN
+
+
+_shared_catalog = None
+_shared_lock = threading.Lock()
+
+
+def get_hotel_catalog() -> HotelCatalog:
+    """Return the process-wide catalog so every service shares one mapping"""
+    global _shared_catalog
+    if _shared_catalog is None:
+        with _shared_lock:
+            if _shared_catalog is None:
+                _shared_catalog = open_catalog()
+    return _shared_catalog
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + '.cat'
+    print(f"Compiled {compile_catalog(source, target)} hotels into {target}")
@@ -0,0 +1,191 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import compress, repeat
+from operator import ge
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from services.gazetteer import Gazetteer, normalize_name
+from services.hotel_catalog import (
+    KD_LEAF, GeoTree, HotelCatalog, PriceOrder, chord_to_km, km_to_chord, unit_vector
+)
+
+# Longest run of words tried as a city name inside a free-form destination
+MAX_NAME_WORDS = 3
+
+
+def candidate_keys(destination: str) -> Iterator[str]:
+    """Normalized names a destination may refer to: all of it, each comma part, then shorter word runs"""
+    key = normalize_name(destination)
+    if not key:
+        return
+    yield key
+    parts = [normalize_name(part) for part in destination.split(',')]
+    for part in parts:
+        if part and part != key:
+            yield part
+    for part in parts:
+        words = part.split()
+        for size in range(min(len(words) - 1, MAX_NAME_WORDS), 0, -1):
+            for start in range(len(words) - size + 1):
+                yield ' '.join(words[start:start + size])
+
+
+class HotelIndex:
+    """
+    Top-k hotel queries over a HotelCatalog.
+
+    Catalog rows are numbered by (rating desc, price, catalog order), so a
+    smaller row is always the better recommendation. Each city's rows are
+    stored sorted by price: a budget range is a bisected slice, the
+    occupancy filter runs over that slice only and the best ``k`` rows
+    are picked with a heap instead of sorting the matches. When the slice
+    holds a large share of the city, walking the city's rows best first
+    finds ``k`` matches sooner. Destinations resolve to a city by name,
+    trying comma parts and word runs ("North Goa, India") and gazetteer
+    aliases ("Bombay", "Bengaluru"). Only the returned hotels are
+    materialized as dicts.
+
+    ``nearest`` and ``within`` answer the same price and occupancy filters
+    around a coordinate, using the catalog's k-d tree: subtrees on the far
+    side of a split further away than the current k-th match (or the
+    radius) are never visited.
+    """
+
+    def __init__(self, catalog: HotelCatalog, gazetteer: Optional[Gazetteer] = None):
+        self.catalog = catalog
+        self.gazetteer = gazetteer
+        self._prices = catalog.column('price_per_night')
+        self._occupancy = catalog.column('max_occupancy')
+        self.resolve = lru_cache(maxsize=1024)(self._resolve)
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    @property
+    def cities(self) -> List[str]:
+        return self.catalog.cities
+
+    def query(self, city: Optional[str], min_price: float, max_price: float, min_occupancy: int = 0,
+              k: int = 5) -> List[Dict[str, Any]]:
+        """Top ``k`` hotels of a resolved city (every city when None) matching price and occupancy"""
+        if city is None:
+            order, ranked = self.catalog.everything, None
+        else:
+            found = self.catalog.city(city)
+            if found is None:
+                return []
+            order, ranked = found
+        return [self.catalog.hotel(row) for row in self.top(order, ranked, min_price, max_price, min_occupancy, k)]
+
+    def top(self, order: PriceOrder, ranked: Optional[Sequence[int]], min_price: float, max_price: float,
+            min_occupancy: int, k: int) -> List[int]:
+        """Best ``k`` rows of a group priced within ``[min_price, max_price]`` that sleep ``min_occupancy``"""
+        lo = bisect_left(order.prices, min_price)
+        hi = bisect_right(order.prices, max_price, lo)
+        # Expected rows walked best-first is about k * len / matches, against matches for the slice
+        if (hi - lo) ** 2 > 4 * k * len(order):
+            return self._best_first(ranked if ranked is not None else range(len(order)),
+                                    min_price, max_price, min_occupancy, k)
+        rows = order.rows[lo:hi]
+        if min_occupancy > 0:
+            rows = compress(rows, map(ge, order.occupancy[lo:hi], repeat(min_occupancy)))
+        return heapq.nsmallest(k, rows)
+
+    def nearest(self, latitude: float, longitude: float, k: int, min_price: float, max_price: float,
+                min_occupancy: int = 0, max_distance_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """The ``k`` hotels closest to a coordinate matching price and occupancy, nearest first"""
+        return self._near(latitude, longitude, max_distance_km, k, min_price, max_price, min_occupancy)
+
+    def within(self, latitude: float, longitude: float, radius_km: float, min_price: float, max_price: float,
+               min_occupancy: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Hotels within ``radius_km`` of a coordinate matching price and occupancy, nearest first"""
+        return self._near(latitude, longitude, radius_km, limit, min_price, max_price, min_occupancy)
+
+    def _near(self, latitude: float, longitude: float, radius_km: Optional[float], k: Optional[int],
+              min_price: float, max_price: float, min_occupancy: int) -> List[Dict[str, Any]]:
+        tree = self.catalog.geo
+        if tree is None or (k is not None and k <= 0):
+            return []
+        hotels = []
+        for squared, row in self._search(tree, unit_vector(latitude, longitude), radius_km, k,
+                                         min_price, max_price, min_occupancy):
+            hotel = self.catalog.hotel(row)
+            hotel['distance_km'] = round(chord_to_km(squared ** 0.5), 3)
+            hotels.append(hotel)
+        return hotels
+
+    def _search(self, tree: GeoTree, query: Sequence[float], radius_km: Optional[float], k: Optional[int],
+                min_price: float, max_price: float, min_occupancy: int) -> List[tuple]:
+        """``(squared chord, row)`` of matching hotels, nearest and then best first; at most ``k`` when given"""
+        xs, ys, zs = tree.points
+        rows, axes, prices, occupancy = tree.rows, tree.axes, tree.prices, tree.occupancy
+        qx, qy, qz = query
+        # Squared chord of the search radius; the whole sphere is within 4
+        bound = km_to_chord(radius_km) ** 2 if radius_km is not None else 4.0
+        found: List[tuple] = []   # all matches, or a max-heap of (-squared, -row) when k is set
+
+        def visit(position: int) -> None:
+            nonlocal bound
+            if not (min_price <= prices[position] <= max_price and occupancy[position] >= min_occupancy):
+                return
+            dx, dy, dz = xs[position] - qx, ys[position] - qy, zs[position] - qz
+            squared = dx * dx + dy * dy + dz * dz
+            if squared > bound:
+                return
+            row = rows[position]
+            if k is None:
+                found.append((squared, row))
+            elif len(found) < k:
+                heapq.heappush(found, (-squared, -row))
+                if len(found) == k:
+                    bound = -found[0][0]
+            elif (-squared, -row) > found[0]:
+                heapq.heapreplace(found, (-squared, -row))
+                bound = -found[0][0]
+
+        # (lo, hi, squared distance from the query to the range's side of the split)
+        stack = [(0, len(tree), 0.0)]
+        while stack:
+            lo, hi, gap = stack.pop()
+            if gap > bound:
+                continue
+            if hi - lo <= KD_LEAF:
+                for position in range(lo, hi):
+                    visit(position)
+                continue
+            mid = (lo + hi) // 2
+            axis = axes[mid]
+            offset = query[axis] - tree.points[axis][mid]
+            near, far = ((lo, mid), (mid + 1, hi)) if offset < 0 else ((mid + 1, hi), (lo, mid))
+            # The near side is popped first, tightening the bound before the far side is checked
+            stack.append((far[0], far[1], max(gap, offset * offset)))
+            visit(mid)
+            stack.append((near[0], near[1], gap))
+
+        if k is None:
+            return sorted(found)
+        return sorted((-squared, -row) for squared, row in found)
+
+    def _best_first(self, ranked: Sequence[int], min_price: float, max_price: float,
+                    min_occupancy: int, k: int) -> List[int]:
+        prices, occupancy = self._prices, self._occupancy
+        found = []
+        for row in ranked:
+            if min_price <= prices[row] <= max_price and occupancy[row] >= min_occupancy:
+                found.append(row)
+                if len(found) == k:
+                    break
+        return found
+
+    def _resolve(self, destination: str) -> Optional[str]:
+        """The catalog city a destination refers to, or None"""
+        for key in candidate_keys(destination):
+            if self.catalog.city_index(key) is not None:
+                return key
+            place = self.gazetteer.lookup(key) if self.gazetteer else None
+            if place:
+                city = normalize_name(place['name'])
+                if self.catalog.city_index(city) is not None:
+                    return city
+        return None
@@ -1,216 +1,80 @@
-import requests
-import random
-from typing import Dict, List, Any
+import math
+from typing import Dict, List, Any, Optional, Tuple
+
+from services.gazetteer import get_gazetteer
+from services.hotel_catalog import get_hotel_catalog
+from services.hotel_index import HotelIndex
+
+# Nightly price range per budget, in INR
+BUDGET_RANGES = {
+    'low': (2000, 4000),      # ₹2,000 - ₹4,000 per night
+    'medium': (4000, 8000),   # ₹4,000 - ₹8,000 per night
+    'high': (8000, 20000)     # ₹8,000 - ₹20,000 per night
+}
 
 class HotelService:
     """Service for handling hotel recommendations"""
     
     def __init__(self):
-        # Since we don't have access to a real hotel API in this demo,
-        # we'll create a mock service with realistic data
-        self.mock_hotels = self._initialize_mock_hotels()
+        # Since we don't have access to a real hotel API in this demo, hotels
+        # come from a memory-mapped catalog compiled from data/hotels.jsonl
+        self.catalog = get_hotel_catalog()
+        self.index = HotelIndex(self.catalog, get_gazetteer())
     
     def get_hotels(self, destination: str, budget: str, companions: int) -> List[Dict[str, Any]]:
         """
         Get hotel recommendations based on destination, budget, and number of companions
         """
         try:
-            # Filter hotels by budget and capacity
-            filtered_hotels = self._filter_hotels_by_criteria(destination, budget, companions)
-            
-            # Sort by rating and price
-            sorted_hotels = sorted(filtered_hotels, key=lambda x: (-x['rating'], x['price_per_night']))
-            
-            # Return top 5 recommendations
-            return sorted_hotels[:5]
+            # Top 5 recommendations by rating, then price
+            return self._filter_hotels_by_criteria(destination, budget, companions, limit=5)
             
         except Exception as e:
             raise Exception(f"Failed to fetch hotel data: {str(e)}")
     
-    def _filter_hotels_by_criteria(self, destination: str, budget: str, companions: int) -> List[Dict[str, Any]]:
-        """Filter hotels based on criteria"""
-        budget_ranges = {
-            'low': (2000, 4000),      # ₹2,000 - ₹4,000 per night
-            'medium': (4000, 8000),   # ₹4,000 - ₹8,000 per night
-            'high': (8000, 20000)     # ₹8,000 - ₹20,000 per night
-        }
-        
-        min_price, max_price = budget_ranges.get(budget, (100, 200))
+    def _filter_hotels_by_criteria(self, destination: str, budget: str, companions: int,
+                                   limit: int = 10) -> List[Dict[str, Any]]:
+        """Best ``limit`` hotels matching the criteria, by rating and then price"""
+        min_price, max_price = BUDGET_RANGES.get(budget, (100, 200))
         
         # Required room capacity based on companions
         required_capacity = companions
         
-        filtered = []
-        for hotel in self.mock_hotels:
-            # Check if hotel serves the destination (simplified)
-            if destination.lower() in hotel['location'].lower() or hotel['city'].lower() in destination.lower():
-                # Check budget range
-                if min_price <= hotel['price_per_night'] <= max_price:
-                    # Check capacity
-                    if hotel['max_occupancy'] >= required_capacity:
-                        filtered.append(hotel)
+        city = self.index.resolve(destination)
+        if city is not None:
+            filtered = self.index.query(city, min_price, max_price, required_capacity, limit)
+            if filtered:
+                return filtered
         
         # If no hotels found for specific destination, provide general recommendations
-        if not filtered:
-            for hotel in self.mock_hotels:
-                if min_price <= hotel['price_per_night'] <= max_price:
-                    if hotel['max_occupancy'] >= required_capacity:
-                        # Adapt hotel to destination
-                        adapted_hotel = hotel.copy()
-                        adapted_hotel['location'] = f"Near {destination}"
-                        adapted_hotel['city'] = destination
-                        filtered.append(adapted_hotel)
+        filtered = []
+        for hotel in self.index.query(None, min_price, max_price, required_capacity, limit):
+            # Adapt hotel to destination; query results are fresh dicts
+            hotel['location'] = f"Near {destination}"
+            hotel['city'] = destination
+            filtered.append(hotel)
+        
+        return filtered
+    
+    def get_nearest_hotels(self, latitude: float, longitude: float, k: int = 5, budget: Optional[str] = None,
+                           companions: int = 0, radius_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        The ``k`` hotels closest to a coordinate, nearest first, optionally no further than ``radius_km``
         
-        return filtered[:10]  # Limit to 10 options
+        Each hotel carries its great-circle ``distance_km``; without a budget any price matches.
+        """
+        min_price, max_price = self._price_range(budget)
+        return self.index.nearest(latitude, longitude, k, min_price, max_price, companions, radius_km)
+    
+    def get_hotels_within(self, latitude: float, longitude: float, radius_km: float, budget: Optional[str] = None,
+                          companions: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Hotels within ``radius_km`` of a coordinate, nearest first, at most ``limit`` of them"""
+        min_price, max_price = self._price_range(budget)
+        return self.index.within(latitude, longitude, radius_km, min_price, max_price, companions, limit)
     
-    def _initialize_mock_hotels(self) -> List[Dict[str, Any]]:
-        """Initialize mock hotel data"""
-        return [
-            {
-                'id': 1,
-                'name': 'Grand Palace Hotel',
-                'rating': 4.8,
-                'price_per_night': 12500,  # ₹12,500 per night
-                'location': 'City Center',
-                'city': 'Mumbai',
-                'address': 'Marine Drive, Nariman Point, Mumbai, Maharashtra 400021',
-                'max_occupancy': 4,
-                'amenities': ['WiFi', 'Pool', 'Spa', 'Restaurant', 'Gym', 'Room Service'],
-                'accessibility': ['Elevator', 'Wheelchair Access', 'Accessible Bathroom'],
-                'description': 'Luxury hotel in the heart of the city with excellent service and panoramic views of Marine Drive',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 0.5,
-                'google_maps_url': 'https://www.google.com/maps/search/Grand+Palace+Hotel+Marine+Drive+Mumbai',
-                'tripadvisor_rating': 4.5,
-                'booking_sites': ['booking.com', 'agoda.com', 'makemytrip.com']
-            },
-            {
-                'id': 2,
-                'name': 'Budget Inn Downtown',
-                'rating': 3.9,
-                'price_per_night': 3000,  # ₹3,000 per night
-                'location': 'Downtown',
-                'city': 'Delhi',
-                'address': 'Connaught Place, New Delhi, Delhi 110001',
-                'max_occupancy': 2,
-                'amenities': ['WiFi', 'Continental Breakfast', 'Air Conditioning'],
-                'accessibility': ['Elevator'],
-                'description': 'Clean and comfortable budget-friendly accommodation in the heart of Delhi',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 1.2,
-                'google_maps_url': 'https://www.google.com/maps/search/Budget+Inn+Connaught+Place+Delhi',
-                'tripadvisor_rating': 3.8,
-                'booking_sites': ['booking.com', 'oyo.com', 'goibibo.com']
-            },
-            {
-                'id': 3,
-                'name': 'Boutique Heritage Hotel',
-                'rating': 4.5,
-                'price_per_night': 7200,  # ₹7,200 per night
-                'location': 'Historic District',
-                'city': 'Jaipur',
-                'address': 'City Palace Road, Pink City, Jaipur, Rajasthan 302002',
-                'max_occupancy': 3,
-                'amenities': ['WiFi', 'Restaurant', 'Bar', 'Concierge', 'Library'],
-                'accessibility': ['Elevator', 'Wheelchair Access'],
-                'description': 'Charming boutique hotel with historical character and traditional Rajasthani architecture',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 0.8,
-                'google_maps_url': 'https://www.google.com/maps/search/Heritage+Hotel+City+Palace+Jaipur',
-                'tripadvisor_rating': 4.3,
-                'booking_sites': ['booking.com', 'expedia.com', 'cleartrip.com']
-            },
-            {
-                'id': 4,
-                'name': 'Modern Business Hotel',
-                'rating': 4.2,
-                'price_per_night': 5600,  # ₹5,600 per night
-                'location': 'Business District',
-                'city': 'Bangalore',
-                'address': 'MG Road, Brigade Road, Bangalore, Karnataka 560001',
-                'max_occupancy': 2,
-                'amenities': ['WiFi', 'Business Center', 'Gym', 'Restaurant', 'Laundry'],
-                'accessibility': ['Elevator', 'Wheelchair Access', 'Accessible Bathroom'],
-                'description': 'Contemporary hotel perfect for business travelers with modern amenities and meeting facilities',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 2.1,
-                'google_maps_url': 'https://www.google.com/maps/search/Business+Hotel+MG+Road+Bangalore',
-                'tripadvisor_rating': 4.1,
-                'booking_sites': ['booking.com', 'agoda.com', 'yatra.com']
-            },
-            {
-                'id': 5,
-                'name': 'Seaside Resort',
-                'rating': 4.7,
-                'price_per_night': 16000,  # ₹16,000 per night
-                'location': 'Beachfront',
-                'city': 'Goa',
-                'address': 'Calangute Beach, North Goa, Goa 403516',
-                'max_occupancy': 6,
-                'amenities': ['WiFi', 'Pool', 'Beach Access', 'Spa', 'Restaurant', 'Bar', 'Water Sports'],
-                'accessibility': ['Elevator', 'Wheelchair Access', 'Beach Wheelchair'],
-                'description': 'Luxury beachfront resort with stunning ocean views and world-class amenities',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 5.2,
-                'google_maps_url': 'https://www.google.com/maps/search/Seaside+Resort+Calangute+Beach+Goa',
-                'tripadvisor_rating': 4.6,
-                'booking_sites': ['booking.com', 'expedia.com', 'makemytrip.com']
-            },
-            {
-                'id': 6,
-                'name': 'Cozy Bed & Breakfast',
-                'rating': 4.3,
-                'price_per_night': 3800,  # ₹3,800 per night
-                'location': 'Residential Area',
-                'city': 'Kochi',
-                'address': 'Fort Kochi, Mattancherry, Kochi, Kerala 682001',
-                'max_occupancy': 2,
-                'amenities': ['WiFi', 'Breakfast Included', 'Garden', 'Parking'],
-                'accessibility': ['Ground Floor Rooms'],
-                'description': 'Intimate B&B with personalized service and homemade breakfast in historic Fort Kochi',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 3.5,
-                'google_maps_url': 'https://www.google.com/maps/search/Bed+Breakfast+Fort+Kochi+Kerala',
-                'tripadvisor_rating': 4.2,
-                'booking_sites': ['airbnb.com', 'booking.com', 'zostel.com']
-            },
-            {
-                'id': 7,
-                'name': 'Mountain Lodge',
-                'rating': 4.4,
-                'price_per_night': 6400,  # ₹6,400 per night
-                'location': 'Mountain View',
-                'city': 'Manali',
-                'address': 'Mall Road, Old Manali, Manali, Himachal Pradesh 175131',
-                'max_occupancy': 4,
-                'amenities': ['WiFi', 'Fireplace', 'Restaurant', 'Hiking Trails', 'Spa'],
-                'accessibility': ['Elevator', 'Wheelchair Access'],
-                'description': 'Rustic lodge with breathtaking mountain views and adventure activities',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 15.0,
-                'google_maps_url': 'https://www.google.com/maps/search/Mountain+Lodge+Old+Manali+Himachal',
-                'tripadvisor_rating': 4.3,
-                'booking_sites': ['booking.com', 'goibibo.com', 'thrillophilia.com']
-            },
-            {
-                'id': 8,
-                'name': 'Airport Transit Hotel',
-                'rating': 3.8,
-                'price_per_night': 3400,  # ₹3,400 per night
-                'location': 'Near Airport',
-                'city': 'Chennai',
-                'address': 'GST Road, Near Chennai Airport, Chennai, Tamil Nadu 600027',
-                'max_occupancy': 3,
-                'amenities': ['WiFi', 'Shuttle Service', 'Restaurant', '24/7 Front Desk'],
-                'accessibility': ['Elevator', 'Wheelchair Access'],
-                'description': 'Convenient hotel for travelers with early flights, located just minutes from the airport',
-                'image_url': 'https://via.placeholder.com/300x200',
-                'distance_to_center': 20.0,
-                'google_maps_url': 'https://www.google.com/maps/search/Airport+Hotel+Chennai+GST+Road',
-                'tripadvisor_rating': 3.7,
-                'booking_sites': ['booking.com', 'cleartrip.com', 'redbus.in']
-            }
-        ]
+    def _price_range(self, budget: Optional[str]) -> Tuple[float, float]:
+        """Nightly price range of a budget; any price when no budget is given"""
+        return BUDGET_RANGES[budget] if budget is not None else (0, math.inf)
     
     def get_hotel_recommendations_by_health_conditions(self, hotels: List[Dict], health_conditions: List[str]) -> List[Dict[str, Any]]:
         """Filter hotels based on health condition requirements"""
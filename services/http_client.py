@@ -0,0 +1,231 @@
+import os
+import time
+import random
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.cassette import CassetteStore, DEFAULT_CASSETTE_DIR, sanitize_url
+from services.deadline import Deadline
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP client used by every service.
+
+    Wraps a single ``requests.Session`` so connections are kept alive in
+    per-host pools instead of paying a TCP+TLS handshake on every call.
+    Connection failures and retryable status codes are retried a bounded
+    number of times with jittered exponential backoff.
+
+    The transport can also record live responses to a cassette directory or
+    replay them offline, optionally with injected latency and failures, so
+    load tests and benchmarks run without touching the real providers.
+    """
+
+    TRANSPORTS = ('live', 'record', 'replay')
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 20, timeout: float = 10,
+                 max_retries: int = 2, backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 transport: str = 'live', cassette_dir: str = DEFAULT_CASSETTE_DIR,
+                 replay_latency_ms: float = 0, replay_jitter_ms: float = 0,
+                 replay_error_rate: float = 0, replay_seed: Optional[int] = None):
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"Unknown HTTP transport '{transport}', expected one of {', '.join(self.TRANSPORTS)}")
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.transport = transport
+        self.cassettes = CassetteStore(cassette_dir)
+        self.replay_latency_ms = replay_latency_ms
+        self.replay_jitter_ms = replay_jitter_ms
+        self.replay_error_rate = replay_error_rate
+        self._replay_random = random.Random(replay_seed)
+
+        self.session = requests.Session()
+        # Retries are handled here so they can be jittered and counted
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._host_requests: Dict[str, int] = {}
+        self._recorded = 0
+        self._replayed = 0
+        self._replay_misses = 0
+        self._injected_errors = 0
+
+    @classmethod
+    def from_env(cls) -> 'HttpClient':
+        """Build a client tuned by ``HTTP_*`` environment variables"""
+        return cls(
+            pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', 10)),
+            pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', 20)),
+            timeout=float(os.getenv('HTTP_TIMEOUT', 10)),
+            max_retries=int(os.getenv('HTTP_MAX_RETRIES', 2)),
+            backoff_base=float(os.getenv('HTTP_BACKOFF_BASE', 0.25)),
+            backoff_max=float(os.getenv('HTTP_BACKOFF_MAX', 4.0)),
+            transport=os.getenv('HTTP_TRANSPORT', 'live'),
+            cassette_dir=os.getenv('HTTP_CASSETTE_DIR', DEFAULT_CASSETTE_DIR),
+            replay_latency_ms=float(os.getenv('HTTP_REPLAY_LATENCY_MS', 0)),
+            replay_jitter_ms=float(os.getenv('HTTP_REPLAY_JITTER_MS', 0)),
+            replay_error_rate=float(os.getenv('HTTP_REPLAY_ERROR_RATE', 0)),
+            replay_seed=int(os.getenv('HTTP_REPLAY_SEED')) if os.getenv('HTTP_REPLAY_SEED') else None
+        )
+
+    def get(self, url: str, timeout: Optional[float] = None, retries: Optional[int] = None,
+            deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+        """Send a GET request through the shared pool"""
+        return self.request('GET', url, timeout=timeout, retries=retries, deadline=deadline, **kwargs)
+
+    def post(self, url: str, timeout: Optional[float] = None, retries: Optional[int] = None,
+             deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+        """Send a POST request through the shared pool"""
+        return self.request('POST', url, timeout=timeout, retries=retries, deadline=deadline, **kwargs)
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None,
+                retries: Optional[int] = None, deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying connection errors and retryable statuses.
+
+        Read timeouts are not retried: the upstream may still be working on
+        the request and a retry would only double the latency. With a
+        ``deadline`` each attempt's timeout is capped by the time left, and
+        no retry is started that the backoff alone would push past it.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.max_retries if retries is None else retries
+        host = urlsplit(url).netloc
+
+        for attempt in range(retries + 1):
+            attempt_timeout = deadline.timeout(timeout) if deadline else timeout
+            backoff = self._backoff(attempt)
+            last_attempt = attempt >= retries or (deadline is not None and not deadline.allows(backoff + deadline.MIN_TIMEOUT))
+            self._count_request(host)
+            try:
+                response = self._send(method, url, attempt_timeout, **kwargs)
+            except requests.ConnectionError:
+                if last_attempt:
+                    self._count_failure()
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or last_attempt:
+                    return response
+                response.close()
+
+            with self._lock:
+                self._retries += 1
+            time.sleep(backoff)
+
+    def _send(self, method: str, url: str, timeout: float, **kwargs) -> requests.Response:
+        """Perform one attempt over the configured transport"""
+        if self.transport == 'replay':
+            return self._replay(method, url, timeout, **kwargs)
+
+        response = self.session.request(method, url, timeout=timeout, **kwargs)
+        if self.transport == 'record':
+            key = self.cassettes.key_for(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'))
+            self.cassettes.save(key, method, url, response)
+            with self._lock:
+                self._recorded += 1
+        return response
+
+    def _replay(self, method: str, url: str, timeout: float, **kwargs) -> requests.Response:
+        """Serve a recorded response, applying injected latency and failures"""
+        with self._lock:
+            delay = self.replay_latency_ms + self._replay_random.uniform(-1, 1) * self.replay_jitter_ms
+            fail = self._replay_random.random() < self.replay_error_rate
+        delay = max(delay, 0) / 1000
+
+        if delay > timeout:
+            time.sleep(timeout)
+            raise requests.ReadTimeout(f"Injected latency of {delay:.2f}s exceeded the {timeout}s timeout")
+        time.sleep(delay)
+
+        if fail:
+            with self._lock:
+                self._injected_errors += 1
+            raise requests.ConnectionError(f"Injected replay failure for {method} {sanitize_url(url)}")
+
+        key = self.cassettes.key_for(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'))
+        record = self.cassettes.load(key)
+        with self._lock:
+            if record is None:
+                self._replay_misses += 1
+            else:
+                self._replayed += 1
+        if record is None:
+            # Not a ConnectionError: retrying a missing cassette can never succeed
+            raise requests.RequestException(f"No recorded response for {method} {sanitize_url(url)} ({key})")
+        return CassetteStore.to_response(record)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request, retry and connection reuse counters"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for pool_key in list(pools.keys()):
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            connections = getattr(pool, 'num_connections', 0)
+            pool_requests = getattr(pool, 'num_requests', 0)
+            hosts[host] = {
+                'requests': pool_requests,
+                'connections_opened': connections,
+                'connections_reused': max(pool_requests - connections, 0)
+            }
+
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'retries': self._retries,
+                'failures': self._failures,
+                'requests_by_host': dict(self._host_requests),
+                'pools': hosts,
+                'pool_connections': self.pool_connections,
+                'pool_maxsize': self.pool_maxsize,
+                'transport': self.transport,
+                'recorded': self._recorded,
+                'replayed': self._replayed,
+                'replay_misses': self._replay_misses,
+                'injected_errors': self._injected_errors
+            }
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _count_request(self, host: str) -> None:
+        with self._lock:
+            self._requests += 1
+            self._host_requests[host] = self._host_requests.get(host, 0) + 1
+
+    def _count_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client so all services share connection pools"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = HttpClient.from_env()
+    return _shared_client
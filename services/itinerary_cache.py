@@ -0,0 +1,263 @@
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from models.user_profile import UserProfile
+from models.weather_codes import RAIN, description_flags
+from services.gazetteer import DATA_DIR, normalize_name
+
+# Bump when the prompt or response format changes so old entries stop matching
+FINGERPRINT_VERSION = 3
+
+# Degrees Celsius per temperature bucket in the weather summary
+TEMPERATURE_BUCKET = 5
+
+
+def weather_summary(weather_data: Dict) -> Dict[str, Any]:
+    """Coarse weather signature: similar forecasts map to the same summary"""
+    # The Vercel entry point keeps current conditions at the top level
+    current = weather_data.get('current', weather_data)
+    temperature = current.get('temperature')
+    return {
+        'current': None if temperature is None else int(temperature // TEMPERATURE_BUCKET),
+        'current_flags': description_flags(current.get('description', '')),
+        'rain_days': sum(1 for day in weather_data.get('forecast', []) if description_flags(day.get('description', '')) & RAIN)
+    }
+
+
+def profile_fingerprint(profile: UserProfile, weather_data: Dict) -> str:
+    """
+    Canonical fingerprint of everything that shapes a generated itinerary.
+
+    The traveler's name and the profile timestamp are left out so
+    otherwise identical requests share one entry.
+    """
+    canonical = {
+        'version': FINGERPRINT_VERSION,
+        'destination': normalize_name(profile.destination),
+        'days': int(profile.days),
+        'travel_type': profile.travel_type.strip().lower(),
+        'companions': int(profile.companions),
+        'budget_range': profile.budget_range.strip().lower(),
+        'interests': sorted({normalize_name(interest) for interest in profile.interests}),
+        'health_conditions': sorted({normalize_name(condition) for condition in profile.health_conditions}),
+        'weather': weather_summary(weather_data)
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def substitute_name(value: Any, pattern: 're.Pattern', name: str) -> Any:
+    """Replace the traveler name throughout a JSON-like value"""
+    if isinstance(value, str):
+        return pattern.sub(name, value)
+    if isinstance(value, list):
+        return [substitute_name(item, pattern, name) for item in value]
+    if isinstance(value, dict):
+        return {key: substitute_name(item, pattern, name) for key, item in value.items()}
+    return value
+
+
+class ItineraryCache:
+    """
+    Two-tier cache of generated itineraries keyed by a profile fingerprint.
+
+    A small in-memory LRU sits in front of a directory of gzip-compressed
+    JSON files, one sub-directory per destination so a destination can be
+    invalidated without scanning the whole store. Entries expire after
+    ``ttl`` seconds in both tiers.
+    """
+
+    # Names this short would match ordinary words when personalizing a hit
+    MIN_NAME_LENGTH = 3
+
+    def __init__(self, directory: Optional[str] = None, ttl: float = 6 * 3600, max_entries: int = 256):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._disk_errors = 0
+
+    @classmethod
+    def from_env(cls) -> 'ItineraryCache':
+        """Build a cache tuned by ``ITINERARY_CACHE_*`` environment variables"""
+        directory = os.getenv('ITINERARY_CACHE_DIR')
+        if directory is None:
+            if os.getenv('VERCEL'):
+                # Serverless bundles are read-only apart from the temp directory
+                directory = os.path.join(tempfile.gettempdir(), 'itinerary_cache')
+            else:
+                directory = os.path.join(DATA_DIR, 'itinerary_cache')
+        return cls(
+            directory=directory or None,
+            ttl=float(os.getenv('ITINERARY_CACHE_TTL', 6 * 3600)),
+            max_entries=int(os.getenv('ITINERARY_CACHE_MAX_ENTRIES', 256))
+        )
+
+    def get(self, profile: UserProfile, weather_data: Dict) -> Optional[Dict[str, Any]]:
+        """Return a cached itinerary personalized for the profile, or None"""
+        fingerprint = profile_fingerprint(profile, weather_data)
+        record, tier = self._load(fingerprint, normalize_name(profile.destination))
+        if record is None:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            if tier == 'memory':
+                self._memory_hits += 1
+            else:
+                self._disk_hits += 1
+
+        itinerary = record['itinerary']
+        if record['traveler'] != profile.name:
+            pattern = re.compile(rf"\b{re.escape(record['traveler'])}\b")
+            return substitute_name(itinerary, pattern, profile.name)
+        return json.loads(json.dumps(itinerary))
+
+    def put(self, profile: UserProfile, weather_data: Dict, itinerary: Dict[str, Any]) -> bool:
+        """Store a generated itinerary; returns False if it was not cacheable"""
+        if len(profile.name.strip()) < self.MIN_NAME_LENGTH:
+            return False
+
+        fingerprint = profile_fingerprint(profile, weather_data)
+        record = {
+            'stored_at': time.time(),
+            'destination': normalize_name(profile.destination),
+            'traveler': profile.name,
+            # Copied so later edits by the caller don't leak into the cache
+            'itinerary': json.loads(json.dumps(itinerary))
+        }
+        with self._lock:
+            self._remember(fingerprint, record)
+            self._stores += 1
+
+        if self.directory:
+            try:
+                self._write(fingerprint, record)
+            except OSError as e:
+                print(f"⚠️ Could not persist itinerary cache entry: {e}")
+                with self._lock:
+                    self._disk_errors += 1
+        return True
+
+    def invalidate(self, destination: Optional[str] = None) -> int:
+        """Drop cached itineraries for one destination, or all when omitted"""
+        key = normalize_name(destination) if destination else None
+        with self._lock:
+            stale = [fp for fp, record in self._entries.items() if key is None or record['destination'] == key]
+            for fingerprint in stale:
+                del self._entries[fingerprint]
+            self._invalidations += 1
+
+        removed = set(stale)
+        if self.directory and os.path.isdir(self.directory):
+            targets = [self._destination_dir(key)] if key else [
+                os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            ]
+            for target in targets:
+                if os.path.isdir(target):
+                    removed.update(name[:-len('.json.gz')] for name in os.listdir(target) if name.endswith('.json.gz'))
+                    shutil.rmtree(target, ignore_errors=True)
+        return len(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for both tiers"""
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'memory_hits': self._memory_hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': round((self._memory_hits + self._disk_hits) / lookups, 3) if lookups else 0.0,
+                'stores': self._stores,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+                'disk_errors': self._disk_errors,
+                'ttl_seconds': self.ttl,
+                'persistent': bool(self.directory)
+            }
+
+    def _load(self, fingerprint: str, destination: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Find a live record in memory, then on disk"""
+        now = time.time()
+        with self._lock:
+            record = self._entries.get(fingerprint)
+            if record is not None:
+                if now - record['stored_at'] < self.ttl:
+                    self._entries.move_to_end(fingerprint)
+                    return record, 'memory'
+                del self._entries[fingerprint]
+                self._expirations += 1
+
+        if not self.directory:
+            return None, None
+
+        path = self._path(destination, fingerprint)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as stored:
+                record = json.load(stored)
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError, EOFError):
+            # Truncated or corrupt entry: treat it as a miss and let it be rewritten
+            with self._lock:
+                self._disk_errors += 1
+            return None, None
+
+        if now - record.get('stored_at', 0) >= self.ttl:
+            with self._lock:
+                self._expirations += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, None
+
+        with self._lock:
+            self._remember(fingerprint, record)
+        return record, 'disk'
+
+    def _remember(self, fingerprint: str, record: Dict[str, Any]) -> None:
+        """Insert into the memory tier; caller holds the lock"""
+        self._entries[fingerprint] = record
+        self._entries.move_to_end(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _write(self, fingerprint: str, record: Dict[str, Any]) -> None:
+        """Atomically write a compressed record to the disk tier"""
+        path = self._path(record['destination'], fingerprint)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as stored:
+            json.dump(record, stored, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def _destination_dir(self, destination: str) -> str:
+        # Readable slug plus a digest so non-Latin names don't collide
+        slug = re.sub(r'[^a-z0-9]+', '-', destination).strip('-') or 'place'
+        digest = hashlib.sha1(destination.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.directory, f"{slug}-{digest}")
+
+    def _path(self, destination: str, fingerprint: str) -> str:
+        return os.path.join(self._destination_dir(destination), f"{fingerprint}.json.gz")
@@ -0,0 +1,118 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from models.user_profile import UserProfile
+
+
+@dataclass
+class StoredItinerary:
+    """A generated itinerary together with the inputs it was generated from"""
+    id: str
+    profile: UserProfile
+    weather: Dict[str, Any]
+    hotels: List[Dict]
+    itinerary: Dict[str, Any]
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    revision: int = 0
+
+    def day(self, number: int) -> Optional[Dict[str, Any]]:
+        """The day numbered ``number``, or None when the itinerary has no such day"""
+        days = self.itinerary.get('days') or []
+        if 1 <= number <= len(days) and isinstance(days[number - 1], dict):
+            return days[number - 1]
+        return None
+
+
+class ItineraryStore:
+    """
+    In-process store of generated itineraries, addressable by id.
+
+    Keeps the profile, weather and hotels each itinerary was generated from
+    so single days can be regenerated later without fetching them again.
+    Entries expire ``ttl`` seconds after their last change, and the least
+    recently used are dropped beyond ``max_entries``. Like the job queue,
+    state lives in this process only.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: 'OrderedDict[str, StoredItinerary]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._saved = 0
+        self._day_updates = 0
+        self._expired = 0
+        self._evicted = 0
+
+    @classmethod
+    def from_env(cls) -> 'ItineraryStore':
+        """Build a store tuned by ``ITINERARY_STORE_*`` environment variables"""
+        return cls(
+            ttl=float(os.getenv('ITINERARY_STORE_TTL', 24 * 3600)),
+            max_entries=int(os.getenv('ITINERARY_STORE_MAX_ENTRIES', 1000))
+        )
+
+    def save(self, profile: UserProfile, weather: Dict[str, Any], hotels: List[Dict],
+             itinerary: Dict[str, Any]) -> StoredItinerary:
+        """Store a freshly generated itinerary under a new id"""
+        stored = StoredItinerary(uuid.uuid4().hex, profile, weather, hotels, itinerary)
+        with self._lock:
+            self._expire()
+            self._entries[stored.id] = stored
+            self._saved += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evicted += 1
+        return stored
+
+    def get(self, itinerary_id: str) -> Optional[StoredItinerary]:
+        with self._lock:
+            self._expire()
+            stored = self._entries.get(itinerary_id)
+            if stored is not None:
+                self._entries.move_to_end(itinerary_id)
+            return stored
+
+    def replace_day(self, itinerary_id: str, number: int, day: Dict[str, Any]) -> Optional[StoredItinerary]:
+        """Splice a regenerated day into a stored itinerary; None when it has expired"""
+        with self._lock:
+            stored = self._entries.get(itinerary_id)
+            if stored is None or stored.day(number) is None:
+                return None
+            # Copy-on-write so itineraries already handed out stay unchanged
+            days = list(stored.itinerary['days'])
+            days[number - 1] = day
+            stored.itinerary = {**stored.itinerary, 'days': days}
+            stored.revision += 1
+            stored.updated_at = time.time()
+            self._entries.move_to_end(itinerary_id)
+            self._day_updates += 1
+            return stored
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and save/update/expiry counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'saved': self._saved,
+                'day_updates': self._day_updates,
+                'expired': self._expired,
+                'evicted': self._evicted,
+                'ttl_seconds': self.ttl
+            }
+
+    def _expire(self) -> None:
+        """Forget itineraries unchanged for longer than the TTL; caller holds the lock"""
+        cutoff = time.time() - self.ttl
+        for itinerary_id in [key for key, stored in self._entries.items() if stored.updated_at < cutoff]:
+            del self._entries[itinerary_id]
+            self._expired += 1
@@ -0,0 +1,182 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from services.hedging import LatencyTracker
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class Job:
+    """One unit of background work and its outcome"""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status document returned to polling clients"""
+        now = time.time()
+        started = self.started_at or now
+        document = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'wait_ms': round((started - self.created_at) * 1000, 1),
+            'run_ms': round(((self.finished_at or now) - started) * 1000, 1) if self.started_at else 0.0
+        }
+        if self.timings:
+            document['timings'] = {stage: round(ms, 1) for stage, ms in self.timings.items()}
+        if self.status == SUCCEEDED:
+            document['result'] = self.result
+        elif self.status == FAILED:
+            document['error'] = self.error
+        return document
+
+
+class JobQueue:
+    """
+    In-process job queue on a bounded worker pool.
+
+    Jobs run on their own threads, separate from the request pipeline pool
+    they usually fan out to. At most ``max_workers`` run at once and at most
+    ``max_queued`` more may wait; further submissions raise ``QueueFull``.
+    Finished jobs are kept for ``ttl`` seconds so clients can collect the
+    result, and ``wait`` lets a poll block until the job finishes.
+
+    State lives in this process only, so clients must poll the instance that
+    accepted the job.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 50, ttl: float = 3600, max_wait: float = 25):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.max_wait = max_wait
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._condition = threading.Condition()
+        self._queued = 0
+        self._running = 0
+
+        self._wait_times = LatencyTracker()
+        self._run_times = LatencyTracker()
+        self._submitted = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._rejected = 0
+        self._expired = 0
+
+    @classmethod
+    def from_env(cls) -> 'JobQueue':
+        """Build a job queue tuned by ``JOB_*`` environment variables"""
+        return cls(
+            max_workers=int(os.getenv('JOB_WORKERS', 2)),
+            max_queued=int(os.getenv('JOB_MAX_QUEUED', 50)),
+            ttl=float(os.getenv('JOB_TTL', 3600)),
+            max_wait=float(os.getenv('JOB_MAX_WAIT', 25))
+        )
+
+    def submit(self, kind: str, func: Callable[[Job], Any]) -> Job:
+        """Queue ``func(job)``; its return value becomes the job result"""
+        job = Job(kind)
+        with self._condition:
+            self._expire()
+            if self._queued + self._running >= self.max_workers + self.max_queued:
+                self._rejected += 1
+                raise QueueFull(f"Job queue is full ({self.max_queued} waiting)")
+            self._jobs[job.id] = job
+            self._queued += 1
+            self._submitted += 1
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._condition:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Return the job once it has finished or ``timeout`` (capped at ``max_wait``) has passed"""
+        timeout = max(0.0, min(timeout, self.max_wait))
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is not None and timeout:
+                self._condition.wait_for(lambda: job.done, timeout)
+            return job
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, outcome counters and wait/run time percentiles"""
+        with self._condition:
+            counters = {
+                'queued': self._queued,
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'max_queued': self.max_queued,
+                'submitted': self._submitted,
+                'succeeded': self._succeeded,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'expired': self._expired,
+                'retained': len(self._jobs)
+            }
+        for label, tracker in (('wait', self._wait_times), ('run', self._run_times)):
+            for pct in (50, 95):
+                seconds = tracker.percentile(pct)
+                counters[f"{label}_p{pct}_ms"] = None if seconds is None else round(seconds * 1000, 1)
+        return counters
+
+    def _run(self, job: Job, func: Callable[[Job], Any]) -> None:
+        with self._condition:
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._queued -= 1
+            self._running += 1
+        self._wait_times.record(job.started_at - job.created_at)
+
+        try:
+            result, error, status = func(job), None, SUCCEEDED
+        except Exception as e:
+            print(f"❌ {job.kind} job {job.id} failed: {str(e)}")
+            result, error, status = None, str(e), FAILED
+
+        with self._condition:
+            job.result, job.error, job.status = result, error, status
+            job.finished_at = time.time()
+            self._running -= 1
+            if status == SUCCEEDED:
+                self._succeeded += 1
+            else:
+                self._failed += 1
+            self._condition.notify_all()
+        self._run_times.record(job.finished_at - job.started_at)
+
+    def _expire(self) -> None:
+        """Forget finished jobs older than the TTL; caller holds the lock"""
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+            self._expired += 1
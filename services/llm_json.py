@@ -0,0 +1,343 @@
+import re
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Where an open string may end or escape, per quote character
+_STRING_STOP = {'"': re.compile(r'[\\"]'), "'": re.compile(r"[\\']")}
+# Bare tokens: numbers, literals and unquoted keys
+_WORD_RUN = re.compile(r'[^\s,:{}\[\]"\']+')
+_WHITESPACE = re.compile(r'\s+')
+# Valid escapes are matched whole so the backslash of an escaped backslash isn't taken for a lone one
+_ESCAPE = re.compile(r'(\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})|\\')
+_UNESCAPED_DOUBLE_QUOTE = re.compile(r'(?<!\\)"')
+_CONTROL_CHARACTER = re.compile(r'[\x00-\x1f]')
+_NUMBER = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+_LITERALS = {
+    'true': True, 'false': False, 'null': None,
+    # Python spellings some models slip into
+    'True': True, 'False': False, 'None': None
+}
+
+
+@dataclass
+class ParsedJSON:
+    """Outcome of a tolerant parse"""
+    value: Any
+    complete: bool
+    repairs: List[str] = field(default_factory=list)
+    dropped: int = 0
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the reply stopped before its root value was closed"""
+        return self.value is not None and not self.complete
+
+
+class TolerantJSONParser:
+    """
+    Single-pass, incremental JSON reader for LLM replies.
+
+    Text before the first root bracket (prose, markdown fences) and after
+    the root value closes is skipped. Inside the value it accepts trailing
+    or missing commas, single-quoted strings, unquoted keys, Python
+    literals, raw control characters and unknown escapes in strings, and
+    mismatched closing brackets. If the text ends early, every open
+    container is closed: objects keep their finished members and arrays
+    keep their finished elements, while a half-written element of an array
+    is dropped, so a truncated reply still yields its complete days.
+
+    Text can be fed in chunks as it streams; each character is scanned once.
+    """
+
+    def __init__(self, roots: str = '{'):
+        self.roots = roots
+        self._stack: List[list] = []  # [container, pending key] frames
+        self._mode = 'seek'
+        self._quote = '"'
+        self._raw: List[str] = []
+        self._escape = False
+        self._comma = False
+        self._value: Any = None
+        self._complete = False
+        self._repairs: Dict[str, None] = {}
+        self._dropped = 0
+
+    def feed(self, chunk: str) -> None:
+        """Consume the next piece of the reply"""
+        i, n = 0, len(chunk)
+        while i < n:
+            mode = self._mode
+            if mode == 'done':
+                return
+            if mode == 'seek':
+                starts = [pos for pos in (chunk.find(root, i) for root in self.roots) if pos != -1]
+                if not starts:
+                    return
+                i = min(starts)
+                self._open(chunk[i])
+                self._mode = 'value'
+                i += 1
+            elif mode == 'string':
+                i = self._scan_string(chunk, i)
+            elif mode == 'word':
+                match = _WORD_RUN.match(chunk, i)
+                if match:
+                    self._raw.append(match.group())
+                    i = match.end()
+                if i < n:
+                    self._finish_word()
+            else:
+                i = self._scan_value(chunk, i)
+
+    def close(self) -> ParsedJSON:
+        """Finish the parse, closing whatever the reply left open"""
+        if self._mode != 'done':
+            if self._mode in ('string', 'word'):
+                # A scalar cut off mid-way may be wrong (e.g. half a number), so drop it
+                self._raw = []
+                self._discard_pending()
+            while self._stack:
+                container, key = self._stack.pop()
+                if isinstance(container, dict) and key is not None:
+                    self._repair('missing_value')
+                if self._stack and isinstance(self._stack[-1][0], list):
+                    self._dropped += 1
+                    continue
+                self._emit(container)
+            self._mode = 'done'
+        return ParsedJSON(self._value, self._complete, list(self._repairs), self._dropped)
+
+    def _scan_value(self, text: str, i: int) -> int:
+        """Structural characters between tokens; returns where a token starts"""
+        n = len(text)
+        while i < n:
+            char = text[i]
+            if char in ' \t\r\n':
+                i = _WHITESPACE.match(text, i).end()
+                continue
+            if char == '{' or char == '[':
+                self._open(char)
+            elif char == '}' or char == ']':
+                self._close(char)
+                if self._mode == 'done':
+                    return n
+            elif char == ',':
+                if self._comma:
+                    self._repair('extra_comma')
+                self._comma = True
+            elif char == ':':
+                pass
+            elif char == '"' or char == "'":
+                if char == "'":
+                    self._repair('single_quotes')
+                self._separate()
+                self._quote = char
+                self._mode = 'string'
+                return i + 1
+            else:
+                self._separate()
+                self._mode = 'word'
+                return i
+            i += 1
+        return i
+
+    def _scan_string(self, text: str, i: int) -> int:
+        """Collect raw string content up to the closing quote"""
+        n = len(text)
+        pattern = _STRING_STOP[self._quote]
+        while True:
+            if self._escape:
+                if i >= n:
+                    return n
+                self._raw.append(text[i])
+                self._escape = False
+                i += 1
+            match = pattern.search(text, i)
+            if match is None:
+                self._raw.append(text[i:])
+                return n
+            j = match.start()
+            self._raw.append(text[i:j])
+            if text[j] == '\\':
+                self._raw.append('\\')
+                self._escape = True
+                i = j + 1
+            else:
+                self._mode = 'value'
+                self._emit(self._decode_string(''.join(self._raw)))
+                self._raw = []
+                return j + 1
+
+    def _decode_string(self, raw: str) -> str:
+        # Most strings have nothing to unescape
+        if '\\' not in raw and not _CONTROL_CHARACTER.search(raw):
+            return raw
+        if self._quote == "'":
+            raw = _UNESCAPED_DOUBLE_QUOTE.sub(r'\"', raw.replace("\\'", "'"))
+        try:
+            return json.loads(f'"{raw}"')
+        except ValueError:
+            pass
+        try:
+            value = json.loads(f'"{raw}"', strict=False)
+            self._repair('control_characters')
+            return value
+        except ValueError:
+            pass
+        # Drop the backslash of escapes JSON doesn't know, e.g. \' or \x
+        self._repair('invalid_escape')
+        try:
+            return json.loads('"' + _ESCAPE.sub(lambda match: match.group(1) or '', raw) + '"', strict=False)
+        except ValueError:
+            # Still undecodable (e.g. a quote left bare by the escapes around it); keep the text as written
+            return raw
+
+    def _finish_word(self) -> None:
+        word = ''.join(self._raw)
+        self._raw = []
+        self._mode = 'value'
+
+        top = self._stack[-1]
+        if isinstance(top[0], dict) and top[1] is None:
+            self._repair('unquoted_key')
+            top[1] = word
+            return
+
+        if word in _LITERALS:
+            if word[0].isupper():
+                self._repair('python_literal')
+            self._emit(_LITERALS[word])
+        elif _NUMBER.fullmatch(word):
+            self._emit(int(word) if word.lstrip('-').isdigit() else float(word))
+        else:
+            self._repair('bare_word')
+            self._emit(word)
+
+    def _separate(self) -> None:
+        """Note a member or element that follows the previous one without a comma"""
+        if not self._comma and self._stack:
+            container, key = self._stack[-1]
+            if container and key is None:
+                self._repair('missing_comma')
+        self._comma = False
+
+    def _open(self, bracket: str) -> None:
+        self._separate()
+        self._stack.append([{} if bracket == '{' else [], None])
+
+    def _close(self, bracket: str) -> None:
+        want = dict if bracket == '}' else list
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if isinstance(self._stack[depth][0], want):
+                break
+        else:
+            self._repair('stray_bracket')
+            return
+
+        if self._comma:
+            self._repair('trailing_comma')
+            self._comma = False
+        while len(self._stack) > depth + 1:
+            self._repair('unclosed_bracket')
+            self._pop()
+        self._pop()
+
+    def _pop(self) -> None:
+        container, key = self._stack.pop()
+        if isinstance(container, dict) and key is not None:
+            self._repair('missing_value')
+        if not self._stack:
+            self._complete = True
+        self._emit(container)
+
+    def _emit(self, value: Any) -> None:
+        """Attach a finished value to the open container, or finish the root"""
+        if not self._stack:
+            self._value = value
+            self._mode = 'done'
+            return
+        top = self._stack[-1]
+        container = top[0]
+        if isinstance(container, list):
+            container.append(value)
+        elif top[1] is not None:
+            container[top[1]] = value
+            top[1] = None
+        elif isinstance(value, str):
+            top[1] = value
+        else:
+            self._repair('missing_key')
+
+    def _discard_pending(self) -> None:
+        """Forget the key a cut-off value belonged to"""
+        if self._stack and isinstance(self._stack[-1][0], dict):
+            self._stack[-1][1] = None
+
+    def _repair(self, kind: str) -> None:
+        self._repairs[kind] = None
+
+
+_DECODER = json.JSONDecoder()
+
+
+def parse_llm_json(text: str, roots: str = '{') -> ParsedJSON:
+    """
+    Parse the JSON value embedded in a complete LLM reply.
+
+    Well-formed values are decoded by the C decoder straight from the first
+    root bracket, which stops at the end of the value and so ignores any
+    trailing prose; only replies it rejects take the tolerant pass.
+    """
+    starts = [pos for pos in (text.find(root) for root in roots) if pos != -1]
+    if not starts:
+        return ParsedJSON(None, False)
+    try:
+        value, _ = _DECODER.raw_decode(text, min(starts))
+        return ParsedJSON(value, True)
+    except ValueError:
+        pass
+    parser = TolerantJSONParser(roots)
+    parser.feed(text)
+    return parser.close()
+
+
+class ParseStats:
+    """Counts how provider replies were parsed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clean = 0
+        self._repaired = 0
+        self._truncated = 0
+        self._text_fallback = 0
+        self._dropped = 0
+        self._repairs: Dict[str, int] = {}
+
+    def record(self, parsed: Optional[ParsedJSON]) -> None:
+        """Record one reply; ``None`` means it had to be read as plain text"""
+        with self._lock:
+            if parsed is None:
+                self._text_fallback += 1
+                return
+            if parsed.truncated:
+                self._truncated += 1
+            elif parsed.repairs:
+                self._repaired += 1
+            else:
+                self._clean += 1
+            self._dropped += parsed.dropped
+            for kind in parsed.repairs:
+                self._repairs[kind] = self._repairs.get(kind, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'clean': self._clean,
+                'repaired': self._repaired,
+                'truncated': self._truncated,
+                'text_fallback': self._text_fallback,
+                'dropped_partial_elements': self._dropped,
+                'repairs': dict(self._repairs)
+            }
@@ -0,0 +1,247 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Waiting calls are admitted lowest value first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+
+class RateLimited(Exception):
+    """Raised when a provider call would wait longer than its caller can afford"""
+
+    def __init__(self, provider: str, estimated_wait: float):
+        super().__init__(f"{provider} rate limit: estimated wait {estimated_wait:.1f}s")
+        self.provider = provider
+        self.estimated_wait = estimated_wait
+
+
+class TokenBucket:
+    """
+    Refills at ``per_minute`` and holds at most ``burst_seconds`` worth.
+
+    A take needs only ``min(amount, capacity)`` to be available and may
+    leave the bucket in debt, so a call larger than the burst still goes
+    through and later callers wait for it to be paid back.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, per_minute * burst_seconds / 60)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken"""
+        self._refill(now)
+        deficit = min(amount, self.capacity) - self._tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def backlog_wait(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` more than the current balance has been refilled"""
+        self._refill(now)
+        deficit = amount - self._tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        self._tokens -= amount
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class _Lane:
+    """Buckets, waiting calls and counters of one provider; guarded by the limiter lock"""
+
+    def __init__(self, rpm: float, tpm: float, burst_seconds: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm > 0 else None
+        self.waiting: List[Tuple[int, int, int]] = []  # heap of (priority, seq, tokens)
+
+        self.admitted: Dict[int, int] = {}
+        self.rejected = 0
+        self.timed_out = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.tokens_charged = 0
+
+    def wait_for(self, tokens: int, now: float) -> float:
+        """Seconds until a call of ``tokens`` fits both budgets"""
+        return max(
+            self.requests.wait_for(1, now) if self.requests else 0.0,
+            self.tokens.wait_for(tokens, now) if self.tokens else 0.0
+        )
+
+    def take(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        self.tokens_charged += tokens
+
+    def average_tokens(self, default: int) -> int:
+        admitted = sum(self.admitted.values())
+        return self.tokens_charged // admitted if admitted else default
+
+
+class LLMLimiter:
+    """
+    Process-wide admission control for LLM provider calls.
+
+    Each provider has a requests-per-minute and a tokens-per-minute token
+    bucket. A call that doesn't fit waits in a per-provider queue ordered
+    by priority, so interactive requests are admitted before background
+    jobs, first come first served within a priority. A call whose estimated
+    wait exceeds what its caller can afford is refused with ``RateLimited``
+    straight away instead of queueing, so the caller can fall back early.
+
+    Like the job queue, limits apply to this process only; with several
+    instances, configure each with its share of the provider quota.
+    """
+
+    # Charged per call for the estimate before any call has been admitted
+    DEFAULT_CALL_TOKENS = 3000
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], burst_seconds: float = 10.0, max_wait: float = 60.0):
+        self.max_wait = max_wait
+        self._lanes = {provider: _Lane(rpm, tpm, burst_seconds) for provider, (rpm, tpm) in limits.items()}
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_env(cls) -> 'LLMLimiter':
+        """Build a limiter from ``AI_LIMIT_*`` settings; a limit of 0 disables that budget"""
+        return cls(
+            limits={
+                'gemini': (float(os.getenv('AI_LIMIT_GEMINI_RPM', 60)), float(os.getenv('AI_LIMIT_GEMINI_TPM', 120000))),
+                'perplexity': (float(os.getenv('AI_LIMIT_PERPLEXITY_RPM', 50)), float(os.getenv('AI_LIMIT_PERPLEXITY_TPM', 120000)))
+            },
+            burst_seconds=float(os.getenv('AI_LIMIT_BURST_SECONDS', 10)),
+            max_wait=float(os.getenv('AI_LIMIT_MAX_WAIT', 60))
+        )
+
+    def estimate_wait(self, provider: str, tokens: Optional[int] = None, priority: int = INTERACTIVE) -> float:
+        """
+        Seconds a call would wait before being admitted right now.
+
+        Counts the calls already waiting at the same or a higher priority;
+        ``tokens`` defaults to the provider's average call so far.
+        """
+        with self._condition:
+            lane = self._lanes.get(provider)
+            if lane is None:
+                return 0.0
+            if tokens is None:
+                tokens = lane.average_tokens(self.DEFAULT_CALL_TOKENS)
+            return self._estimate(lane, tokens, priority, time.monotonic())
+
+    def acquire(self, provider: str, tokens: int, priority: int = INTERACTIVE, max_wait: Optional[float] = None) -> float:
+        """
+        Wait until a call of ``tokens`` may be sent to ``provider``; returns the seconds waited.
+
+        Raises ``RateLimited`` without waiting when the estimate exceeds
+        ``max_wait`` (default ``self.max_wait``), or once ``max_wait`` has
+        passed in the queue.
+        """
+        max_wait = self.max_wait if max_wait is None else max(0.0, max_wait)
+        started = time.monotonic()
+        with self._condition:
+            lane = self._lanes.get(provider)
+            if lane is None:
+                return 0.0
+
+            estimate = self._estimate(lane, tokens, priority, started)
+            if estimate > max_wait:
+                lane.rejected += 1
+                raise RateLimited(provider, estimate)
+
+            entry = (priority, next(self._sequence), tokens)
+            heapq.heappush(lane.waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    # Only the first in line may take from the buckets
+                    delay = lane.wait_for(tokens, now) if lane.waiting[0] is entry else None
+                    if delay == 0.0:
+                        heapq.heappop(lane.waiting)
+                        lane.take(tokens)
+                        break
+                    remaining = started + max_wait - now
+                    if remaining <= 0:
+                        lane.timed_out += 1
+                        # Leave the queue first so the estimate doesn't count this call twice
+                        lane.waiting.remove(entry)
+                        heapq.heapify(lane.waiting)
+                        raise RateLimited(provider, self._estimate(lane, tokens, priority, now))
+                    self._condition.wait(remaining if delay is None else min(delay, remaining))
+            except BaseException:
+                if entry in lane.waiting:
+                    lane.waiting.remove(entry)
+                    heapq.heapify(lane.waiting)
+                raise
+            finally:
+                # Whoever is first in line now re-checks the buckets
+                self._condition.notify_all()
+
+            waited = time.monotonic() - started
+            lane.admitted[priority] = lane.admitted.get(priority, 0) + 1
+            if waited > 0.001:
+                lane.waited += 1
+                lane.wait_total += waited
+            return waited
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-provider limits, queue length, admissions and current estimated wait"""
+        with self._condition:
+            now = time.monotonic()
+            providers = {}
+            for provider, lane in self._lanes.items():
+                admitted = sum(lane.admitted.values())
+                providers[provider] = {
+                    'rpm': lane.rpm,
+                    'tpm': lane.tpm,
+                    'queued': len(lane.waiting),
+                    'admitted': {PRIORITY_NAMES.get(p, str(p)): count for p, count in sorted(lane.admitted.items())},
+                    'rejected': lane.rejected,
+                    'timed_out': lane.timed_out,
+                    'waited': lane.waited,
+                    'avg_wait_ms': round(lane.wait_total / lane.waited * 1000, 1) if lane.waited else 0.0,
+                    'avg_tokens': lane.tokens_charged // admitted if admitted else None,
+                    'estimated_wait_seconds': round(
+                        self._estimate(lane, lane.average_tokens(self.DEFAULT_CALL_TOKENS), INTERACTIVE, now), 3
+                    )
+                }
+        return {'max_wait_seconds': self.max_wait, 'providers': providers}
+
+    def _estimate(self, lane: _Lane, tokens: int, priority: int, now: float) -> float:
+        """Time for the buckets to cover every call ahead of this one plus this one; caller holds the lock"""
+        ahead = [entry for entry in lane.waiting if entry[0] <= priority]
+        if lane.tokens:
+            # Only the burst-sized part of this call has to be there up front
+            needed = sum(entry[2] for entry in ahead) + min(tokens, lane.tokens.capacity)
+        return max(
+            lane.requests.backlog_wait(len(ahead) + 1, now) if lane.requests else 0.0,
+            lane.tokens.backlog_wait(needed, now) if lane.tokens else 0.0
+        )
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_limiter() -> LLMLimiter:
+    """Return the process-wide limiter so every AI service shares the provider budgets"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_lock:
+            if _shared_limiter is None:
+                _shared_limiter = LLMLimiter.from_env()
+    return _shared_limiter
@@ -0,0 +1,87 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Bounded pool shared by every request pipeline in the process
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PIPELINE_MAX_WORKERS', 8)),
+    thread_name_prefix='pipeline'
+)
+
+
+class Pipeline:
+    """
+    Dependency-aware stage runner.
+
+    Each stage is a callable that receives the results of the stages it
+    depends on as keyword arguments. Stages start as soon as all of their
+    dependencies have finished, so independent stages run concurrently on
+    the shared thread pool while the caller waits for the whole graph. A
+    stage that is the only one able to run, such as the final LLM stage,
+    runs on the caller's thread instead, so slow ones never hold pool
+    workers that other requests' short stages are waiting for.
+    """
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self.executor = executor or _executor
+        self._stages: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable[..., Any], depends_on: Iterable[str] = ()) -> 'Pipeline':
+        """Register a stage; dependencies must already be registered"""
+        depends_on = tuple(depends_on)
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self._stages[name] = (func, depends_on)
+        return self
+
+    def run(self) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Run every stage and return ``(results, timings)``.
+
+        Timings are wall-clock milliseconds per stage plus ``total``. The
+        first stage to raise aborts the run and its exception propagates.
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        pending = dict(self._stages)
+        running = {}
+        started = time.perf_counter()
+
+        while pending or running:
+            ready = [n for n, (_, deps) in pending.items() if all(d in results for d in deps)]
+            if len(ready) == 1 and not running:
+                name = ready[0]
+                func, deps = pending.pop(name)
+                results[name], timings[name] = self._timed(func, {dependency: results[dependency] for dependency in deps})
+                continue
+            for name in ready:
+                func, deps = pending.pop(name)
+                kwargs = {dependency: results[dependency] for dependency in deps}
+                running[self.executor.submit(self._timed, func, kwargs)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], timings[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+        timings['total'] = (time.perf_counter() - started) * 1000
+        return results, timings
+
+    @staticmethod
+    def _timed(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+        """Run a stage and measure how long it took in milliseconds"""
+        started = time.perf_counter()
+        result = func(**kwargs)
+        return result, (time.perf_counter() - started) * 1000
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Render stage timings as a ``Server-Timing`` header value"""
+    return ', '.join(f"{name};dur={duration:.1f}" for name, duration in timings.items())
@@ -0,0 +1,354 @@
+import os
+import re
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.user_profile import UserProfile
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the provider token count of a text.
+
+    Short words and punctuation are roughly one token each; longer words
+    split into about one token per four characters.
+    """
+    count = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        length = match.end() - match.start()
+        count += 1 if length <= 4 else math.ceil(length / 4)
+    return count
+
+
+class PromptTemplate:
+    """``str.format``-style template parsed once and rendered by concatenation"""
+
+    def __init__(self, template: str):
+        self._parts = [(literal, name) for literal, name, _, _ in Formatter().parse(template)]
+
+    def render(self, **values: Any) -> str:
+        out = []
+        for literal, name in self._parts:
+            out.append(literal)
+            if name is not None:
+                out.append(str(values[name]))
+        return ''.join(out)
+
+
+# Identical for every request: sent first so it can be cached by the provider
+STATIC_PREFIX = """You are a professional travel planner creating detailed, personalized itineraries.
+
+REQUIREMENTS:
+1. Create a day-by-day itinerary that considers weather conditions
+2. Match activities to traveler's interests and budget range
+3. Account for health conditions and accessibility needs
+4. Include specific time slots for activities
+5. Recommend meals and dining options
+6. Provide practical tips and travel advice
+7. Include estimated costs in Indian Rupees (INR)
+
+RESPONSE FORMAT:
+Respond with JSON only (no markdown). Put "days" first and finish each day before starting the next:
+{
+  "days": [
+    {
+      "day": 1,
+      "title": "Theme of the day",
+      "activities": ["9:00 AM - Activity and place", "12:30 PM - ..."],
+      "meals": ["Breakfast: ...", "Lunch: ...", "Dinner: ..."],
+      "notes": ["Weather-appropriate advice", "Estimated cost in INR"]
+    }
+  ],
+  "recommendations": {
+    "packing": ["..."],
+    "tips": ["..."]
+  }
+}
+
+Make it personalized, engaging, and practical for the traveler.
+"""
+
+STATIC_PREFIX_TOKENS = estimate_tokens(STATIC_PREFIX)
+
+# Traveler details shared by whole-trip and single-day prompts
+PROFILE_SECTION = """
+TRAVELER PROFILE:
+- Name: {name}
+- Travel Type: {travel_type} ({companions} people total)
+- Interests: {interests}
+- Budget Range: {budget_range}
+- Health Considerations: {health}
+- Accessibility Needs: {accessibility}
+
+WEATHER INFORMATION:
+Current: {temperature}°C, {description}
+"""
+
+TRIP_TEMPLATE = PromptTemplate("""
+Create a detailed {days}-day itinerary for {name} traveling to {destination}.
+""" + PROFILE_SECTION + """7-Day Forecast Available: Plan activities based on weather conditions
+""")
+
+HOTELS_TEMPLATE = PromptTemplate("""
+AVAILABLE HOTELS ({count} options):
+{hotels}
+""")
+
+SECTION_TEMPLATE = PromptTemplate("""
+TRIP SECTION (days {start}-{end} of {days}):
+The other days are planned separately from this same profile. Return exactly {count} day objects numbered {start} to {end}.
+- {opening}
+- {closing}
+{forecast}""")
+
+
+DAY_TEMPLATE = PromptTemplate("""
+Rewrite day {day} of an existing {days}-day itinerary for {name} in {destination}. The other days stay as they are.
+""" + PROFILE_SECTION + """Day {day} forecast: {forecast}
+
+KEEP CONTINUITY WITH THE NEIGHBOURING DAYS:
+{neighbours}
+Do not repeat places or activities already planned on other days.{feedback}
+Return exactly one day object numbered {day} in "days".
+""")
+
+
+class PromptBudgetExceeded(ValueError):
+    """Raised when even the required prompt sections exceed the input token budget"""
+
+
+@dataclass
+class Prompt:
+    """An assembled prompt: the shared static prefix plus the per-request part"""
+    static: str
+    dynamic: str
+    estimated_tokens: int
+    build_ms: float
+    trimmed: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return self.static + self.dynamic
+
+
+class PromptBuilder:
+    """
+    Assembles itinerary prompts from precompiled templates within a token budget.
+
+    Optional sections (the hotel list) are shortened and then dropped when
+    the estimate exceeds ``max_tokens``; if the required sections alone are
+    over budget the build fails rather than sending an oversized request.
+    Estimated and provider-reported input tokens are kept per request.
+    """
+
+    def __init__(self, max_tokens: int = 3000, max_hotels: int = 3, history: int = 100):
+        self.max_tokens = max_tokens
+        self.max_hotels = max_hotels
+
+        self._recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._trimmed = 0
+        self._rejected = 0
+        self._estimated_tokens = 0
+        self._input_tokens = 0
+        self._cached_tokens = 0
+        self._build_ms = 0.0
+
+    @classmethod
+    def from_env(cls) -> 'PromptBuilder':
+        """Build a prompt builder tuned by ``AI_PROMPT_*`` environment variables"""
+        return cls(
+            max_tokens=int(os.getenv('AI_PROMPT_MAX_TOKENS', 3000)),
+            max_hotels=int(os.getenv('AI_PROMPT_MAX_HOTELS', 3))
+        )
+
+    def build(self, profile: UserProfile, weather_data: Dict, hotels: List[Dict],
+              day_range: Optional[Tuple[int, int]] = None) -> Prompt:
+        """Assemble the prompt for a trip, or for one day range of it"""
+        started = time.perf_counter()
+
+        trip = TRIP_TEMPLATE.render(**self._profile_values(profile, weather_data))
+        section = self._render_section(profile, weather_data, day_range) if day_range else ''
+
+        budget = self.max_tokens - STATIC_PREFIX_TOKENS - estimate_tokens(trip) - estimate_tokens(section)
+        if budget < 0:
+            with self._lock:
+                self._rejected += 1
+            raise PromptBudgetExceeded(
+                f"Prompt needs at least {self.max_tokens - budget} tokens, over the {self.max_tokens} token budget"
+            )
+
+        # Fewer hotels, then none, until the optional part fits
+        trimmed = []
+        shown = min(self.max_hotels, len(hotels))
+        hotel_text = ''
+        for count in range(shown, 0, -1):
+            hotel_text = self._render_hotels(hotels[:count])
+            if estimate_tokens(hotel_text) <= budget:
+                if count < shown:
+                    trimmed.append('hotel_count')
+                break
+            hotel_text = ''
+        if shown and not hotel_text:
+            trimmed.append('hotels')
+
+        dynamic = trip + hotel_text + section
+        prompt = Prompt(
+            static=STATIC_PREFIX,
+            dynamic=dynamic,
+            estimated_tokens=STATIC_PREFIX_TOKENS + estimate_tokens(dynamic),
+            build_ms=(time.perf_counter() - started) * 1000,
+            trimmed=trimmed
+        )
+        with self._lock:
+            self._builds += 1
+            self._trimmed += 1 if trimmed else 0
+            self._build_ms += prompt.build_ms
+        return prompt
+
+    def build_day(self, profile: UserProfile, weather_data: Dict, days: List[Dict], number: int,
+                  feedback: Optional[str] = None) -> Prompt:
+        """
+        Assemble the prompt for rewriting one day of an existing itinerary.
+
+        The days either side are summarized as context and the titles of the
+        rest are listed so the new day doesn't repeat them; the titles are
+        dropped first when the prompt is over budget. No hotel list is sent.
+        """
+        started = time.perf_counter()
+
+        forecast = weather_data.get('forecast') or []
+        day_forecast = forecast[min(number, len(forecast)) - 1] if forecast else None
+        values = self._profile_values(profile, weather_data)
+        values.update(
+            day=number,
+            forecast=f"{day_forecast['description']}, {day_forecast['temperature_min']}-{day_forecast['temperature_max']}°C"
+                     if day_forecast else 'not available',
+            feedback=f"\nThe traveler asked for a different plan for this day: {feedback.strip()}" if feedback else ''
+        )
+
+        neighbours = ''.join(
+            self._render_neighbour(other, days[other - 1])
+            for other in (number - 1, number + 1) if 1 <= other <= len(days) and isinstance(days[other - 1], dict)
+        )
+        others = [
+            f"Day {index}: {day.get('title', '')}" for index, day in enumerate(days, start=1)
+            if abs(index - number) > 1 and isinstance(day, dict) and day.get('title')
+        ]
+        titles = f"- Also planned: {'; '.join(others)}\n" if others else ''
+
+        trimmed = []
+        dynamic = DAY_TEMPLATE.render(neighbours=(neighbours + titles) or '- None\n', **values)
+        if titles and STATIC_PREFIX_TOKENS + estimate_tokens(dynamic) > self.max_tokens:
+            trimmed.append('other_days')
+            dynamic = DAY_TEMPLATE.render(neighbours=neighbours or '- None\n', **values)
+        estimated = STATIC_PREFIX_TOKENS + estimate_tokens(dynamic)
+        if estimated > self.max_tokens:
+            with self._lock:
+                self._rejected += 1
+            raise PromptBudgetExceeded(
+                f"Prompt needs at least {estimated} tokens, over the {self.max_tokens} token budget"
+            )
+
+        prompt = Prompt(
+            static=STATIC_PREFIX,
+            dynamic=dynamic,
+            estimated_tokens=estimated,
+            build_ms=(time.perf_counter() - started) * 1000,
+            trimmed=trimmed
+        )
+        with self._lock:
+            self._builds += 1
+            self._trimmed += 1 if trimmed else 0
+            self._build_ms += prompt.build_ms
+        return prompt
+
+    def record_usage(self, prompt: Prompt, provider: str, input_tokens: Optional[int] = None,
+                     cached_tokens: Optional[int] = None) -> None:
+        """Record one provider call with its estimated and reported input tokens"""
+        entry = {
+            'provider': provider,
+            'estimated_tokens': prompt.estimated_tokens,
+            'input_tokens': input_tokens,
+            'cached_tokens': cached_tokens,
+            'build_ms': round(prompt.build_ms, 3),
+            'trimmed': prompt.trimmed
+        }
+        with self._lock:
+            self._recent.append(entry)
+            self._estimated_tokens += prompt.estimated_tokens
+            self._input_tokens += input_tokens or 0
+            self._cached_tokens += cached_tokens or 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return build counters, token totals and the most recent requests"""
+        with self._lock:
+            return {
+                'builds': self._builds,
+                'trimmed': self._trimmed,
+                'rejected': self._rejected,
+                'max_tokens': self.max_tokens,
+                'static_prefix_tokens': STATIC_PREFIX_TOKENS,
+                'avg_build_ms': round(self._build_ms / self._builds, 3) if self._builds else 0.0,
+                'estimated_tokens': self._estimated_tokens,
+                'input_tokens': self._input_tokens,
+                'cached_tokens': self._cached_tokens,
+                'recent': list(self._recent)[-20:]
+            }
+
+    def _profile_values(self, profile: UserProfile, weather_data: Dict) -> Dict[str, Any]:
+        """Template values describing the traveler and current weather"""
+        accessibility = profile.get_accessibility_needs()
+        current = weather_data['current']
+        return {
+            'days': profile.days,
+            'name': profile.name,
+            'destination': profile.destination,
+            'travel_type': profile.travel_type,
+            'companions': profile.companions,
+            'interests': ', '.join(profile.interests),
+            'budget_range': profile.budget_range,
+            'health': ', '.join(profile.health_conditions) if profile.health_conditions else 'None',
+            'accessibility': ', '.join(accessibility) if accessibility else 'None',
+            'temperature': current['temperature'],
+            'description': current['description']
+        }
+
+    def _render_neighbour(self, number: int, day: Dict) -> str:
+        """One-line summary of an adjacent day: title plus its activities without times"""
+        activities = [str(activity).split(' - ', 1)[-1] for activity in (day.get('activities') or [])[:5]]
+        return f"- Day {number}: {day.get('title', '')}. {'; '.join(activities)}\n"
+
+    def _render_hotels(self, hotels: List[Dict]) -> str:
+        lines = [
+            f"- {hotel['name']}: ${hotel['price_per_night']}/night, Rating: {hotel['rating']}, {hotel['location']}"
+            for hotel in hotels
+        ]
+        return HOTELS_TEMPLATE.render(count=len(hotels), hotels='\n'.join(lines))
+
+    def _render_section(self, profile: UserProfile, weather_data: Dict, day_range: Tuple[int, int]) -> str:
+        """Scope a prompt to one section of a long trip while keeping it continuous with the rest"""
+        start, end = day_range
+        forecast = weather_data.get('forecast', [])
+        lines = [
+            f"- Day {number} forecast: {day['description']}, {day['temperature_min']}-{day['temperature_max']}°C\n"
+            for number, day in ((n, forecast[n - 1]) for n in range(start, min(end, len(forecast)) + 1))
+        ]
+        return SECTION_TEMPLATE.render(
+            start=start,
+            end=end,
+            days=profile.days,
+            count=end - start + 1,
+            opening="Day 1 is the arrival day" if start == 1 else
+                    f"Continue from day {start - 1}: no arrival day, and explore areas a first-time visitor would not cover in the first {start - 1} days",
+            closing=f"Day {profile.days} is the departure day" if end == profile.days else "Do not plan a departure in this section",
+            forecast=''.join(lines)
+        )
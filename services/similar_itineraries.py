@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from models.user_profile import UserProfile
+from services.gazetteer import normalize_name
+from services.itinerary_cache import substitute_name, weather_summary
+
+# Universal hashing modulus; signatures keep the low 32 bits
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Interests that mean the same kind of day share a category feature, so
+# ['museums', 'food'] and ['museums', 'restaurants'] still overlap
+INTEREST_CATEGORIES = {
+    'museums': 'heritage', 'museum': 'heritage', 'galleries': 'heritage', 'art': 'heritage',
+    'history': 'heritage', 'culture': 'heritage', 'temples': 'heritage',
+    'restaurants': 'dining', 'restaurant': 'dining', 'food': 'dining', 'dining': 'dining',
+    'cuisine': 'dining', 'street food': 'dining',
+    'parks': 'nature', 'nature': 'nature', 'gardens': 'nature', 'wildlife': 'nature',
+    'beaches': 'coast', 'beach': 'coast',
+    'adventure': 'outdoors', 'hiking': 'outdoors', 'trekking': 'outdoors', 'sports': 'outdoors',
+    'shopping': 'shopping', 'markets': 'shopping',
+    'nightlife': 'nightlife', 'bars': 'nightlife', 'clubs': 'nightlife'
+}
+
+
+def profile_features(profile: UserProfile, weather_data: Dict) -> FrozenSet[str]:
+    """Feature set compared by Jaccard similarity; the destination is matched exactly instead"""
+    features = {
+        f"travel_type:{profile.travel_type.strip().lower()}",
+        f"budget:{profile.budget_range.strip().lower()}"
+    }
+    for interest in profile.interests:
+        interest = normalize_name(interest)
+        features.add(f"interest:{interest}")
+        features.add(f"category:{INTEREST_CATEGORIES.get(interest, interest)}")
+    summary = weather_summary(weather_data)
+    features.add(f"temperature:{summary['current']}")
+    features.add(f"rain_days:{summary['rain_days']}")
+    return frozenset(features)
+
+
+def partition_key(profile: UserProfile) -> str:
+    """Requests only ever reuse itineraries for the same destination and accessibility needs"""
+    needs = ','.join(sorted(profile.get_accessibility_needs()))
+    return f"{normalize_name(profile.destination)}|{needs}"
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class MinHasher:
+    """MinHash signatures from a fixed family of universal hash functions"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, features: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+            for feature in features
+        ]
+        return tuple(
+            min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes) if hashes else MAX_HASH
+            for a, b in self._params
+        )
+
+
+@dataclass
+class SimilarMatch:
+    """A stored itinerary close enough to a request to be adapted for it"""
+    itinerary: Dict[str, Any]
+    similarity: float
+    source_days: int
+
+
+class SimilarItineraryIndex:
+    """
+    Approximate-match store of generated itineraries.
+
+    Profiles are reduced to a feature set (travel type, budget, interests
+    and their categories, coarse weather) and indexed by MinHash
+    signature in ``bands`` LSH bands, partitioned by destination and
+    accessibility needs. A lookup gathers the profiles sharing at least
+    one band, checks their exact Jaccard similarity and returns the best
+    one at or above ``threshold``. Only ``reuse_rate`` of those matches
+    are served, so the rest still reach the LLM and keep the pool fresh.
+    """
+
+    # Names this short would match ordinary words when personalizing a hit
+    MIN_NAME_LENGTH = 3
+
+    def __init__(self, threshold: float = 0.7, reuse_rate: float = 1.0, num_perm: int = 64, bands: int = 16,
+                 ttl: float = 24 * 3600, max_entries: int = 2000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.reuse_rate = reuse_rate
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm)
+
+        self._entries: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+        self._lookups = 0
+        self._candidates = 0
+        self._matches = 0
+        self._reused = 0
+        self._skipped = 0
+        self._stores = 0
+        self._similarity_total = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional['SimilarItineraryIndex']:
+        """Build an index from ``ITINERARY_SIMILARITY_*`` settings, or None when reuse is off"""
+        if os.getenv('ITINERARY_SIMILARITY', '').lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        return cls(
+            threshold=float(os.getenv('ITINERARY_SIMILARITY_THRESHOLD', 0.7)),
+            reuse_rate=float(os.getenv('ITINERARY_SIMILARITY_REUSE_RATE', 1.0)),
+            ttl=float(os.getenv('ITINERARY_SIMILARITY_TTL', 24 * 3600)),
+            max_entries=int(os.getenv('ITINERARY_SIMILARITY_MAX_ENTRIES', 2000))
+        )
+
+    def add(self, profile: UserProfile, weather_data: Dict, itinerary: Dict[str, Any]) -> bool:
+        """Index a generated itinerary; returns False if it cannot be personalized for others"""
+        if len(profile.name.strip()) < self.MIN_NAME_LENGTH or not itinerary.get('days'):
+            return False
+
+        features = profile_features(profile, weather_data)
+        partition = partition_key(profile)
+        keys = self._band_keys(partition, self.hasher.signature(features))
+        record = {
+            'stored_at': time.time(),
+            'destination': normalize_name(profile.destination),
+            'features': features,
+            'keys': keys,
+            'traveler': profile.name,
+            # Copied so later edits by the caller don't leak into the index
+            'itinerary': json.loads(json.dumps(itinerary))
+        }
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = record
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            self._stores += 1
+        return True
+
+    def find(self, profile: UserProfile, weather_data: Dict) -> Optional[SimilarMatch]:
+        """Return the most similar stored itinerary, personalized for the profile, or None"""
+        features = profile_features(profile, weather_data)
+        keys = self._band_keys(partition_key(profile), self.hasher.signature(features))
+        now = time.time()
+
+        with self._lock:
+            self._lookups += 1
+            candidates = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            self._candidates += len(candidates)
+
+            best, best_similarity = None, -1.0
+            for entry_id in candidates:
+                record = self._entries[entry_id]
+                if now - record['stored_at'] >= self.ttl:
+                    self._drop(entry_id)
+                    continue
+                similarity = jaccard(features, record['features'])
+                # Ties go to the itinerary needing the least trimming or extending
+                closer = best is not None and similarity == best_similarity and \
+                    abs(len(record['itinerary']['days']) - profile.days) < abs(len(best['itinerary']['days']) - profile.days)
+                if similarity > best_similarity or closer:
+                    best, best_similarity = record, similarity
+
+            if best is None or best_similarity < self.threshold:
+                return None
+            self._matches += 1
+            if self._random.random() >= self.reuse_rate:
+                self._skipped += 1
+                return None
+            self._reused += 1
+            self._similarity_total += best_similarity
+
+        itinerary = best['itinerary']
+        if best['traveler'] != profile.name:
+            pattern = re.compile(rf"\b{re.escape(best['traveler'])}\b")
+            itinerary = substitute_name(itinerary, pattern, profile.name)
+        else:
+            itinerary = json.loads(json.dumps(itinerary))
+        return SimilarMatch(itinerary, round(best_similarity, 3), len(itinerary['days']))
+
+    def invalidate(self, destination: Optional[str] = None) -> int:
+        """Drop indexed itineraries for one destination, or all when omitted"""
+        key = normalize_name(destination) if destination else None
+        with self._lock:
+            stale = [entry_id for entry_id, record in self._entries.items() if key is None or record['destination'] == key]
+            for entry_id in stale:
+                self._drop(entry_id)
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return lookup, match and reuse counters"""
+        with self._lock:
+            return {
+                'enabled': True,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'reuse_rate_setting': self.reuse_rate,
+                'lookups': self._lookups,
+                'avg_candidates': round(self._candidates / self._lookups, 2) if self._lookups else 0.0,
+                'matches': self._matches,
+                'reused': self._reused,
+                'skipped': self._skipped,
+                'reuse_rate': round(self._reused / self._lookups, 3) if self._lookups else 0.0,
+                'avg_similarity': round(self._similarity_total / self._reused, 3) if self._reused else None,
+                'stores': self._stores
+            }
+
+    def _band_keys(self, partition: str, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [
+            (partition, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def _drop(self, entry_id: int) -> None:
+        """Remove an entry and its bucket memberships; caller holds the lock"""
+        record = self._entries.pop(entry_id)
+        for key in record['keys']:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
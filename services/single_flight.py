@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still in flight wait on the same future and receive the shared result,
+    or the same exception. Once the call finishes the key is released so the
+    next caller starts a fresh execution.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._executions = 0
+        self._coalesced = 0
+        self._max_waiters = 0
+        self._waiters: Dict[Hashable, int] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``func`` for ``key`` unless an identical call is already in flight.
+
+        A caller joining an in-flight call waits at most ``timeout`` seconds
+        for it and then raises ``TimeoutError``; the call itself carries on.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+                self._waiters[key] = 0
+                self._executions += 1
+                leader = True
+            else:
+                self._coalesced += 1
+                self._waiters[key] += 1
+                self._max_waiters = max(self._max_waiters, self._waiters[key])
+                leader = False
+
+        if not leader:
+            try:
+                return future.result(timeout)
+            except FutureTimeoutError as e:
+                # Only an alias of the builtin from Python 3.11 on
+                raise TimeoutError(f"Gave up waiting on in-flight call for {key!r}") from e
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                self._waiters.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return execution and coalesced-waiter counters"""
+        with self._lock:
+            return {
+                'executions': self._executions,
+                'coalesced': self._coalesced,
+                'max_waiters': self._max_waiters,
+                'in_flight': len(self._calls)
+            }
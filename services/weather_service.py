@@ -1,7 +1,20 @@
 import requests
 import os
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+from datetime import date, datetime, timedelta
+from models.hourly_forecast import HourlyForecast
+from models.weather_codes import WEATHER_DESCRIPTIONS, WEATHER_ICONS, RAIN, DRIZZLE, SNOW, CLEAR, description_flags
+from services.forecast_cache import ForecastCache
+from services.gazetteer import get_gazetteer, normalize_name
+from services.http_client import get_http_client
+from services.single_flight import SingleFlight
+from services.deadline import Deadline, DeadlineExceeded
+
+
+class PlaceNotFound(Exception):
+    """Raised when a city is in neither the gazetteer nor the geocoding results"""
+
 
 class WeatherService:
     """Service for handling weather-related operations"""
@@ -10,38 +23,177 @@ class WeatherService:
         # Using Open-Meteo - completely free, no API key required
         self.base_url = "https://api.open-meteo.com/v1"
         self.geocoding_url = "https://geocoding-api.open-meteo.com/v1"
-    def get_weather(self, city: str) -> Dict[str, Any]:
+        # Shared keep-alive connection pools for all outbound calls
+        self.http = get_http_client()
+        # Forecasts are shared between nearby destinations for a short while
+        self.forecast_cache = ForecastCache.from_env()
+        # Bundled city index; misses fall through to the geocoding API
+        self.gazetteer = get_gazetteer()
+        # Identical concurrent lookups wait on one upstream call
+        self.in_flight = SingleFlight()
+        # Locations per multi-coordinate forecast request and concurrent geocoders per batch
+        self.batch_chunk_size = int(os.getenv('WEATHER_BATCH_CHUNK_SIZE', 50))
+        self.batch_geocode_workers = int(os.getenv('WEATHER_BATCH_GEOCODE_WORKERS', 8))
+    
+    def get_weather(self, city: str, coordinates: tuple = None, deadline: Deadline = None) -> Dict[str, Any]:
         """
         Get current weather and 7-day forecast for a city using Open-Meteo API (completely free)
+        
+        Pass ``coordinates`` from ``locate`` when the city has already been resolved.
+        Concurrent lookups for the same city share a single upstream fetch. With a
+        ``deadline``, upstream calls only get the time left and estimated weather is
+        returned once it runs out.
         """
+        key = ('weather', normalize_name(city))
+        while True:
+            try:
+                return self.in_flight.do(
+                    key,
+                    lambda: self._fetch_weather(city, coordinates, deadline),
+                    timeout=deadline.remaining() if deadline else None
+                )
+            except TimeoutError:
+                # Estimates are only for callers whose own deadline ran out; a fetch
+                # cut short by the deadline of the request we joined is started again
+                if deadline is not None and deadline.expired:
+                    return self._get_fallback_weather(city)
+    
+    def _fetch_weather(self, city: str, coordinates: tuple = None, deadline: Deadline = None) -> Dict[str, Any]:
+        """Resolve a city and build its weather payload; raises ``DeadlineExceeded`` once the deadline runs out"""
         try:
             # First, get coordinates for the city
-            coordinates = self._get_coordinates(city)
+            if coordinates is None:
+                coordinates = self._get_coordinates(city, deadline)
             lat, lon, city_name = coordinates
             
-            # Get weather data from Open-Meteo
-            weather_data = self._get_weather_data(lat, lon)
-            
-            # Get current weather
-            current_weather = self._parse_current_weather(weather_data, city_name)
+            # Get weather data from Open-Meteo (served from cache when possible);
+            # a background refresh of a stale entry is not bound to this request's deadline
+            found, weather_data = self.forecast_cache.lookup(lat, lon, lambda: self._fetch_forecast(lat, lon))
+            if not found:
+                weather_data = self._fetch_forecast(lat, lon, deadline)
+                self.forecast_cache.put(lat, lon, weather_data)
             
-            # Get forecast
-            forecast = self._parse_forecast(weather_data)
-            
-            return {
-                'current': current_weather,
-                'forecast': forecast,
-                'travel_recommendations': self._get_travel_recommendations(current_weather, forecast)
-            }
+            return self._build_weather(weather_data, city_name)
             
+        except DeadlineExceeded:
+            raise
         except requests.RequestException as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"No time left to fetch weather for {city}") from e
             raise Exception(f"Failed to fetch weather data: {str(e)}")
         except Exception as e:
             # Fallback to mock data if API fails
             return self._get_fallback_weather(city)
     
-    def _get_coordinates(self, city: str) -> tuple:
-        """Get coordinates for a city using Open-Meteo geocoding"""
+    def get_weather_batch(self, cities: List[str]) -> Dict[str, Any]:
+        """
+        Get weather for many cities with as few upstream calls as possible
+        
+        Cities are geocoded in one concurrent pass, cached forecasts are reused,
+        and the remaining coordinates are fetched with Open-Meteo's
+        comma-separated multi-location form.
+        """
+        unique_cities = list(dict.fromkeys(cities))
+        locations = self._locate_many(unique_cities)
+        
+        # Group cities by forecast cache key so nearby places share one fetch
+        forecasts = {}
+        missing = {}
+        for city in unique_cities:
+            lat, lon, _ = locations[city]
+            key = self.forecast_cache.key_for(lat, lon)
+            if key in forecasts or key in missing:
+                continue
+            cached = self.forecast_cache.get(lat, lon)
+            if cached is not None:
+                forecasts[key] = cached
+            else:
+                missing[key] = (lat, lon)
+        
+        errors = {}
+        upstream_requests = 0
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_chunk_size):
+            chunk = pending[start:start + self.batch_chunk_size]
+            upstream_requests += 1
+            try:
+                responses = self._get_weather_data_batch([coords for _, coords in chunk])
+            except requests.RequestException as e:
+                for key, _ in chunk:
+                    errors[key] = f"Failed to fetch weather data: {str(e)}"
+                continue
+            for (key, (lat, lon)), weather_data in zip(chunk, responses):
+                self.forecast_cache.put(lat, lon, weather_data)
+                forecasts[key] = weather_data
+        
+        results = []
+        for city in cities:
+            lat, lon, city_name = locations[city]
+            key = self.forecast_cache.key_for(lat, lon)
+            if key in forecasts:
+                results.append({'destination': city, 'weather': self._build_weather(forecasts[key], city_name)})
+            else:
+                results.append({'destination': city, 'error': errors.get(key, 'Weather data unavailable')})
+        
+        return {
+            'results': results,
+            'upstream_requests': upstream_requests
+        }
+    
+    def get_hourly(self, city: str, day: date = None, start_hour: int = 0, end_hour: int = 23) -> Dict[str, Any]:
+        """
+        Get hourly weather for one day of the forecast window
+        
+        Hourly data is only fetched when asked for; it is cached separately
+        from the daily forecast as compact array-backed columns.
+        """
+        try:
+            lat, lon, city_name = self._get_coordinates(city)
+            series = self.forecast_cache.get_or_fetch(
+                lat, lon, lambda: self._fetch_hourly(lat, lon), namespace='hourly'
+            )
+        except requests.RequestException as e:
+            raise Exception(f"Failed to fetch hourly weather data: {str(e)}")
+        
+        hours = series.window(day, start_hour, end_hour)
+        for hour in hours:
+            code = hour['weather_code']
+            hour['description'] = self._get_weather_description(code) if code is not None else 'Unknown'
+            hour['icon'] = self._get_weather_icon(code) if code is not None else '01d'
+        
+        return {
+            'city': city_name,
+            'timezone': series.timezone,
+            'date': (day or series.start.date()).isoformat(),
+            'hours': hours
+        }
+    
+    def locate(self, city: str, deadline: Deadline = None, fallback: bool = True) -> tuple:
+        """
+        Resolve a city to ``(latitude, longitude, name)``, or None if the deadline ran out first
+
+        Unknown cities resolve to London unless ``fallback`` is off, in which case
+        they raise ``PlaceNotFound`` and geocoding errors are raised as they are.
+        """
+        try:
+            return self._get_coordinates(city, deadline, fallback)
+        except DeadlineExceeded:
+            return None
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get forecast cache counters"""
+        return self.forecast_cache.stats()
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Get counters for lookups that shared an in-flight fetch"""
+        return self.in_flight.stats()
+    
+    def _get_coordinates(self, city: str, deadline: Deadline = None, fallback: bool = True) -> tuple:
+        """Get coordinates for a city, preferring the local gazetteer over Open-Meteo geocoding"""
+        place = self.gazetteer.lookup(city)
+        if place:
+            return (place['latitude'], place['longitude'], place['name'])
+        
         try:
             url = f"{self.geocoding_url}/search"
             params = {
@@ -51,41 +203,147 @@ class WeatherService:
                 'format': 'json'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10, deadline=deadline)
             response.raise_for_status()
             
             data = response.json()
             
             if data.get('results') and len(data['results']) > 0:
                 result = data['results'][0]
+                self.gazetteer.remember(
+                    city,
+                    result['latitude'],
+                    result['longitude'],
+                    result['name'],
+                    result.get('country', '')
+                )
                 return (
                     result['latitude'], 
                     result['longitude'], 
                     result['name']
                 )
             else:
+                if not fallback:
+                    raise PlaceNotFound(f"Could not find {city}")
                 # Return default coordinates for London if city not found
                 return (51.5074, -0.1278, city)
                 
+        except (DeadlineExceeded, PlaceNotFound):
+            raise
         except Exception as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"No time left to geocode {city}") from e
+            if not fallback:
+                raise
             print(f"Geocoding error: {e}")
             # Return default coordinates for London if geocoding fails
             return (51.5074, -0.1278, city)
     
-    def _get_weather_data(self, lat: float, lon: float) -> Dict:
-        """Get weather data from Open-Meteo"""
+    def _fetch_forecast(self, lat: float, lon: float, deadline: Deadline = None) -> Dict:
+        """
+        Fetch a forecast, sharing the request with concurrent callers for the same grid cell
+
+        Waiting on another caller's fetch stops at our deadline, and a fetch that
+        caller's deadline cut short is started again while we still have time.
+        """
+        key = self.forecast_cache.key_for(lat, lon)
+        while True:
+            try:
+                return self.in_flight.do(
+                    key,
+                    lambda: self._get_weather_data_within(lat, lon, deadline),
+                    timeout=deadline.remaining() if deadline else None
+                )
+            except TimeoutError as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded(f"No time left to fetch the forecast for {lat}, {lon}") from e
+    
+    def _get_weather_data_within(self, lat: float, lon: float, deadline: Deadline = None) -> Dict:
+        """Get weather data, reporting a failure caused by the deadline as ``DeadlineExceeded``"""
+        try:
+            return self._get_weather_data(lat, lon, deadline)
+        except requests.RequestException as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"No time left to fetch the forecast for {lat}, {lon}") from e
+            raise
+    
+    def _fetch_hourly(self, lat: float, lon: float) -> HourlyForecast:
+        """Fetch and compact the hourly forecast, sharing the request with concurrent callers"""
+        return self.in_flight.do(
+            self.forecast_cache.key_for(lat, lon, namespace='hourly'),
+            lambda: HourlyForecast.from_open_meteo(self._get_hourly_data(lat, lon))
+        )
+    
+    def _get_hourly_data(self, lat: float, lon: float) -> Dict:
+        """Get hourly weather data from Open-Meteo"""
         url = f"{self.base_url}/forecast"
         params = {
             'latitude': lat,
             'longitude': lon,
             'hourly': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
+            'timezone': 'auto',
+            'forecast_days': 7
+        }
+        
+        response = self.http.get(url, params=params, timeout=15)
+        response.raise_for_status()
+        
+        return response.json()
+    
+    def _locate_many(self, cities: List[str]) -> Dict[str, tuple]:
+        """Resolve cities locally where possible and geocode the rest concurrently"""
+        locations = {}
+        remote = []
+        for city in cities:
+            place = self.gazetteer.lookup(city)
+            if place:
+                locations[city] = (place['latitude'], place['longitude'], place['name'])
+            else:
+                remote.append(city)
+        
+        if remote:
+            with ThreadPoolExecutor(max_workers=min(len(remote), self.batch_geocode_workers)) as executor:
+                for city, coordinates in zip(remote, executor.map(self._get_coordinates, remote)):
+                    locations[city] = coordinates
+        
+        return locations
+    
+    def _get_weather_data_batch(self, coordinates: List[tuple]) -> List[Dict]:
+        """Get weather data for several locations in one Open-Meteo request"""
+        data = self._get_weather_data(
+            ','.join(str(lat) for lat, _ in coordinates),
+            ','.join(str(lon) for _, lon in coordinates)
+        )
+        # A single location comes back as an object, several as a list
+        return data if isinstance(data, list) else [data]
+    
+    def _build_weather(self, weather_data: Dict, city_name: str) -> Dict[str, Any]:
+        """Build the weather payload from a raw Open-Meteo response"""
+        # Get current weather
+        current_weather = self._parse_current_weather(weather_data, city_name)
+        
+        # Get forecast
+        forecast = self._parse_forecast(weather_data)
+        
+        return {
+            'current': current_weather,
+            'forecast': forecast,
+            'travel_recommendations': self._get_travel_recommendations(current_weather, forecast)
+        }
+    
+    def _get_weather_data(self, lat, lon, deadline: Deadline = None) -> Dict:
+        """Get weather data from Open-Meteo (comma-separated coordinates fetch several locations)"""
+        url = f"{self.base_url}/forecast"
+        params = {
+            'latitude': lat,
+            'longitude': lon,
             'daily': 'weather_code,temperature_2m_max,temperature_2m_min,wind_speed_10m_max',
             'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
             'timezone': 'auto',
             'forecast_days': 7
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = self.http.get(url, params=params, timeout=15, deadline=deadline)
         response.raise_for_status()
         
         return response.json()
@@ -115,82 +373,38 @@ class WeatherService:
         """Parse forecast data from Open-Meteo response"""
         daily = data.get('daily', {})
         dates = daily.get('time', [])
-        max_temps = daily.get('temperature_2m_max', [])
-        min_temps = daily.get('temperature_2m_min', [])
-        weather_codes = daily.get('weather_code', [])
-        wind_speeds = daily.get('wind_speed_10m_max', [])
+        
+        def value(name: str, i: int, default):
+            # Columns may be shorter than ``time`` or hold nulls
+            column = daily.get(name, [])
+            return column[i] if i < len(column) and column[i] is not None else default
         
         forecast = []
         for i in range(min(len(dates), 7)):  # Get up to 7 days
             humidity = 50 + (i * 5)  # Simulate varying humidity
+            code = value('weather_code', i, 0)
+            wind_speed = value('wind_speed_10m_max', i, 5)
             forecast.append({
                 'date': dates[i],
-                'temperature_max': round(max_temps[i] if i < len(max_temps) else 20, 1),
-                'temperature_min': round(min_temps[i] if i < len(min_temps) else 15, 1),
-                'description': self._get_weather_description(weather_codes[i] if i < len(weather_codes) else 0),
-                'icon': self._get_weather_icon(weather_codes[i] if i < len(weather_codes) else 0),
+                'temperature_max': round(value('temperature_2m_max', i, 20), 1),
+                'temperature_min': round(value('temperature_2m_min', i, 15), 1),
+                'description': WEATHER_DESCRIPTIONS.get(code, "Unknown"),
+                'icon': WEATHER_ICONS.get(code, "01d"),
                 'humidity': humidity,
                 'humidity_level': self._get_humidity_level(humidity),
-                'wind_speed': round(wind_speeds[i] if i < len(wind_speeds) else 5, 1),
-                'wind_description': self._get_wind_description(wind_speeds[i] if i < len(wind_speeds) else 5)
+                'wind_speed': round(wind_speed, 1),
+                'wind_description': self._get_wind_description(wind_speed)
             })
         
         return forecast
     
     def _get_weather_description(self, weather_code: int) -> str:
         """Convert Open-Meteo weather code to description"""
-        weather_codes = {
-            0: "Clear sky",
-            1: "Mainly clear",
-            2: "Partly cloudy",
-            3: "Overcast",
-            45: "Fog",
-            48: "Depositing rime fog",
-            51: "Light drizzle",
-            53: "Moderate drizzle",
-            55: "Dense drizzle",
-            56: "Light freezing drizzle",
-            57: "Dense freezing drizzle",
-            61: "Slight rain",
-            63: "Moderate rain",
-            65: "Heavy rain",
-            66: "Light freezing rain",
-            67: "Heavy freezing rain",
-            71: "Slight snow fall",
-            73: "Moderate snow fall",
-            75: "Heavy snow fall",
-            77: "Snow grains",
-            80: "Slight rain showers",
-            81: "Moderate rain showers",
-            82: "Violent rain showers",
-            85: "Slight snow showers",
-            86: "Heavy snow showers",
-            95: "Thunderstorm",
-            96: "Thunderstorm with slight hail",
-            99: "Thunderstorm with heavy hail"
-        }
-        return weather_codes.get(weather_code, "Unknown")
+        return WEATHER_DESCRIPTIONS.get(weather_code, "Unknown")
     
     def _get_weather_icon(self, weather_code: int) -> str:
         """Convert Open-Meteo weather code to icon"""
-        if weather_code == 0:
-            return "01d"  # Clear sky
-        elif weather_code in [1, 2]:
-            return "02d"  # Partly cloudy
-        elif weather_code == 3:
-            return "03d"  # Overcast
-        elif weather_code in [45, 48]:
-            return "50d"  # Fog
-        elif weather_code in [51, 53, 55, 56, 57]:
-            return "09d"  # Drizzle
-        elif weather_code in [61, 63, 65, 66, 67, 80, 81, 82]:
-            return "10d"  # Rain
-        elif weather_code in [71, 73, 75, 77, 85, 86]:
-            return "13d"  # Snow
-        elif weather_code in [95, 96, 99]:
-            return "11d"  # Thunderstorm
-        else:
-            return "01d"  # Default
+        return WEATHER_ICONS.get(weather_code, "01d")
     
     def _get_humidity_level(self, humidity: int) -> str:
         """Get human-readable humidity level"""
@@ -259,7 +473,7 @@ class WeatherService:
         
         # Current weather recommendations
         temp = current['temperature']
-        description = current['description'].lower()
+        current_flags = description_flags(current['description'])
         
         # Clothing recommendations
         if temp < 5:
@@ -272,12 +486,12 @@ class WeatherService:
             recommendations['clothing'].extend(['Light clothing', 'Sun hat', 'Sunscreen'])
         
         # Weather-specific recommendations
-        if 'rain' in description or 'drizzle' in description:
+        if current_flags & (RAIN | DRIZZLE):
             recommendations['clothing'].append('Waterproof jacket')
             recommendations['precautions'].append('Carry umbrella')
             recommendations['activities'].append('Indoor attractions')
         
-        if 'snow' in description:
+        if current_flags & SNOW:
             recommendations['clothing'].extend(['Waterproof boots', 'Warm socks'])
             recommendations['precautions'].append('Check road conditions')
         
@@ -285,8 +499,8 @@ class WeatherService:
             recommendations['precautions'].append('Strong winds expected')
         
         # Activity recommendations based on forecast
-        clear_days = [day for day in forecast if 'clear' in day['description'].lower() or 'sun' in day['description'].lower()]
-        if clear_days:
-            recommendations['best_times'].append(f"Best outdoor activities on {clear_days[0]['date']}")
+        clear_day = next((day for day in forecast if description_flags(day['description']) & CLEAR), None)
+        if clear_day:
+            recommendations['best_times'].append(f"Best outdoor activities on {clear_day['date']}")
         
         return recommendations
@@ -232,25 +232,18 @@ async function generateItinerary() {
         const userResult = await userResponse.json();
         const userId = userResult.user_id;
         
-        // Generate itinerary
-        const itineraryResponse = await fetch('/api/itinerary/generate', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ user_id: userId })
-        });
-        
-        if (!itineraryResponse.ok) {
-            throw new Error('Failed to generate itinerary');
+        // Stream the itinerary day by day, falling back to a single request
+        // if streaming isn't available (e.g. on serverless deployments)
+        let result;
+        try {
+            result = await streamItinerary(userId);
+        } catch (streamError) {
+            console.warn('Streaming unavailable, generating in one request:', streamError);
+            result = await fetchItinerary(userId);
+            displayResults(result);
         }
-        
-        const result = await itineraryResponse.json();
         generatedItinerary = result;
         
-        // Display results
-        displayResults(result);
-        
     } catch (error) {
         console.error('Error generating itinerary:', error);
         showError('Failed to generate itinerary. Please try again.');
@@ -269,6 +262,70 @@ async function generateItinerary() {
     }
 }
 
+function streamItinerary(userId) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/itinerary/stream?user_id=${encodeURIComponent(userId)}`);
+        let context = null;
+        let receivedDays = 0;
+        
+        source.addEventListener('context', e => {
+            context = JSON.parse(e.data);
+            
+            document.getElementById('loadingState').style.display = 'none';
+            document.getElementById('itineraryResult').style.display = 'block';
+            displayWeather(context.weather);
+            displayHotels(context.hotels);
+            document.getElementById('itineraryDetails').innerHTML = `
+                <div class="itinerary-days" id="streamedDays"></div>
+                <p id="dayProgress" style="text-align: center; color: #667eea; padding: 15px;">
+                    <i class="fas fa-spinner fa-spin"></i> Planning day 1...
+                </p>
+            `;
+        });
+        
+        source.addEventListener('day', e => {
+            const day = JSON.parse(e.data);
+            receivedDays++;
+            document.getElementById('streamedDays').insertAdjacentHTML('beforeend', renderDayCard(day));
+            document.getElementById('dayProgress').innerHTML = `<i class="fas fa-spinner fa-spin"></i> Planning day ${receivedDays + 1}...`;
+        });
+        
+        source.addEventListener('complete', e => {
+            source.close();
+            const result = { itinerary: JSON.parse(e.data), weather: context.weather, hotels: context.hotels };
+            displayItinerary(result.itinerary);
+            resolve(result);
+        });
+        
+        source.addEventListener('failure', e => {
+            source.close();
+            reject(new Error(JSON.parse(e.data).error));
+        });
+        
+        source.addEventListener('error', () => {
+            // Connection-level failure; EventSource would otherwise keep reconnecting
+            source.close();
+            reject(new Error('Itinerary stream interrupted'));
+        });
+    });
+}
+
+async function fetchItinerary(userId) {
+    const itineraryResponse = await fetch('/api/itinerary/generate', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ user_id: userId })
+    });
+    
+    if (!itineraryResponse.ok) {
+        throw new Error('Failed to generate itinerary');
+    }
+    
+    return itineraryResponse.json();
+}
+
 // Display functions
 function displayResults(data) {
     // Hide loading state
@@ -478,48 +535,7 @@ function displayItinerary(itinerary) {
     let itineraryHTML = '<div class="itinerary-days">';
     
     itinerary.days.forEach(day => {
-        itineraryHTML += `
-            <div class="day-card">
-                <div class="day-header">
-                    <div>
-                        <div class="day-number">${day.day}</div>
-                    </div>
-                    <div class="day-weather">
-                        ${day.weather ? `${day.weather.description}, ${day.weather.temperature_min}°-${day.weather.temperature_max}°C` : ''}
-                    </div>
-                </div>
-                
-                <h4 style="margin-bottom: 15px; color: #333;">${day.title}</h4>
-                
-                <div class="day-activities">
-                    <h5><i class="fas fa-clock"></i> Activities</h5>
-                    ${day.activities.map(activity => `
-                        <div class="activity-item">
-                            <span class="activity-time">${extractTime(activity)}</span>
-                            <span>${removeTime(activity)}</span>
-                        </div>
-                    `).join('')}
-                </div>
-                
-                ${day.meals && day.meals.length > 0 ? `
-                    <div class="day-activities">
-                        <h5><i class="fas fa-utensils"></i> Meals</h5>
-                        ${day.meals.map(meal => `
-                            <div class="activity-item">
-                                <span>${meal}</span>
-                            </div>
-                        `).join('')}
-                    </div>
-                ` : ''}
-                
-                ${day.notes && day.notes.length > 0 ? `
-                    <div style="margin-top: 15px; padding: 15px; background: #f8f9fa; border-radius: 8px;">
-                        <h6 style="margin-bottom: 10px; color: #667eea;"><i class="fas fa-info-circle"></i> Notes</h6>
-                        ${day.notes.map(note => `<p style="margin-bottom: 5px; font-size: 0.9rem;">${note}</p>`).join('')}
-                    </div>
-                ` : ''}
-            </div>
-        `;
+        itineraryHTML += renderDayCard(day);
     });
     
     itineraryHTML += '</div>';
@@ -573,6 +589,51 @@ function displayItinerary(itinerary) {
     }
 }
 
+function renderDayCard(day) {
+    return `
+        <div class="day-card">
+            <div class="day-header">
+                <div>
+                    <div class="day-number">${day.day}</div>
+                </div>
+                <div class="day-weather">
+                    ${day.weather ? `${day.weather.description}, ${day.weather.temperature_min}°-${day.weather.temperature_max}°C` : ''}
+                </div>
+            </div>
+            
+            <h4 style="margin-bottom: 15px; color: #333;">${day.title}</h4>
+            
+            <div class="day-activities">
+                <h5><i class="fas fa-clock"></i> Activities</h5>
+                ${(day.activities || []).map(activity => `
+                    <div class="activity-item">
+                        <span class="activity-time">${extractTime(activity)}</span>
+                        <span>${removeTime(activity)}</span>
+                    </div>
+                `).join('')}
+            </div>
+            
+            ${day.meals && day.meals.length > 0 ? `
+                <div class="day-activities">
+                    <h5><i class="fas fa-utensils"></i> Meals</h5>
+                    ${day.meals.map(meal => `
+                        <div class="activity-item">
+                            <span>${meal}</span>
+                        </div>
+                    `).join('')}
+                </div>
+            ` : ''}
+            
+            ${day.notes && day.notes.length > 0 ? `
+                <div style="margin-top: 15px; padding: 15px; background: #f8f9fa; border-radius: 8px;">
+                    <h6 style="margin-bottom: 10px; color: #667eea;"><i class="fas fa-info-circle"></i> Notes</h6>
+                    ${day.notes.map(note => `<p style="margin-bottom: 5px; font-size: 0.9rem;">${note}</p>`).join('')}
+                </div>
+            ` : ''}
+        </div>
+    `;
+}
+
 // Utility functions
 function formatDate(dateString) {
     const date = new Date(dateString);
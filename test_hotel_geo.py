@@ -0,0 +1,87 @@
+import os
+import math
+import random
+import tempfile
+
+import pytest
+
+from services.hotel_catalog import HotelCatalog, build_catalog, chord_to_km, unit_vector
+from services.hotel_index import HotelIndex
+
+
+@pytest.fixture(scope='module')
+def index():
+    rng = random.Random(3)
+    hotels = []
+    for i in range(3000):
+        hotel = {
+            'id': i,
+            'name': f'Hotel {i}',
+            'rating': round(rng.uniform(3, 5), 1),
+            'price_per_night': rng.randrange(1500, 20000, 100),
+            'city': f'City {i % 40}',
+            'max_occupancy': rng.randint(1, 6)
+        }
+        # Some hotels have no coordinates; the rest are spread worldwide or clustered in India
+        if i % 7:
+            worldwide = i % 3 == 0
+            hotel['latitude'] = round(rng.uniform(-89.9, 89.9) if worldwide else rng.uniform(8, 33), 4)
+            hotel['longitude'] = round(rng.uniform(-180, 180) if worldwide else rng.uniform(68, 90), 4)
+        hotels.append(hotel)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'hotels.catalog')
+        build_catalog(hotels, path)
+        catalog = HotelCatalog(path)
+        yield HotelIndex(catalog)
+
+
+def brute_force(catalog, lat, lon, low, high, occupancy, radius_km=None, k=None):
+    """Ids of matching hotels by a full scan, nearest first"""
+    origin = unit_vector(lat, lon)
+    found = []
+    for row in range(len(catalog)):
+        hotel = catalog.hotel(row)
+        if 'latitude' not in hotel:
+            continue
+        if not (low <= hotel['price_per_night'] <= high and hotel['max_occupancy'] >= occupancy):
+            continue
+        chord = math.dist(origin, unit_vector(hotel['latitude'], hotel['longitude']))
+        if radius_km is not None and chord_to_km(chord) > radius_km:
+            continue
+        found.append((chord, row, hotel['id']))
+    found.sort()
+    return [hotel_id for _, _, hotel_id in found[:k]]
+
+
+def queries(count):
+    rng = random.Random(11)
+    for _ in range(count):
+        # Include points on either side of the antimeridian
+        lon = rng.choice([rng.uniform(-180, 180), 179.99, -179.99, rng.uniform(68, 90)])
+        low = rng.choice([0, 2000, 4000])
+        yield {
+            'lat': rng.uniform(-90, 90),
+            'lon': lon,
+            'low': low,
+            'high': low + rng.choice([2000, 4000, 100000]),
+            'occupancy': rng.randint(0, 6),
+            'k': rng.choice([1, 5, 20]),
+            'radius_km': rng.choice([None, 50, 500, 3000])
+        }
+
+
+def test_nearest_matches_brute_force(index):
+    for q in queries(60):
+        hotels = index.nearest(q['lat'], q['lon'], q['k'], q['low'], q['high'], q['occupancy'], q['radius_km'])
+        expected = brute_force(index.catalog, q['lat'], q['lon'], q['low'], q['high'], q['occupancy'],
+                               q['radius_km'], q['k'])
+        assert [hotel['id'] for hotel in hotels] == expected
+
+
+def test_within_matches_brute_force(index):
+    for q in queries(60):
+        radius_km = q['radius_km'] or 1000
+        hotels = index.within(q['lat'], q['lon'], radius_km, q['low'], q['high'], q['occupancy'])
+        expected = brute_force(index.catalog, q['lat'], q['lon'], q['low'], q['high'], q['occupancy'], radius_km)
+        assert [hotel['id'] for hotel in hotels] == expected
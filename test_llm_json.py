@@ -0,0 +1,90 @@
+import os
+import json
+import random
+
+from services.gazetteer import DATA_DIR
+from services.llm_json import TolerantJSONParser, parse_llm_json
+
+CORPUS_PATH = os.path.join(DATA_DIR, 'llm_responses.jsonl')
+
+
+def load_replies():
+    with open(CORPUS_PATH, encoding='utf-8') as corpus:
+        return [json.loads(line)['text'] for line in corpus if line.strip()]
+
+
+def parse_in_chunks(text, sizes):
+    """Feed a reply in chunks of the given sizes, as a stream would deliver it"""
+    parser = TolerantJSONParser()
+    i = 0
+    for size in sizes:
+        parser.feed(text[i:i + size])
+        i += size
+    parser.feed(text[i:])
+    return parser.close()
+
+
+def whole(text):
+    parser = TolerantJSONParser()
+    parser.feed(text)
+    return parser.close()
+
+
+def test_chunked_feed_matches_single_feed():
+    rng = random.Random(7)
+    for text in load_replies():
+        expected = whole(text)
+        for _ in range(20):
+            sizes = [rng.randint(1, 12) for _ in range(len(text) // 4 + 1)]
+            parsed = parse_in_chunks(text, sizes)
+            assert parsed.value == expected.value
+            assert parsed.complete == expected.complete
+            assert parsed.repairs == expected.repairs
+            assert parsed.dropped == expected.dropped
+
+
+def test_one_character_chunks_match_single_feed():
+    for text in load_replies():
+        assert parse_in_chunks(text, [1] * len(text)) == whole(text)
+
+
+def test_well_formed_reply_needs_no_repairs():
+    parsed = parse_llm_json('Here you go:\n{"days": [{"day": 1}, {"day": 2}]}\nEnjoy!')
+    assert parsed.value == {'days': [{'day': 1}, {'day': 2}]}
+    assert parsed.complete and not parsed.repairs
+
+
+def test_missing_comma_between_objects_is_repaired():
+    parsed = parse_llm_json('{"days": [{"day": 1} {"day": 2}]}')
+    assert parsed.value == {'days': [{'day': 1}, {'day': 2}]}
+    assert parsed.repairs == ['missing_comma']
+
+
+def test_missing_comma_between_members_is_repaired():
+    parsed = parse_llm_json('{"a": 1 "b": [1 2]}')
+    assert parsed.value == {'a': 1, 'b': [1, 2]}
+    assert parsed.repairs == ['missing_comma']
+
+
+def test_truncated_reply_keeps_complete_days():
+    parsed = parse_llm_json('{"days": [{"day": 1, "title": "Arrival"}, {"day": 2, "title": "Mark')
+    assert parsed.truncated
+    assert parsed.value == {'days': [{'day': 1, 'title': 'Arrival'}]}
+    assert parsed.dropped == 1
+
+
+def test_bad_escapes_never_raise():
+    # A lone trailing backslash and a cut-off \u escape, as a truncated reply can leave them
+    parsed = parse_llm_json('{"}\\}\\\\"\\u')
+    assert parsed.value == {}
+    assert 'invalid_escape' in parsed.repairs
+
+    parsed = parse_llm_json('{"a": "x\\\\\\y", "b": "\\u12"}')
+    assert parsed.value == {'a': 'x\\y', 'b': 'u12'}
+    assert parsed.repairs == ['invalid_escape']
+
+
+def test_undecodable_string_keeps_its_text():
+    parsed = parse_llm_json("{'a': 'x\\\\\"y'}")
+    assert parsed.value == {'a': 'x\\\\"y'}
+    assert 'invalid_escape' in parsed.repairs